@@ -1,16 +1,26 @@
 import asyncio
 import logging
+import threading
+import time
 from abc import ABC
 from abc import abstractmethod
+from dataclasses import dataclass
+from queue import Queue
 from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Tuple
 
-import numpy as np
 from numpy import ndarray
 from pandas import DataFrame
 
+from deribit_data_scrapper.DataBase.CircularBatchStore import CircularBatchStore
+from deribit_data_scrapper.DataBase.SpillBuffer import SpillBuffer
+from deribit_data_scrapper.DataBase.SpillBuffer import SpillStatistics
+from deribit_data_scrapper.DataBase.WriteAheadJournal import WriteAheadJournal
 from deribit_data_scrapper.InstrumentManager import AbstractInstrumentInfo
 from deribit_data_scrapper.Subsciption import AbstractSubscription
+from deribit_data_scrapper.Utils import CircularBuffer
 
 
 # class AutoIncrementDict(dict):
@@ -154,6 +164,19 @@ class AutoIncrementDict(Dict[str, AbstractInstrumentInfo]):
         return super().__getitem__(item)
 
 
+@dataclass()
+class FlushStatistics:
+    """
+    Statistics of one tmp table transfer to record system
+    """
+
+    reason: str  # Flush trigger: size | bytes | age | shutdown
+    number_of_rows: int  # Rows in flushed batch
+    number_of_bytes: int  # Bytes in flushed batch
+    batch_age: float  # Age of the oldest row when batch was written (in sec)
+    write_time: float  # Time spent in _place_data_to_database (in sec)
+
+
 class AbstractDataManager(ABC):
     """
     Абстрактный data manager. Внутри реализована система батчей записи.
@@ -164,14 +187,40 @@ class AbstractDataManager(ABC):
     """
 
     # instrument_name_instrument_id_map: AutoIncrementDict[str, int] = None
-    circular_batch_tables: Dict[int, DataFrame]
+    circular_batch_tables: CircularBatchStore
 
-    batch_mutable_pointer: Optional[int] = None
     batch_number_of_tables: Optional[int] = None
     batch_size_of_table: Optional[int] = None
-    batch_currently_selected_table: Optional[int] = None
     async_loop: asyncio.SelectorEventLoop
 
+    # Background flush pipeline (record_system.flush_in_background)
+    flush_in_background: bool = False
+    _flush_queue: Optional[Queue] = None
+    _flush_thread: Optional[threading.Thread] = None
+    _flush_loop: Optional[asyncio.AbstractEventLoop] = None
+    _free_tables: List[threading.Event]
+
+    # Flush policy: table is full OR oldest row is older than max_batch_age OR batch is bigger than max_batch_bytes
+    max_batch_age: Optional[float] = None
+    max_batch_bytes: Optional[int] = None
+    _age_timer_future: Optional[asyncio.Future] = None
+    # Recorded by writer thread in background mode, read by event loop
+    flush_statistics: CircularBuffer[FlushStatistics]
+    _flush_statistics_lock: threading.Lock
+
+    # Optional write-ahead journal (record_system.use_write_ahead_journal)
+    journal: Optional[WriteAheadJournal] = None
+    _table_segments: Dict[int, int]
+    _journal_sync_timer_future: Optional[asyncio.Future] = None
+
+    # Optional disk spill of batches failed because of database outage (record_system.use_spill_buffer)
+    spill_buffer: Optional[SpillBuffer] = None
+    _spill_lock: Optional[asyncio.Lock] = None
+    _spill_attempt: int = 0
+    _next_drain_time: float = 0.0
+    _drain_queued: bool = False
+    _drain_timer_future: Optional[asyncio.Future] = None
+
     subscription_type: Optional[AbstractSubscription] = None
 
     def __init__(
@@ -188,13 +237,21 @@ class AbstractDataManager(ABC):
         # Check if all structure and content of record system is correct
         self.async_loop = loop
 
-        asyncio.run_coroutine_threadsafe(self._connect_to_database(), self.async_loop)
-        asyncio.run_coroutine_threadsafe(
+        _connection_future = asyncio.run_coroutine_threadsafe(
+            self._connect_to_database(), self.async_loop
+        )
+        _validation_future = asyncio.run_coroutine_threadsafe(
             self._validate_existing_of_database_structure(), self.async_loop
         )
         # Create tmp_storages
 
         self._create_tmp_batch_tables()
+        self._start_flush_worker()
+        self._set_flush_policy()
+        self._open_write_ahead_journal(
+            wait_for=[_connection_future, _validation_future]
+        )
+        self._open_spill_buffer()
 
     async def _validate_existing_of_database_structure(self):
         """
@@ -240,84 +297,517 @@ class AbstractDataManager(ABC):
         pass
 
     async def add_data(self, update_line: ndarray):
-        # TODO: Make ability to record 2D array
         """
         DON'T TOUCH ME!
         Добавление update в batch system.
         :param update_line:
         :return:
         """
-        # Hardcoded solution. in case 1D array
-        if len(update_line.shape) == 1:
-            assert update_line.shape[0] == len(
-                self.subscription_type.create_columns_list()
+        # 1D array/0-d record is one row, 2D array/1D records is block of rows.
+        # Block is copied by slices, split at table boundary
+        _records = self.circular_batch_tables.as_records(update_line)
+        _offset = 0
+        while _offset < _records.shape[0]:
+            _table, _pointer = self._current_batch_position()
+            while not self._free_tables[_table].is_set():
+                # Other producer may move ring while we wait
+                await self._wait_for_free_table(_table)
+                _table, _pointer = self._current_batch_position()
+            _written, filled_table = self.circular_batch_tables.write_block(
+                _records[_offset:]
             )
-            self.circular_batch_tables[self.batch_currently_selected_table].iloc[
-                self.batch_mutable_pointer
-            ] = update_line
-            self.batch_mutable_pointer += 1
-            if self.batch_mutable_pointer >= self.batch_size_of_table:
-                if self.developConfiguration["DATA_MANAGER"][
-                    "SHOW_WHEN_DATA_TRANSFERS"
-                ]:
-                    print(
-                        "Transfer data:\n",
-                        self.circular_batch_tables[self.batch_currently_selected_table],
-                        "\n",
-                    )
-                    print(
-                        f"Pointer In Table: ({self.batch_mutable_pointer}) | Pointer Out Table: ({self.batch_currently_selected_table})"
-                    )
-                    print("=====" * 20)
+            self._journal_rows(_table, _pointer, _written)
+            _offset += _written
+            if filled_table is not None:
+                await self._flush_batch_table(table_index=filled_table)
+
+        if (
+            self.max_batch_bytes
+            and self.circular_batch_tables.current_number_of_bytes
+            >= self.max_batch_bytes
+        ):
+            await self._flush_current_table(reason="bytes")
+
+    async def _flush_current_table(self, reason: str):
+        """
+        Flush partially filled current tmp table.
+        :param reason: flush trigger for statistics
+        :return:
+        """
+        table_index = self.circular_batch_tables.close_current_table()
+        if table_index is not None:
+            await self._flush_batch_table(table_index=table_index, reason=reason)
+
+    async def _flush_batch_table(self, table_index: int, reason: str = "size"):
+        """
+        Transfer filled tmp table to record system.
+        Inline mode awaits the write; background mode hands the table to the writer thread
+        and waits only if the next table of the ring is still being written.
+        In both modes table is marked busy until written, add_data never writes to busy table.
+        :param table_index:
+        :param reason: flush trigger for statistics
+        :return:
+        """
+        if self.journal is not None:
+            self._table_segments[table_index] = self.journal.rotate()
+
+        if self.developConfiguration["DATA_MANAGER"]["SHOW_WHEN_DATA_TRANSFERS"]:
+            print(
+                "Transfer data:\n",
+                self.circular_batch_tables.to_dataframe(table_index),
+                "\n",
+            )
+            print(
+                f"Pointer In Table: ({self.circular_batch_tables.mutable_pointer}) | Pointer Out Table: ({table_index}) "
+                f"| Flush queue depth: ({self.flush_queue_depth}) | Reason: ({reason})"
+            )
+            print("=====" * 20)
+
+        self._free_tables[table_index].clear()
+        if not self.flush_in_background:
+            # Non-blocking daemon yields to event loop while writing, table stays busy until written
+            try:
+                await self._write_batch_table(table_index=table_index, reason=reason)
+            finally:
+                self._free_tables[table_index].set()
+            return
+
+        if self._flush_queue.full():
+            logging.warning(
+                f"Flush queue is full ({self.flush_queue_depth}). Wait for writer thread"
+            )
+            await self.async_loop.run_in_executor(
+                None, self._flush_queue.put, (table_index, reason)
+            )
+        else:
+            self._flush_queue.put_nowait((table_index, reason))
+
+        next_table = self.circular_batch_tables.currently_selected_table
+        if not self._free_tables[next_table].is_set():
+            await self._wait_for_free_table(next_table)
+
+    async def _wait_for_free_table(self, table_index: int):
+        """
+        Wait (without blocking event loop) until tmp table is written to database.
+        :param table_index:
+        :return:
+        """
+        logging.warning(
+            f"Writer is behind ingestion. Wait for tmp table ({table_index}); flush queue depth = ({self.flush_queue_depth})"
+        )
+        await self.async_loop.run_in_executor(None, self._free_tables[table_index].wait)
+
+    async def _write_batch_table(self, table_index: int, reason: str = "size"):
+        """
+        Place records of tmp table to database.
+        :param table_index:
+        :param reason: flush trigger for statistics
+        :return:
+        """
+        _number_of_rows = int(self.circular_batch_tables.table_rows[table_index])
+        _batch_age = (
+            time.monotonic() - self.circular_batch_tables.table_started_at[table_index]
+        )
+        _write_start = time.monotonic()
+        if self.spill_buffer is None:
+            await self._place_records_to_database(
+                records=self.circular_batch_tables.to_records(table_index)
+            )
+        else:
+            # Spilled batch is safe on disk, so its journal segment is acknowledged too
+            await self._place_or_spill_records(
+                records=self.circular_batch_tables.to_records(table_index)
+            )
+        if self.journal is not None:
+            self.journal.acknowledge(self._table_segments.pop(table_index))
+        _statistics = FlushStatistics(
+            reason=reason,
+            number_of_rows=_number_of_rows,
+            number_of_bytes=_number_of_rows * self.circular_batch_tables.row_nbytes,
+            batch_age=_batch_age,
+            write_time=time.monotonic() - _write_start,
+        )
+        with self._flush_statistics_lock:
+            self.flush_statistics.record(_statistics)
+        logging.debug(f"Flushed batch: {self.last_flush_statistics}")
+
+    def _current_batch_position(self) -> Tuple[int, int]:
+        return (
+            self.circular_batch_tables.currently_selected_table,
+            self.circular_batch_tables.mutable_pointer,
+        )
+
+    def _journal_rows(self, table_index: int, start: int, number_of_rows: int):
+        """
+        Append rows already converted by batch store to write-ahead journal.
+        :param table_index:
+        :param start:
+        :param number_of_rows:
+        :return:
+        """
+        if self.journal is not None:
+            self.journal.append(
+                self.circular_batch_tables[table_index][start : start + number_of_rows]
+            )
+
+    def _open_write_ahead_journal(self, wait_for: List[asyncio.Future]):
+        """
+        Open journal if record_system.use_write_ahead_journal is enabled and schedule replay of
+        segments left by previous run (after connection and validation of database).
+        :param wait_for: startup futures of daemon
+        :return:
+        """
+        self._table_segments = dict()
+        if not self.cfg["record_system"].get("use_write_ahead_journal", False):
+            return
+
+        self.journal = WriteAheadJournal(
+            directory=self.cfg["record_system"].get(
+                "journal_directory", "WriteAheadJournal"
+            ),
+            name=f"{self.subscription_type.__class__.__name__}_{self.subscription_type.tables_names[0]}",
+            row_nbytes=self.circular_batch_tables.row_nbytes,
+            fsync_interval=self.cfg["record_system"].get("journal_fsync_interval", 1),
+        )
+        if self.journal.fsync_interval:
+            self._journal_sync_timer_future = asyncio.run_coroutine_threadsafe(
+                self._journal_sync_timer(), self.async_loop
+            )
+        if self.journal.pending_segments:
+            # Replay goes through the same writer as live tables, so it is written first
+            if self.flush_in_background:
+                self._flush_queue.put_nowait((wait_for, "replay"))
+            else:
+                asyncio.run_coroutine_threadsafe(
+                    self._replay_write_ahead_journal(wait_for=wait_for),
+                    self.async_loop,
+                )
+
+    async def _journal_sync_timer(self):
+        """
+        Fsync write-ahead journal every journal_fsync_interval sec, also when no rows come after burst.
+        Fsync runs in executor, event loop keeps appending rows.
+        :return:
+        """
+        while True:
+            await asyncio.sleep(self.journal.fsync_interval)
+            try:
+                await self.async_loop.run_in_executor(None, self.journal.sync)
+            except Exception as e:
+                logging.exception(f"Fsync of write-ahead journal raise error: {e}")
+
+    async def _replay_write_ahead_journal(self, wait_for: List[asyncio.Future]):
+        """
+        Place rows of not acknowledged journal segments to database.
+        :param wait_for:
+        :return:
+        """
+        for _future in wait_for:
+            await asyncio.wrap_future(_future)
+
+        for segment_id in list(self.journal.pending_segments):
+            _rows = self.circular_batch_tables.rows_from_bytes(
+                self.journal.read_segment(segment_id)
+            )
+            if _rows.shape[0] != 0:
+                logging.warning(
+                    f"Replay ({_rows.shape[0]}) rows from journal segment ({segment_id})"
+                )
+                if self.spill_buffer is None:
+                    await self._place_records_to_database(records=_rows)
+                else:
+                    await self._place_or_spill_records(records=_rows)
+            self.journal.acknowledge(segment_id)
+
+    def _open_spill_buffer(self):
+        """
+        Open spill buffer if record_system.use_spill_buffer is enabled and start background drainer.
+        Segments left by previous run are drained by the same timer after startup.
+        :return:
+        """
+        if not self.cfg["record_system"].get("use_spill_buffer", False):
+            return
+
+        self.spill_buffer = SpillBuffer(
+            directory=self.cfg["record_system"].get("spill_directory", "SpillBuffer"),
+            name=f"{self.subscription_type.__class__.__name__}_{self.subscription_type.tables_names[0]}",
+            max_bytes=self.cfg["record_system"].get("spill_max_bytes", 1 << 30),
+        )
+        self._spill_lock = asyncio.Lock()
+        self._drain_timer_future = asyncio.run_coroutine_threadsafe(
+            self._spill_drain_timer(), self.async_loop
+        )
+
+    @property
+    def spill_statistics(self) -> Optional[SpillStatistics]:
+        """
+        Counters of spill buffer (spilled, replayed, dropped batches, pending segments).
+        :return:
+        """
+        if self.spill_buffer is None:
+            return None
+        return self.spill_buffer.statistics
+
+    def _schedule_drain_retry(self):
+        """
+        Exponential backoff of drain attempts: spill_retry_wait_time * 2 ** attempt, not more than
+        spill_retry_max_wait_time.
+        :return:
+        """
+        _wait_time = min(
+            self.cfg["record_system"].get("spill_retry_wait_time", 1)
+            * 2**self._spill_attempt,
+            self.cfg["record_system"].get("spill_retry_max_wait_time", 60),
+        )
+        self._spill_attempt += 1
+        self._next_drain_time = time.monotonic() + _wait_time
+        logging.warning(
+            f"Database is unavailable. Next drain of spill buffer in ({_wait_time}) sec"
+        )
 
-                self.batch_mutable_pointer = 0
-                await self._place_data_to_database(
-                    record_dataframe=self.circular_batch_tables[
-                        self.batch_currently_selected_table
-                    ]
+    async def _place_or_spill_records(self, records: ndarray):
+        """
+        Place batch to database. If database is unavailable (ConnectionError) or older batches are still
+        spilled, batch goes to spill buffer instead, so order of batches is kept.
+        Other errors (batch rejected by database) are raised to caller, batch is never spilled.
+        :param records:
+        :return:
+        """
+        async with self._spill_lock:
+            if self.spill_buffer.has_pending:
+                await self._drain_spill_buffer()
+            if not self.spill_buffer.has_pending:
+                try:
+                    await self._place_records_to_database(records=records)
+                    return
+                except ConnectionError as e:
+                    logging.error(f"Cannot place batch to database: {e}")
+                    self._schedule_drain_retry()
+            self.spill_buffer.spill(records)
+
+    async def _drain_spill_buffer(self):
+        """
+        Replay spilled segments in order. Stops at first connection failure and waits for backoff.
+        Segment rejected by database with other error is quarantined, so it does not block next ones.
+        Must be called under _spill_lock.
+        :return:
+        """
+        if time.monotonic() < self._next_drain_time:
+            return
+        for segment_id in list(self.spill_buffer.pending_segments):
+            _rows = self.circular_batch_tables.rows_from_bytes(
+                self.spill_buffer.read_segment(segment_id)
+            )
+            try:
+                if _rows.shape[0] != 0:
+                    await self._place_records_to_database(records=_rows)
+            except ConnectionError as e:
+                logging.error(f"Drain of spill segment ({segment_id}) failed: {e}")
+                self.spill_buffer.record_failed_drain()
+                self._schedule_drain_retry()
+                return
+            except Exception as e:
+                logging.exception(
+                    f"Spill segment ({segment_id}) is rejected by database. Quarantine it: {e}"
                 )
-                self.batch_currently_selected_table += 1
-                if self.batch_currently_selected_table >= self.batch_number_of_tables:
-                    self.batch_currently_selected_table = 0
-
-        # Hardcoded solution. in case 2D array
-        if len(update_line.shape) == 2:
-            assert update_line.shape[1] == len(
-                self.subscription_type.create_columns_list()
+                self.spill_buffer.quarantine(segment_id, _rows.shape[0])
+                continue
+            self.spill_buffer.acknowledge(segment_id, _rows.shape[0])
+            logging.info(
+                f"Replayed ({_rows.shape[0]}) rows from spill segment ({segment_id})"
+            )
+        self._spill_attempt = 0
+
+    async def _drain_spill_under_lock(self):
+        async with self._spill_lock:
+            await self._drain_spill_buffer()
+
+    async def _spill_drain_timer(self):
+        """
+        Background drainer: replay spill buffer when database is back, even if no new batches come.
+        Background flush mode hands drain to writer thread, so it never runs concurrently with writes.
+        :return:
+        """
+        _check_interval = self.cfg["record_system"].get("spill_retry_wait_time", 1)
+        while True:
+            await asyncio.sleep(_check_interval)
+            if (
+                not self.spill_buffer.has_pending
+                or time.monotonic() < self._next_drain_time
+            ):
+                continue
+            try:
+                if self.flush_in_background:
+                    if not self._drain_queued and not self._flush_queue.full():
+                        self._drain_queued = True
+                        self._flush_queue.put_nowait((None, "drain"))
+                else:
+                    await self._drain_spill_under_lock()
+            except Exception as e:
+                logging.exception(f"Drain of spill buffer raise error: {e}")
+
+    async def shutdown(self):
+        """
+        Flush not full tmp table, wait for writer thread and close journal.
+        :return:
+        """
+        await self._flush_current_table(reason="shutdown")
+        self.stop_flush_worker()
+        if self._age_timer_future is not None:
+            self._age_timer_future.cancel()
+        if self._drain_timer_future is not None:
+            self._drain_timer_future.cancel()
+        if self._journal_sync_timer_future is not None:
+            self._journal_sync_timer_future.cancel()
+        if self.journal is not None:
+            self.journal.close()
+
+    @property
+    def last_flush_statistics(self) -> Optional[FlushStatistics]:
+        """
+        Batch size and age of the latest flush. Full history is kept at flush_statistics.
+        :return:
+        """
+        with self._flush_statistics_lock:
+            return self.flush_statistics[-1]
+
+    def _set_flush_policy(self):
+        """
+        Read latency bounds of record_system and start loop-level timer for age check.
+        :return:
+        """
+        self.flush_statistics = CircularBuffer(
+            size=self.cfg["record_system"].get("flush_statistics_buffer_size", 100)
+        )
+        self._flush_statistics_lock = threading.Lock()
+        self.max_batch_age = self.cfg["record_system"].get("max_batch_age", None)
+        self.max_batch_bytes = self.cfg["record_system"].get("max_batch_bytes", None)
+        if self.max_batch_age:
+            self._age_timer_future = asyncio.run_coroutine_threadsafe(
+                self._batch_age_timer(), self.async_loop
+            )
+
+    async def _batch_age_timer(self):
+        """
+        Flush current tmp table when its oldest row is older than record_system.max_batch_age.
+        :return:
+        """
+        _check_interval = self.cfg["record_system"].get(
+            "flush_check_interval", self.max_batch_age / 2
+        )
+        while True:
+            await asyncio.sleep(_check_interval)
+            try:
+                if self.circular_batch_tables.current_table_age >= self.max_batch_age:
+                    await self._flush_current_table(reason="age")
+            except Exception as e:
+                logging.exception(f"Flush by age raise error: {e}")
+
+    @property
+    def flush_queue_depth(self) -> int:
+        """
+        Number of filled tmp tables waiting for the writer thread.
+        :return:
+        """
+        if self._flush_queue is None:
+            return 0
+        return self._flush_queue.qsize()
+
+    def _start_flush_worker(self):
+        """
+        Start dedicated writer thread if record_system.flush_in_background is enabled.
+        :return:
+        """
+        self._free_tables = [
+            threading.Event() for _ in range(self.batch_number_of_tables)
+        ]
+        for _event in self._free_tables:
+            _event.set()
+
+        self.flush_in_background = self.cfg["record_system"].get(
+            "flush_in_background", False
+        )
+        if not self.flush_in_background:
+            return
+
+        if self.batch_number_of_tables < 2:
+            logging.warning(
+                "Background flush needs at least 2 tmp tables. Ingestion will wait for every write"
+            )
+        self._flush_queue = Queue(
+            maxsize=self.cfg["record_system"].get(
+                "flush_queue_size", self.batch_number_of_tables
             )
-            for update_object in update_line:
-                self.circular_batch_tables[self.batch_currently_selected_table].iloc[
-                    self.batch_mutable_pointer
-                ] = update_object
-                self.batch_mutable_pointer += 1
-                if self.batch_mutable_pointer >= self.batch_size_of_table:
-                    if self.developConfiguration["DATA_MANAGER"][
-                        "SHOW_WHEN_DATA_TRANSFERS"
-                    ]:
-                        print(
-                            "Transfer data:\n",
-                            self.circular_batch_tables[
-                                self.batch_currently_selected_table
-                            ],
-                            "\n",
-                        )
-                        print(
-                            f"Pointer In Table: ({self.batch_mutable_pointer}) | Pointer Out Table: ({self.batch_currently_selected_table})"
-                        )
-                        print("=====" * 20)
-
-                    self.batch_mutable_pointer = 0
-                    await self._place_data_to_database(
-                        record_dataframe=self.circular_batch_tables[
-                            self.batch_currently_selected_table
-                        ]
+        )
+        self._flush_loop = asyncio.new_event_loop()
+        self._flush_thread = threading.Thread(
+            target=self._flush_worker,
+            name=f"{self.__class__.__name__}Writer",
+            daemon=True,
+        )
+        self._flush_thread.start()
+        logging.info(
+            f"Background flush worker started. Queue size = ({self._flush_queue.maxsize})"
+        )
+
+    def _flush_worker(self):
+        """
+        Writer thread body. Takes filled tables from queue and places them to database
+        in own event loop, so subclasses _place_data_to_database are used as is.
+        :return:
+        """
+        asyncio.set_event_loop(self._flush_loop)
+        while True:
+            _item = self._flush_queue.get()
+            if _item is None:
+                self._flush_queue.task_done()
+                break
+            _payload, reason = _item
+            # Replay item carries startup futures instead of table index
+            if reason == "replay":
+                try:
+                    self._flush_loop.run_until_complete(
+                        self._replay_write_ahead_journal(wait_for=_payload)
                     )
-                    self.batch_currently_selected_table += 1
-                    if (
-                        self.batch_currently_selected_table
-                        >= self.batch_number_of_tables
-                    ):
-                        self.batch_currently_selected_table = 0
+                except Exception as e:
+                    logging.exception(f"Replay of write-ahead journal raise error: {e}")
+                finally:
+                    self._flush_queue.task_done()
+                continue
+            # Drain item of background drainer
+            if reason == "drain":
+                try:
+                    self._flush_loop.run_until_complete(self._drain_spill_under_lock())
+                except Exception as e:
+                    logging.exception(f"Drain of spill buffer raise error: {e}")
+                finally:
+                    self._drain_queued = False
+                    self._flush_queue.task_done()
+                continue
+            table_index = _payload
+            try:
+                self._flush_loop.run_until_complete(
+                    self._write_batch_table(table_index=table_index, reason=reason)
+                )
+            except Exception as e:
+                logging.exception(
+                    f"Background flush of tmp table ({table_index}) raise error: {e}"
+                )
+            finally:
+                self._free_tables[table_index].set()
+                self._flush_queue.task_done()
+
+    def stop_flush_worker(self):
+        """
+        Wait until all queued tables are written and stop writer thread.
+        :return:
+        """
+        if self._flush_thread is None:
+            return
+        self._flush_queue.put(None)
+        self._flush_thread.join()
+        self._flush_thread = None
+        self._flush_loop.close()
 
     def _create_tmp_batch_tables(self):
         """
@@ -325,9 +815,8 @@ class AbstractDataManager(ABC):
         Creates tmp batches for batch record system.
         :return:
         """
-        columns = self.subscription_type.create_columns_list()
-        self.batch_mutable_pointer = 0
-        self.batch_currently_selected_table = 0
+        record_dtype = self.subscription_type.create_record_dtype()
+        assert len(record_dtype.names) == self.subscription_type.number_of_columns
 
         # Create columns for tmp tables
         if self.cfg["record_system"]["use_batches_to_record"]:
@@ -337,48 +826,37 @@ class AbstractDataManager(ABC):
             self.batch_size_of_table = self.cfg["record_system"][
                 "size_of_tmp_batch_table"
             ]
-
-            _local = np.zeros(
-                shape=(
-                    self.cfg["record_system"]["size_of_tmp_batch_table"],
-                    self.subscription_type.number_of_columns,
-                )
-            )
-            _local[:] = np.NaN
-            # Create tmp tables
-            self.circular_batch_tables = {
-                _: DataFrame(_local, columns=columns)
-                for _ in range(self.cfg["record_system"]["number_of_tmp_tables"])
-            }
-
-            assert (
-                len(self.circular_batch_tables)
-                == self.cfg["record_system"]["number_of_tmp_tables"]
-            )
-
-            del _local, columns
-            logging.info(
-                f"""
-            TMP tables for batching has been created. Number of tables = ({len(self.circular_batch_tables)}),
-            Size of one table is ({self.circular_batch_tables[0].shape})  
-            """
-            )
+            _mode = ""
         # No batch system enabled
         else:
             self.batch_number_of_tables = 1
             self.batch_size_of_table = 1
-            _local = np.zeros(shape=(1, self.subscription_type.number_of_columns))
-            _local[:] = np.NaN
-            # Create tmp tables
-            self.circular_batch_tables = {0: DataFrame(_local, columns=columns)}
+            _mode = "NO BATCH MODE: "
 
-            del _local, columns
-            logging.info(
-                f"""
-            NO BATCH MODE: TMP tables for batching has been created. Number of tables = ({len(self.circular_batch_tables)}),
-            Size of one table is ({self.circular_batch_tables[0].shape})  
+        # Create tmp tables
+        self.circular_batch_tables = CircularBatchStore(
+            record_dtype=record_dtype,
+            number_of_tables=self.batch_number_of_tables,
+            size_of_table=self.batch_size_of_table,
+        )
+        assert len(self.circular_batch_tables) == self.batch_number_of_tables
+
+        del record_dtype
+        logging.info(
+            f"""
+            {_mode}TMP tables for batching has been created. Number of tables = ({len(self.circular_batch_tables)}),
+            Size of one table is ({self.circular_batch_tables.table_shape}), row is ({self.circular_batch_tables.row_nbytes}) bytes
             """
-            )
+        )
+
+    async def _place_records_to_database(self, records: ndarray) -> int:
+        """
+        Place typed records (record dtype of subscription) to database.
+        Default builds DataFrame and calls _place_data_to_database. Override it if db system can write records directly.
+        :param records:
+        :return:
+        """
+        return await self._place_data_to_database(record_dataframe=DataFrame(records))
 
     @abstractmethod
     async def _place_data_to_database(self, record_dataframe: DataFrame) -> int:
@@ -0,0 +1,183 @@
+import time
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from numpy import ndarray
+from numpy.lib import recfunctions
+from pandas import DataFrame
+
+
+class CircularBatchStore:
+    """
+    Кольцевое хранилище tmp batch таблиц для record system.
+    Все таблицы лежат в одном заранее выделенном непрерывном structured ndarray формы
+    (number_of_tables, size_of_table), тип строки задается схемой подписки (record dtype).
+    Запись строки - прямое присваивание в срез, DataFrame строится только в момент flush.
+    """
+
+    columns: List[str]
+    record_dtype: np.dtype
+    storage: ndarray
+    # Same memory as storage, row is one np.void of row_nbytes
+    raw_storage: ndarray
+
+    number_of_tables: int
+    size_of_table: int
+    mutable_pointer: int = 0
+    currently_selected_table: int = 0
+
+    # Number of rows in table at the moment of switch
+    table_rows: ndarray
+    # time.monotonic() of the first row written to table
+    table_started_at: ndarray
+
+    def __init__(
+        self,
+        record_dtype: np.dtype,
+        number_of_tables: int,
+        size_of_table: int,
+    ):
+        self.record_dtype = np.dtype(record_dtype)
+        self.columns = list(self.record_dtype.names)
+        self.number_of_tables = number_of_tables
+        self.size_of_table = size_of_table
+
+        self.storage = np.zeros(
+            shape=(number_of_tables, size_of_table), dtype=self.record_dtype
+        )
+        # Structured assignment copies field by field, raw rows are copied as one memcpy
+        self._raw_dtype = np.dtype((np.void, self.record_dtype.itemsize))
+        self.raw_storage = self.storage.view(self._raw_dtype)
+        self.mutable_pointer = 0
+        self.currently_selected_table = 0
+
+        self.table_rows = np.zeros(number_of_tables, dtype=np.int64)
+        self.table_started_at = np.zeros(number_of_tables, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self.number_of_tables
+
+    def __getitem__(self, table_index: int) -> ndarray:
+        """
+        View на одну tmp таблицу (без копирования).
+        :param table_index:
+        :return:
+        """
+        return self.storage[table_index]
+
+    @property
+    def table_shape(self) -> tuple:
+        return self.size_of_table, len(self.columns)
+
+    @property
+    def row_nbytes(self) -> int:
+        return self.record_dtype.itemsize
+
+    @property
+    def current_number_of_bytes(self) -> int:
+        return self.mutable_pointer * self.row_nbytes
+
+    @property
+    def current_table_age(self) -> float:
+        """
+        Возраст самой старой незаписанной строки текущей таблицы (в сек). 0 если таблица пуста.
+        :return:
+        """
+        if self.mutable_pointer == 0:
+            return 0.0
+        return time.monotonic() - self.table_started_at[self.currently_selected_table]
+
+    def _mark_table_start(self):
+        if self.mutable_pointer == 0:
+            self.table_started_at[self.currently_selected_table] = time.monotonic()
+
+    def as_records(self, update: ndarray) -> ndarray:
+        """
+        Приводит update подписки к 1D массиву записей record dtype.
+        Structured update (0-d или 1D) используется как есть, обычный 1D/2D ndarray конвертируется по колонкам.
+        :param update:
+        :return:
+        """
+        if update.dtype == self.record_dtype:
+            return update.reshape(-1)
+        if len(update.shape) == 1:
+            assert update.shape[0] == len(self.columns)
+            return np.array([tuple(update.tolist())], dtype=self.record_dtype)
+        assert update.shape[1] == len(self.columns)
+        if update.dtype.kind in "biuf":
+            return recfunctions.unstructured_to_structured(
+                update, dtype=self.record_dtype
+            )
+        return np.array(list(map(tuple, update.tolist())), dtype=self.record_dtype)
+
+    def write_block(self, records: ndarray) -> Tuple[int, Optional[int]]:
+        """
+        Копирует максимально возможную часть блока записей в текущую таблицу одним slice copy.
+        Блок, пересекающий границу таблицы, записывается за несколько вызовов.
+        :param records: 1D ndarray record dtype (см. as_records)
+        :return: (количество записанных строк, индекс заполненной таблицы или None)
+        """
+        self._mark_table_start()
+        number_of_rows = min(
+            records.shape[0], self.size_of_table - self.mutable_pointer
+        )
+        self.raw_storage[
+            self.currently_selected_table,
+            self.mutable_pointer : self.mutable_pointer + number_of_rows,
+        ] = records[:number_of_rows].view(self._raw_dtype)
+        self.mutable_pointer += number_of_rows
+        if self.mutable_pointer >= self.size_of_table:
+            return number_of_rows, self._switch_table()
+        return number_of_rows, None
+
+    def close_current_table(self) -> Optional[int]:
+        """
+        Досрочно закрывает частично заполненную таблицу (flush по возрасту/объему).
+        :return: индекс закрытой таблицы или None если таблица пуста
+        """
+        if self.mutable_pointer == 0:
+            return None
+        return self._switch_table()
+
+    def _switch_table(self) -> int:
+        """
+        Переключение на следующую таблицу кольца.
+        :return: индекс таблицы, которая была заполнена
+        """
+        filled_table = self.currently_selected_table
+        self.table_rows[filled_table] = self.mutable_pointer
+        self.mutable_pointer = 0
+        self.currently_selected_table += 1
+        if self.currently_selected_table >= self.number_of_tables:
+            self.currently_selected_table = 0
+        return filled_table
+
+    def rows_from_bytes(self, buffer: bytes) -> ndarray:
+        """
+        Обратное преобразование байтов строк (например из журнала) в записи record dtype.
+        :param buffer:
+        :return:
+        """
+        return np.frombuffer(buffer, dtype=self.record_dtype)
+
+    def to_records(self, table_index: int, number_of_rows: int = None) -> ndarray:
+        """
+        Записи таблицы кольца без копирования.
+        :param table_index:
+        :param number_of_rows: количество первых строк (по умолчанию записанные при переключении)
+        :return:
+        """
+        if number_of_rows is None:
+            number_of_rows = int(self.table_rows[table_index]) or None
+        return self.storage[table_index, :number_of_rows]
+
+    def to_dataframe(self, table_index: int, number_of_rows: int = None) -> DataFrame:
+        """
+        DataFrame по записям таблицы кольца. Колонки сохраняют типы record dtype.
+        :param table_index:
+        :param number_of_rows: количество первых строк (по умолчанию записанные при переключении)
+        :return:
+        """
+        return DataFrame(self.to_records(table_index, number_of_rows))
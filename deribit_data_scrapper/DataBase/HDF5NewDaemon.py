@@ -1,25 +1,91 @@
 import asyncio
 import logging
 import os
+import threading
+import time
+from datetime import datetime
+from datetime import timezone
+from queue import Queue
 from typing import Optional
 
 import numpy as np
+import tables
+from numpy import ndarray
 from pandas import DataFrame
 from pandas import HDFStore
 
 from deribit_data_scrapper.DataBase.AbstractDataSaverManager import AbstractDataManager
+from deribit_data_scrapper.DataBase.HDF5PartitionManifest import HDF5PartitionManifest
 from deribit_data_scrapper.Subsciption.AbstractSubscription import AbstractSubscription
 
+ROLLOVER_PERIODS_MS = {"hour": 3_600_000, "day": 86_400_000}
+ROLLOVER_LABEL_FORMAT = {"hour": "%Y%m%dT%H", "day": "%Y%m%d"}
+# Rows read at once when manifest of partition is rebuilt from file
+RECOVERY_CHUNK_ROWS = 1_000_000
+
+# HDF5 library is not thread-safe: writer and indexer threads take this lock around PyTables calls
+HDF5_LOCK = threading.Lock()
+
+
+def hdf5_table_dtype(record_dtype: np.dtype) -> np.dtype:
+    """
+    PyTables не хранит unicode колонки - они заменяются на bytes той же длины.
+    :param record_dtype:
+    :return:
+    """
+    return np.dtype(
+        [
+            (name, f"S{record_dtype[name].itemsize // record_dtype[name].alignment}")
+            if record_dtype[name].kind == "U"
+            else (name, record_dtype[name])
+            for name in record_dtype.names
+        ]
+    )
+
+
+def index_hdf5_table(hdf5_table: tables.Table, index_columns: list):
+    """
+    Create completely sorted indexes for columns of table (if not exist yet).
+    :param hdf5_table:
+    :param index_columns:
+    :return:
+    """
+    for column in index_columns:
+        if column in hdf5_table.colnames:
+            _column = hdf5_table.colinstances[column]
+            if not _column.is_indexed:
+                _column.create_csindex()
+
 
 class HDF5Daemon(AbstractDataManager):
     """
     Daemon for HDF5 record type.
-    TODO: insert docstring
+    hdf5.writer = pytables (default): one PyTables file and table node stay open while daemon works,
+    records of batch table are appended directly. Column indexes are built by timer every hdf5.index_interval sec
+    (and at shutdown), after that PyTables updates them at every append.
+    hdf5.writer = pandas: legacy DataFrame.to_hdf append for every batch.
+    With hdf5.rollover_period (hour | day) or hdf5.rollover_max_bytes pytables writer rolls over to a new
+    partition file. Closed partitions are indexed in background thread and described in manifest JSON.
     """
 
     connection: HDFStore = None
     database_cursor = None
 
+    hdf5_file: Optional[tables.File] = None
+    hdf5_table: Optional[tables.Table] = None
+
+    # Time/size partitioning of pytables writer
+    rollover_period: Optional[str] = None
+    rollover_max_bytes: Optional[int] = None
+    manifest: Optional[HDF5PartitionManifest] = None
+    current_partition_key: Optional[int] = None
+    _index_queue: Optional[Queue] = None
+    _index_thread: Optional[threading.Thread] = None
+
+    # Indexes of open file / manifest of open partition are refreshed by timer, not only at shutdown
+    index_interval: Optional[float] = None
+    _index_timer_future: Optional[asyncio.Future] = None
+
     def __init__(
         self,
         configuration_path,
@@ -31,11 +97,24 @@ class HDF5Daemon(AbstractDataManager):
             format="%(asctime)s | %(levelname)s %(module)s | %(message)s",
             datefmt="%Y-%m-%d %H:%M:%S",
         )
+        self.writer = configuration_path["hdf5"].get("writer", "pytables")
+        self.rollover_period = configuration_path["hdf5"].get("rollover_period", None)
+        self.rollover_max_bytes = configuration_path["hdf5"].get(
+            "rollover_max_bytes", None
+        )
+        self.index_columns = configuration_path["hdf5"].get(
+            "index_columns", ["TIMESTAMP_VALUE"]
+        )
+        self.index_interval = configuration_path["hdf5"].get("index_interval", 600)
         super().__init__(
             config_path=configuration_path,
             subscription_type=subscription_type,
             loop=loop,
         )
+        if self.writer == "pytables" and self.index_interval:
+            self._index_timer_future = asyncio.run_coroutine_threadsafe(
+                self._index_timer(), self.async_loop
+            )
 
     async def _connect_to_database(self):
         print("Connect HDF5")
@@ -44,6 +123,17 @@ class HDF5Daemon(AbstractDataManager):
             if not os.path.exists(f"{self.cfg['hdf5']['hdf5_database_directory']}/"):
                 os.mkdir(f"{self.cfg['hdf5']['hdf5_database_directory']}/")
                 logging.warning("Create folder for storage")
+
+            if self.writer == "pytables" and self.rollover_enabled:
+                self._open_partition_manifest()
+                logging.info("Success connection to HDF5 database")
+                return
+
+            if self.writer == "pytables":
+                self._open_hdf5_table()
+                logging.info("Success connection to HDF5 database")
+                return
+
             if not os.path.exists(self.path_to_hdf5_file):
                 logging.warning("Create HDF5 File")
                 self.connection = HDFStore(self.path_to_hdf5_file, mode="w")
@@ -60,9 +150,296 @@ class HDF5Daemon(AbstractDataManager):
             )
             raise ConnectionError("Cannot connect to HDF5 database")
 
+    def _open_hdf5_table(self):
+        """
+        Open (or create) HDF5 file and table node of subscription. Both stay open until shutdown.
+        :return:
+        """
+        if not os.path.exists(self.path_to_hdf5_file):
+            logging.warning("Create HDF5 File")
+        self.hdf5_file = tables.open_file(self.path_to_hdf5_file, mode="a")
+
+        _node_path = f"/{self.subscription_type.tables_names[0]}"
+        _table_dtype = hdf5_table_dtype(self.subscription_type.create_record_dtype())
+        if _node_path in self.hdf5_file:
+            self.hdf5_table = self.hdf5_file.get_node(_node_path)
+            if not isinstance(self.hdf5_table, tables.Table):
+                raise ConnectionError(
+                    f"Node {_node_path} is written by pandas writer. Use hdf5.writer: pandas or another file"
+                )
+            if self.hdf5_table.dtype != _table_dtype:
+                raise ConnectionError(
+                    f"Node {_node_path} has other columns than {self.subscription_type.__class__.__name__}"
+                )
+            return
+
+        self.hdf5_table = self.hdf5_file.create_table(
+            where="/",
+            name=_node_path[1:],
+            description=_table_dtype,
+            expectedrows=self.cfg["hdf5"].get("expectedrows", 1_000_000),
+            chunkshape=self.cfg["hdf5"].get("chunkshape", None),
+            filters=self._create_hdf5_filters(),
+        )
+
+    def _create_hdf5_filters(self) -> Optional[tables.Filters]:
+        """
+        Compression of new table from hdf5.complib / complevel / shuffle. Existing tables keep own filters.
+        :return:
+        """
+        _complib = self.cfg["hdf5"].get("complib", None)
+        if _complib is None:
+            return None
+        if _complib.startswith("blosc2") and self.cfg["hdf5"].get("chunkshape") is None:
+            logging.warning(
+                "blosc2 with automatic chunkshape recompresses very big chunk at every flush. Set hdf5.chunkshape"
+            )
+        return tables.Filters(
+            complib=_complib,
+            complevel=self.cfg["hdf5"].get("complevel", 5),
+            shuffle=self.cfg["hdf5"].get("shuffle", True),
+        )
+
+    def _close_hdf5_table(self):
+        """
+        Build deferred column indexes, flush and close HDF5 file.
+        :return:
+        """
+        if self.hdf5_file is None or not self.hdf5_file.isopen:
+            return
+        with HDF5_LOCK:
+            index_hdf5_table(self.hdf5_table, self.index_columns)
+            self.hdf5_table.flush()
+            self.hdf5_file.close()
+        logging.info("HDF5 file closed")
+
+    async def _index_timer(self):
+        """
+        Every hdf5.index_interval sec build missing indexes of open file (in executor, event loop is not blocked),
+        so file is queryable without clean shutdown. With rollover closed partitions are indexed by indexer thread,
+        timer saves manifest of open partition.
+        :return:
+        """
+        while True:
+            await asyncio.sleep(self.index_interval)
+            try:
+                await self.async_loop.run_in_executor(None, self._refresh_indexes)
+            except Exception as e:
+                logging.exception(f"Refresh of HDF5 indexes raise error: {e}")
+
+    def _refresh_indexes(self):
+        if self.rollover_enabled:
+            self.manifest.save()
+            return
+        with HDF5_LOCK:
+            if self.hdf5_file is None or not self.hdf5_file.isopen:
+                return
+            if self.hdf5_table.nrows == 0:
+                return
+            index_hdf5_table(self.hdf5_table, self.index_columns)
+            self.hdf5_file.flush()
+
+    @property
+    def rollover_enabled(self) -> bool:
+        return self.rollover_period is not None or self.rollover_max_bytes is not None
+
+    @property
+    def partition_file_prefix(self) -> str:
+        return f"{self.subscription_type.__class__.__name__}_{self.subscription_type.tables_names[0]}"
+
+    def _open_partition_manifest(self):
+        """
+        Load manifest of partitions and start indexer thread.
+        Partitions left open by previous run are recovered (see _recover_partition) and indexed.
+        :return:
+        """
+        self.manifest = HDF5PartitionManifest(
+            path=f"{self.cfg['hdf5']['hdf5_database_directory']}/{self.partition_file_prefix}_manifest.json"
+        )
+        self._index_queue = Queue()
+        self._index_thread = threading.Thread(
+            target=self._index_worker,
+            name=f"{self.subscription_type.__class__.__name__}Indexer",
+            daemon=True,
+        )
+        self._index_thread.start()
+        for file_name, _partition in list(self.manifest.partitions.items()):
+            if not _partition["closed"]:
+                if not self._recover_partition(file_name):
+                    continue
+            if not self.manifest.partitions[file_name]["indexed"]:
+                self._index_queue.put_nowait(file_name)
+
+    def _recover_partition(self, file_name: str) -> bool:
+        """
+        Partition left open by previous run (stopped without shutdown) has rows, time range and instruments
+        of manifest only from last save. They are rebuilt from file, then partition is closed.
+        :param file_name:
+        :return: False if file does not exist (partition is removed from manifest)
+        """
+        _path = f"{self.cfg['hdf5']['hdf5_database_directory']}/{file_name}"
+        if not os.path.exists(_path):
+            logging.warning(f"HDF5 partition ({file_name}) does not exist. Removed from manifest")
+            self.manifest.remove_partition(file_name)
+            return False
+        logging.warning(f"Recover HDF5 partition ({file_name}) left open by previous run")
+        # open_partition resets rows, time range and instruments
+        self.manifest.open_partition(file_name)
+        try:
+            with HDF5_LOCK:
+                _hdf5_file = tables.open_file(_path, mode="r")
+            try:
+                _hdf5_table = _hdf5_file.get_node(
+                    f"/{self.subscription_type.tables_names[0]}"
+                )
+                for _start in range(0, _hdf5_table.nrows, RECOVERY_CHUNK_ROWS):
+                    with HDF5_LOCK:
+                        _records = _hdf5_table.read(
+                            start=_start, stop=_start + RECOVERY_CHUNK_ROWS
+                        )
+                    self.manifest.update(
+                        file_name,
+                        records=_records,
+                        timestamps=self._partition_timestamps(_records),
+                    )
+            finally:
+                with HDF5_LOCK:
+                    _hdf5_file.close()
+        except Exception as e:
+            logging.error(f"Cannot recover HDF5 partition ({file_name}): {e}")
+        self.manifest.close_partition(file_name)
+        return True
+
+    def _partition_key(self, timestamps: ndarray) -> ndarray:
+        if self.rollover_period is None:
+            return np.zeros(timestamps.shape[0], dtype=np.int64)
+        return timestamps // ROLLOVER_PERIODS_MS[self.rollover_period]
+
+    def _partition_timestamps(self, records: ndarray) -> ndarray:
+        """
+        Timestamps (ms) used for partitioning. Records without TIMESTAMP_VALUE use time of write.
+        :param records:
+        :return:
+        """
+        if "TIMESTAMP_VALUE" in records.dtype.names:
+            return records["TIMESTAMP_VALUE"].astype(np.int64)
+        return np.full(records.shape[0], int(time.time() * 1_000), dtype=np.int64)
+
+    def _new_partition_file_name(self, partition_key: int) -> str:
+        if self.rollover_period is None:
+            _label = "part"
+        else:
+            _label = datetime.fromtimestamp(
+                partition_key * ROLLOVER_PERIODS_MS[self.rollover_period] / 1_000,
+                tz=timezone.utc,
+            ).strftime(ROLLOVER_LABEL_FORMAT[self.rollover_period])
+        _sequence = 0
+        while True:
+            _file_name = f"{self.partition_file_prefix}_{_label}_{_sequence:03d}.h5"
+            if not os.path.exists(
+                f"{self.cfg['hdf5']['hdf5_database_directory']}/{_file_name}"
+            ) and (_file_name not in self.manifest.partitions):
+                return _file_name
+            _sequence += 1
+
+    def _roll_over_if_needed(self, partition_key: int):
+        """
+        Open partition file for rows of partition_key. Current file is closed when period changes
+        or file is bigger than rollover_max_bytes.
+        :param partition_key:
+        :return:
+        """
+        if self.hdf5_file is not None and self.hdf5_file.isopen:
+            _period_changed = partition_key > self.current_partition_key
+            _size_exceeded = (
+                self.rollover_max_bytes is not None
+                and self.hdf5_file.get_filesize() >= self.rollover_max_bytes
+            )
+            if not _period_changed and not _size_exceeded:
+                return
+            self._close_partition()
+
+        _file_name = self._new_partition_file_name(partition_key)
+        self.path_to_hdf5_file = (
+            f"{self.cfg['hdf5']['hdf5_database_directory']}/{_file_name}"
+        )
+        with HDF5_LOCK:
+            self._open_hdf5_table()
+        self.current_partition_key = partition_key
+        self.manifest.open_partition(_file_name)
+        logging.info(f"Roll over to HDF5 partition ({_file_name})")
+
+    def _close_partition(self):
+        """
+        Close current partition file and send it to indexer thread.
+        :return:
+        """
+        if self.hdf5_file is None or not self.hdf5_file.isopen:
+            return
+        _file_name = os.path.basename(self.path_to_hdf5_file)
+        with HDF5_LOCK:
+            self.hdf5_table.flush()
+            self.hdf5_file.close()
+        self.manifest.close_partition(_file_name)
+        self._index_queue.put_nowait(_file_name)
+
+    def _index_worker(self):
+        """
+        Build column indexes on closed partition files. One column under HDF5_LOCK at a time,
+        so writer waits no longer than index of one column.
+        :return:
+        """
+        while True:
+            _file_name = self._index_queue.get()
+            if _file_name is None:
+                return
+            _path = f"{self.cfg['hdf5']['hdf5_database_directory']}/{_file_name}"
+            try:
+                if not os.path.exists(_path):
+                    continue
+                with HDF5_LOCK:
+                    _hdf5_file = tables.open_file(_path, mode="a")
+                try:
+                    _hdf5_table = _hdf5_file.get_node(
+                        f"/{self.subscription_type.tables_names[0]}"
+                    )
+                    for column in self.index_columns:
+                        with HDF5_LOCK:
+                            index_hdf5_table(_hdf5_table, [column])
+                finally:
+                    with HDF5_LOCK:
+                        _hdf5_file.close()
+                self.manifest.mark_indexed(_file_name)
+                logging.info(f"HDF5 partition ({_file_name}) is indexed")
+            except Exception as e:
+                logging.error(f"Cannot index HDF5 partition ({_file_name}): {e}")
+
+    def _stop_index_worker(self):
+        if self._index_thread is None:
+            return
+        self._index_queue.put_nowait(None)
+        self._index_thread.join()
+        self._index_thread = None
+
     async def _clean_exist_database(self):
+        if self.writer == "pytables" and self.rollover_enabled:
+            logging.warning("CleanUP HDF5 partitions")
+            self._close_partition()
+            for file_name in list(self.manifest.partitions):
+                _path = f"{self.cfg['hdf5']['hdf5_database_directory']}/{file_name}"
+                if os.path.exists(_path):
+                    os.remove(_path)
+                self.manifest.remove_partition(file_name)
+            return
+
         if os.path.exists(self.path_to_hdf5_file):
             logging.warning("CleanUP HDF5 file")
+            if self.writer == "pytables":
+                self.hdf5_file.close()
+                os.remove(self.path_to_hdf5_file)
+                self._open_hdf5_table()
+                return
+
             os.remove(self.path_to_hdf5_file)
 
             self.connection = HDFStore(self.path_to_hdf5_file, mode="w")
@@ -76,8 +453,14 @@ class HDF5Daemon(AbstractDataManager):
         pass
 
     async def __hdf5_appending_one_table(self, record_dataframe: DataFrame):
-            # record_dataframe['CHANGE_ID'] = np.float64(0.0)
-        record_dataframe = record_dataframe.astype(np.float64)
+        # Columns keep types of subscription record dtype. String columns need fixed width in table
+        _record_dtype = self.circular_batch_tables.record_dtype
+        _min_itemsize = {
+            name: _record_dtype[name].itemsize // _record_dtype[name].alignment
+            for name in _record_dtype.names
+            if _record_dtype[name].kind == "U"
+        }
+        _complib = self.cfg["hdf5"].get("complib", None)
         record_dataframe.to_hdf(
             self.connection,
             key=self.subscription_type.tables_names[0],
@@ -85,11 +468,63 @@ class HDF5Daemon(AbstractDataManager):
             append=True,
             index=False,
             data_columns=True,
+            min_itemsize=_min_itemsize or None,
+            complib=_complib,
+            complevel=self.cfg["hdf5"].get("complevel", 5) if _complib else None,
         )
         # self.connection.append(self.subscription_type.tables_names[0], record_dataframe,
         #                        data_columns=self.subscription_type.create_columns_list(), format='t')
         return 1
 
+    async def _place_records_to_database(self, records: ndarray) -> int:
+        if self.writer != "pytables":
+            return await super()._place_records_to_database(records=records)
+
+        if not self.rollover_enabled:
+            if records.dtype != self.hdf5_table.dtype:
+                records = records.astype(self.hdf5_table.dtype)
+            with HDF5_LOCK:
+                self.hdf5_table.append(records)
+                self.hdf5_table.flush()
+            return 1
+
+        _timestamps = self._partition_timestamps(records)
+        _keys = self._partition_key(_timestamps)
+        for partition_key in np.unique(_keys):
+            _mask = _keys == partition_key
+            # Late rows of already closed period are appended to current partition
+            if self.current_partition_key is not None:
+                partition_key = max(int(partition_key), self.current_partition_key)
+            self._roll_over_if_needed(int(partition_key))
+
+            _records = records[_mask]
+            if _records.dtype != self.hdf5_table.dtype:
+                _records = _records.astype(self.hdf5_table.dtype)
+            with HDF5_LOCK:
+                self.hdf5_table.append(_records)
+                self.hdf5_table.flush()
+            self.manifest.update(
+                os.path.basename(self.path_to_hdf5_file),
+                records=records[_mask],
+                timestamps=_timestamps[_mask],
+            )
+        return 1
+
     async def _place_data_to_database(self, record_dataframe: DataFrame) -> int:
         await self.__hdf5_appending_one_table(record_dataframe=record_dataframe)
         return 1
+
+    async def shutdown(self):
+        """
+        Flush record system, then build indexes and close HDF5 file.
+        With rollover last partition is closed and indexer thread finishes its queue.
+        :return:
+        """
+        await super().shutdown()
+        if self._index_timer_future is not None:
+            self._index_timer_future.cancel()
+        if self.writer == "pytables" and self.rollover_enabled:
+            self._close_partition()
+            self._stop_index_worker()
+        elif self.writer == "pytables":
+            self._close_hdf5_table()
@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+from numpy import ndarray
+from numpy.lib import recfunctions
+
+INSTRUMENT_COLUMNS = (
+    "INSTRUMENT_INDEX",
+    "INSTRUMENT_STRIKE",
+    "INSTRUMENT_MATURITY",
+    "INSTRUMENT_TYPE",
+)
+
+
+class HDF5PartitionManifest:
+    """
+    Манифест файлов-партиций HDF5Daemon: file name -> min_ts, max_ts, rows, instruments.
+    Хранится JSON файлом рядом с партициями и перезаписывается атомарно (tmp + os.replace).
+    Читатели выбирают только файлы, покрывающие нужный интервал времени (files_between).
+    """
+
+    path: str
+    partitions: Dict[str, dict]
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path, "r") as _file:
+                self.partitions = json.load(_file)
+        else:
+            self.partitions = dict()
+
+    def open_partition(self, file_name: str):
+        with self._lock:
+            self.partitions[file_name] = {
+                "min_ts": None,
+                "max_ts": None,
+                "rows": 0,
+                "instruments": [],
+                "closed": False,
+                "indexed": False,
+            }
+            self._save()
+
+    def update(self, file_name: str, records: ndarray, timestamps: ndarray):
+        """
+        Учет строк, записанных в партицию. Манифест на диск не пишется (только при close).
+        :param file_name:
+        :param records: записи record dtype
+        :param timestamps: timestamp строк в ms
+        :return:
+        """
+        _columns = [name for name in INSTRUMENT_COLUMNS if name in records.dtype.names]
+        _new_instruments = (
+            np.unique(recfunctions.repack_fields(records[_columns])).tolist()
+            if _columns
+            else []
+        )
+        _min_ts, _max_ts = int(timestamps.min()), int(timestamps.max())
+        with self._lock:
+            _partition = self.partitions[file_name]
+            _partition["min_ts"] = (
+                _min_ts
+                if _partition["min_ts"] is None
+                else min(_partition["min_ts"], _min_ts)
+            )
+            _partition["max_ts"] = (
+                _max_ts
+                if _partition["max_ts"] is None
+                else max(_partition["max_ts"], _max_ts)
+            )
+            _partition["rows"] += records.shape[0]
+            if _new_instruments:
+                _instruments = set(map(tuple, _partition["instruments"]))
+                _instruments.update(_new_instruments)
+                _partition["instruments"] = sorted(map(list, _instruments))
+
+    def close_partition(self, file_name: str):
+        with self._lock:
+            self.partitions[file_name]["closed"] = True
+            self._save()
+
+    def mark_indexed(self, file_name: str):
+        with self._lock:
+            if file_name not in self.partitions:
+                return
+            self.partitions[file_name]["indexed"] = True
+            self._save()
+
+    def remove_partition(self, file_name: str):
+        with self._lock:
+            self.partitions.pop(file_name, None)
+            self._save()
+
+    def save(self):
+        """
+        Записать текущий учет строк (update) на диск без закрытия партиции.
+        :return:
+        """
+        with self._lock:
+            self._save()
+
+    def files_between(self, start_ts: Optional[int], end_ts: Optional[int]) -> List[str]:
+        """
+        Файлы партиций, в которых могут быть строки с timestamp из [start_ts, end_ts].
+        :param start_ts: ms, None - без ограничения
+        :param end_ts: ms, None - без ограничения
+        :return:
+        """
+        _files = []
+        for file_name, _partition in self.partitions.items():
+            if _partition["rows"] == 0:
+                continue
+            if start_ts is not None and _partition["max_ts"] < start_ts:
+                continue
+            if end_ts is not None and _partition["min_ts"] > end_ts:
+                continue
+            _files.append(file_name)
+        return sorted(_files, key=lambda x: self.partitions[x]["min_ts"])
+
+    def _save(self):
+        _tmp_path = f"{self.path}.tmp"
+        with open(_tmp_path, "w") as _file:
+            json.dump(self.partitions, _file, indent=1)
+        os.replace(_tmp_path, self.path)
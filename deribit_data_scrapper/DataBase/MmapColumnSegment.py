@@ -0,0 +1,169 @@
+import json
+import os
+import re
+from typing import Dict
+from typing import List
+
+import numpy as np
+from numpy import ndarray
+
+SEGMENT_DIRECTORY_TEMPLATE = "segment_{:06d}"
+HEADER_FILE = "HEADER"
+SCHEMA_FILE = "schema.json"
+COLUMN_FILE_SUFFIX = ".col"
+
+# Header of segment: int64 [number of rows, capacity in rows, sealed flag]
+HEADER_ROWS = 0
+HEADER_CAPACITY = 1
+HEADER_SEALED = 2
+HEADER_LENGTH = 3
+
+
+class MmapColumnSegment:
+    """
+    Сегмент колоночного хранилища MmapDaemon: папка с одним np.memmap файлом на колонку и HEADER.
+    Файлы колонок растут кусками по chunk_rows строк, HEADER (int64 rows, capacity, sealed) обновляется
+    после копирования строк, поэтому читатель в другом процессе видит только полностью записанные строки.
+    Закрытый (sealed) сегмент обрезается до числа строк и больше не меняется.
+    """
+
+    path: str
+    record_dtype: np.dtype
+    chunk_rows: int
+    columns: Dict[str, np.memmap]
+    header: np.memmap
+
+    def __init__(self, path: str, record_dtype: np.dtype, chunk_rows: int):
+        """
+        Create new segment.
+        :param path: папка сегмента
+        :param record_dtype: dtype записи подписки, колонки - поля dtype
+        :param chunk_rows: шаг роста файлов колонок в строках
+        """
+        self.path = path
+        self.record_dtype = record_dtype
+        self.chunk_rows = chunk_rows
+        os.makedirs(self.path)
+
+        with open(os.path.join(self.path, SCHEMA_FILE), "w") as _file:
+            json.dump(
+                [[name, record_dtype[name].str] for name in record_dtype.names], _file
+            )
+        self.header = np.memmap(
+            os.path.join(self.path, HEADER_FILE),
+            dtype=np.int64,
+            mode="w+",
+            shape=(HEADER_LENGTH,),
+        )
+        self.columns = dict()
+        for name in record_dtype.names:
+            self.columns[name] = np.memmap(
+                self.column_path(name),
+                dtype=record_dtype[name],
+                mode="w+",
+                shape=(chunk_rows,),
+            )
+        self.header[HEADER_CAPACITY] = chunk_rows
+
+    def column_path(self, name: str) -> str:
+        return os.path.join(self.path, name + COLUMN_FILE_SUFFIX)
+
+    @property
+    def number_of_rows(self) -> int:
+        return int(self.header[HEADER_ROWS])
+
+    @property
+    def number_of_bytes(self) -> int:
+        return self.number_of_rows * self.record_dtype.itemsize
+
+    def _resize_columns(self, capacity: int):
+        """
+        Grow (or trim at seal) column files to capacity rows and map them again.
+        :param capacity:
+        :return:
+        """
+        for name in self.record_dtype.names:
+            self.columns[name].flush()
+            del self.columns[name]
+            os.truncate(self.column_path(name), capacity * self.record_dtype[name].itemsize)
+            if capacity != 0:
+                self.columns[name] = np.memmap(
+                    self.column_path(name),
+                    dtype=self.record_dtype[name],
+                    mode="r+",
+                    shape=(capacity,),
+                )
+        self.header[HEADER_CAPACITY] = capacity
+
+    def append(self, records: ndarray):
+        """
+        Copy records to column files. Row count in header is moved after copy.
+        :param records: rows of record dtype
+        :return:
+        """
+        _start = self.number_of_rows
+        _end = _start + records.shape[0]
+        if _end > self.header[HEADER_CAPACITY]:
+            # Grow by whole chunks
+            self._resize_columns(-(-_end // self.chunk_rows) * self.chunk_rows)
+        for name in self.record_dtype.names:
+            self.columns[name][_start:_end] = records[name]
+        self.header[HEADER_ROWS] = _end
+
+    def flush(self):
+        for _column in self.columns.values():
+            _column.flush()
+        self.header.flush()
+
+    def seal(self):
+        """
+        Trim column files to number of rows and mark segment as sealed.
+        :return:
+        """
+        self._resize_columns(self.number_of_rows)
+        self.header[HEADER_SEALED] = 1
+        self.flush()
+        del self.header
+
+
+def list_mmap_segments(dataset_directory: str) -> List[str]:
+    """
+    Paths of segments of dataset in order of writing.
+    :param dataset_directory:
+    :return:
+    """
+    _pattern = re.compile(r"^segment_(\d+)$")
+    if not os.path.exists(dataset_directory):
+        return []
+    return [
+        os.path.join(dataset_directory, name)
+        for name in sorted(os.listdir(dataset_directory))
+        if _pattern.match(name)
+    ]
+
+
+def read_mmap_segment(path: str) -> Dict[str, ndarray]:
+    """
+    Zero-copy read-only view of segment for other processes (research notebooks).
+    Only rows counted in header are returned; call again to see rows appended later.
+    :param path: папка сегмента
+    :return: column name -> array of rows
+    """
+    with open(os.path.join(path, SCHEMA_FILE), "r") as _file:
+        _schema = json.load(_file)
+    _header = np.memmap(
+        os.path.join(path, HEADER_FILE), dtype=np.int64, mode="r", shape=(HEADER_LENGTH,)
+    )
+    _rows = int(_header[HEADER_ROWS])
+    _columns = dict()
+    for name, _dtype in _schema:
+        if _rows == 0:
+            _columns[name] = np.zeros(0, dtype=_dtype)
+            continue
+        _columns[name] = np.memmap(
+            os.path.join(path, name + COLUMN_FILE_SUFFIX),
+            dtype=_dtype,
+            mode="r",
+            shape=(_rows,),
+        )
+    return _columns
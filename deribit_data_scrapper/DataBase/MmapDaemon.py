@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import os
+import shutil
+from typing import Optional
+
+from numpy import ndarray
+from pandas import DataFrame
+
+from deribit_data_scrapper.DataBase.AbstractDataSaverManager import AbstractDataManager
+from deribit_data_scrapper.DataBase.MmapColumnSegment import list_mmap_segments
+from deribit_data_scrapper.DataBase.MmapColumnSegment import MmapColumnSegment
+from deribit_data_scrapper.DataBase.MmapColumnSegment import SEGMENT_DIRECTORY_TEMPLATE
+from deribit_data_scrapper.Subsciption.AbstractSubscription import AbstractSubscription
+
+
+class MmapDaemon(AbstractDataManager):
+    """
+    Daemon for memory mapped columnar record type (database_daemon: mmap).
+    Dataset of subscription is {mmap_database_directory}/{Subscription}_{table}/segment_n/ with one
+    np.memmap file per column of record dtype. Flushed batch is copied column by column to page cache,
+    no serialization and no syscalls except growth of files by mmap.chunk_rows rows.
+    Segment is sealed and next one is opened when it is bigger than mmap.segment_max_bytes and at shutdown.
+    Other processes read live stream with MmapColumnSegment.read_mmap_segment (zero-copy).
+    Full book subscription (UNLIMITED) is stored as one dataset of level rows, without split to tables.
+    """
+
+    dataset_directory: str
+    segment: Optional[MmapColumnSegment] = None
+    _next_segment_number: int = 0
+
+    def __init__(
+        self,
+        configuration_path,
+        subscription_type: Optional[AbstractSubscription],
+        loop: asyncio.SelectorEventLoop,
+    ):
+        logging.basicConfig(
+            level="INFO",
+            format="%(asctime)s | %(levelname)s %(module)s | %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        super().__init__(
+            config_path=configuration_path,
+            subscription_type=subscription_type,
+            loop=loop,
+        )
+
+    async def _connect_to_database(self):
+        print("Connect mmap")
+        try:
+            self.dataset_directory = f"{self.cfg['mmap']['mmap_database_directory']}/{self.subscription_type.__class__.__name__}_{self.subscription_type.tables_names[0]}"
+            if not os.path.exists(self.dataset_directory):
+                os.makedirs(self.dataset_directory)
+                logging.warning("Create folder for mmap dataset")
+            # Segments of previous runs are kept, new run starts from next segment
+            self._next_segment_number = len(list_mmap_segments(self.dataset_directory))
+            logging.info("Success connection to mmap database")
+        except Exception as e:
+            logging.error(
+                "Connection to database raise error: \n {error}".format(error=e)
+            )
+            raise ConnectionError("Cannot connect to mmap database")
+
+    async def _clean_exist_database(self):
+        if os.path.exists(self.dataset_directory):
+            logging.warning("CleanUP mmap dataset")
+            self._seal_segment()
+            shutil.rmtree(self.dataset_directory)
+            os.makedirs(self.dataset_directory)
+            self._next_segment_number = 0
+
+    async def _create_not_exist_database(self):
+        pass
+
+    def _open_segment(self) -> MmapColumnSegment:
+        _path = os.path.join(
+            self.dataset_directory,
+            SEGMENT_DIRECTORY_TEMPLATE.format(self._next_segment_number),
+        )
+        self._next_segment_number += 1
+        self.segment = MmapColumnSegment(
+            path=_path,
+            record_dtype=self.circular_batch_tables.record_dtype,
+            chunk_rows=self.cfg["mmap"].get("chunk_rows", 65_536),
+        )
+        logging.info(f"Open mmap segment ({_path})")
+        return self.segment
+
+    def _seal_segment(self):
+        if self.segment is None:
+            return
+        self.segment.seal()
+        logging.info(f"Seal mmap segment ({self.segment.path})")
+        self.segment = None
+
+    async def _place_records_to_database(self, records: ndarray) -> int:
+        _segment = self.segment if self.segment is not None else self._open_segment()
+        _segment.append(records)
+        if _segment.number_of_bytes >= self.cfg["mmap"].get(
+            "segment_max_bytes", 256 * 1024 * 1024
+        ):
+            self._seal_segment()
+        return 1
+
+    async def _place_data_to_database(self, record_dataframe: DataFrame) -> int:
+        return await self._place_records_to_database(
+            records=record_dataframe.to_records(index=False).astype(
+                self.circular_batch_tables.record_dtype
+            )
+        )
+
+    async def shutdown(self):
+        """
+        Flush record system and seal current segment.
+        :return:
+        """
+        await super().shutdown()
+        self._seal_segment()
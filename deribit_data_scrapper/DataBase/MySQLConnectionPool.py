@@ -0,0 +1,283 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from queue import Empty
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+import mysql.connector as connector
+from mysql.connector import errorcode
+
+T = TypeVar("T")
+
+# Period of capacity check of execute (event loop is not blocked while pool is full), in sec
+ACQUIRE_POLL_INTERVAL = 0.01
+
+# Refused or lost connection (CR_CONN_HOST_ERROR, CR_SERVER_GONE_ERROR, CR_SERVER_LOST)
+CONNECTION_ERRNOS = frozenset(
+    (
+        errorcode.CR_CONN_HOST_ERROR,
+        errorcode.CR_SERVER_GONE_ERROR,
+        errorcode.CR_SERVER_LOST,
+    )
+)
+
+
+def is_connection_error(error: connector.Error) -> bool:
+    """
+    Failure of connection (retry, reconnect, spill) or of statement itself (data, syntax, constraint).
+    :param error:
+    :return: True for InterfaceError and errors with errno of CONNECTION_ERRNOS
+    """
+    return (
+        isinstance(error, connector.InterfaceError)
+        or error.errno in CONNECTION_ERRNOS
+    )
+
+
+class MySQLConnectionPool:
+    """
+    Process-wide pool of MySQL connections shared by all MySqlDaemon instances.
+    One pool per (host, user, database) - get_pool. Connections are created lazily up to mysql.pool_size,
+    every daemon borrows connection only for one operation, so flushes of different tables (writer threads)
+    go through different connections.
+    Health check: connection idle longer than mysql.health_check_interval is pinged before use, broken
+    connection is replaced. Reconnect with exponential backoff lives here (execute).
+    Only connection failures (is_connection_error) are retried and raised as ConnectionError. Errors of
+    statement (ProgrammingError, DataError, IntegrityError, ...) are raised to caller as is at first attempt:
+    repeating them can not succeed, so they must never reach spill buffer.
+    """
+
+    _pools: Dict[Tuple[str, str, str], "MySQLConnectionPool"] = dict()
+    _pools_lock = threading.Lock()
+
+    pool_size: int
+    health_check_interval: float
+    reconnect_max_attempts: int
+    reconnect_wait_time: float
+    reconnect_max_wait_time: float
+
+    # (connection, time.monotonic() of last use). Lifo - most recently used (alive) connection first
+    _idle: List[tuple]
+    _number_of_connections: int = 0
+    # Guards _idle and _number_of_connections. release and _discard notify waiters of acquire
+    _capacity: threading.Condition
+
+    def __init__(self, configuration: dict):
+        """
+        :param configuration: mysql section of configuration file
+        """
+        self.configuration = configuration
+        self.pool_size = configuration.get("pool_size", 4)
+        self.health_check_interval = configuration.get("health_check_interval", 30)
+        self.reconnect_max_attempts = configuration["reconnect_max_attempts"]
+        self.reconnect_wait_time = configuration["reconnect_wait_time"]
+        self.reconnect_max_wait_time = configuration.get("reconnect_max_wait_time", 30)
+
+        self._idle = []
+        self._number_of_connections = 0
+        self._capacity = threading.Condition()
+
+    @classmethod
+    def get_pool(cls, configuration: dict) -> "MySQLConnectionPool":
+        _key = (configuration["host"], configuration["user"], configuration["database"])
+        with cls._pools_lock:
+            if _key not in cls._pools:
+                cls._pools[_key] = cls(configuration=configuration)
+            return cls._pools[_key]
+
+    @classmethod
+    def close_all_pools(cls):
+        with cls._pools_lock:
+            for _pool in cls._pools.values():
+                _pool.close()
+            cls._pools.clear()
+
+    def backoff_time(self, attempt: int) -> float:
+        return min(
+            self.reconnect_wait_time * 2**attempt, self.reconnect_max_wait_time
+        )
+
+    def _create_connection(self) -> connector.connection.MySQLConnection:
+        return connector.connect(
+            host=self.configuration["host"],
+            user=self.configuration["user"],
+            password=self.configuration["password"],
+            database=self.configuration["database"],
+            allow_local_infile=self.configuration.get("insert_mode") == "load_data",
+        )
+
+    def _discard(self, connection: connector.connection.MySQLConnection):
+        try:
+            connection.close()
+        except connector.Error:
+            pass
+        with self._capacity:
+            self._number_of_connections -= 1
+            # Waiter can open new connection instead of discarded one
+            self._capacity.notify()
+
+    def acquire(
+        self, timeout: Optional[float] = None
+    ) -> connector.connection.MySQLConnection:
+        """
+        Borrow connection. New connection is opened if pool is not full, otherwise waits until other
+        caller releases or discards connection.
+        :param timeout: max wait time for free connection in sec (None - wait forever, 0 - do not wait)
+        :return:
+        :raise Empty: no free connection during timeout
+        """
+        _deadline = None if timeout is None else time.monotonic() + timeout
+        with self._capacity:
+            while not self._idle and self._number_of_connections >= self.pool_size:
+                _remaining = None if _deadline is None else _deadline - time.monotonic()
+                if _remaining is not None and _remaining <= 0:
+                    raise Empty
+                self._capacity.wait(timeout=_remaining)
+            if self._idle:
+                connection, last_used = self._idle.pop()
+            else:
+                self._number_of_connections += 1
+                connection = None
+
+        if connection is None:
+            try:
+                return self._create_connection()
+            except connector.Error:
+                with self._capacity:
+                    self._number_of_connections -= 1
+                    self._capacity.notify()
+                raise
+
+        if time.monotonic() - last_used >= self.health_check_interval:
+            try:
+                connection.ping(reconnect=False)
+            except connector.Error:
+                logging.warning("Pooled MySQL connection is broken. Open new one")
+                self._discard(connection)
+                return self.acquire(timeout=timeout)
+        return connection
+
+    async def acquire_async(self) -> connector.connection.MySQLConnection:
+        """
+        acquire for event loop: while pool is full loop keeps working and capacity is checked
+        every ACQUIRE_POLL_INTERVAL sec.
+        :return:
+        """
+        while True:
+            try:
+                return self.acquire(timeout=0)
+            except Empty:
+                await asyncio.sleep(ACQUIRE_POLL_INTERVAL)
+
+    def release(self, connection: connector.connection.MySQLConnection):
+        with self._capacity:
+            self._idle.append((connection, time.monotonic()))
+            self._capacity.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """
+        Borrowed connection. Connection that raised connection error is closed instead of returning to pool.
+        :param timeout:
+        :return:
+        """
+        with self._borrowed(self.acquire(timeout=timeout)) as _connection:
+            yield _connection
+
+    @contextmanager
+    def _borrowed(self, connection: connector.connection.MySQLConnection):
+        try:
+            yield connection
+        except connector.Error as e:
+            if is_connection_error(e):
+                self._discard(connection)
+            else:
+                self.release(connection)
+            raise
+        except BaseException:
+            self.release(connection)
+            raise
+        self.release(connection)
+
+    def _execute_once(
+        self,
+        operation: Callable[[connector.connection.MySQLConnection], T],
+        connection: connector.connection.MySQLConnection,
+    ) -> T:
+        with self._borrowed(connection) as _connection:
+            try:
+                return operation(_connection)
+            except connector.Error:
+                try:
+                    _connection.rollback()
+                except connector.Error:
+                    pass
+                raise
+
+    def _log_failed_attempt(self, attempt: int, max_attempts: int, error: connector.Error):
+        logging.error(f"MySQL error (attempt {attempt + 1}/{max_attempts}): \n {error}")
+
+    async def execute(
+        self,
+        operation: Callable[[connector.connection.MySQLConnection], T],
+        max_attempts: Optional[int] = None,
+    ) -> T:
+        """
+        Run operation(connection) with reconnect and exponential backoff.
+        On error not committed changes are rolled back. On connection error connection is replaced and
+        operation is repeated, other connector.Error is raised at once.
+        Wait for free connection does not block event loop (acquire_async), operation itself runs
+        in calling thread (mysql.non_blocking: False), event loop is blocked until it is done.
+        :param operation:
+        :param max_attempts: default mysql.reconnect_max_attempts
+        :return: result of operation
+        """
+        _max_attempts = max_attempts or self.reconnect_max_attempts
+        for attempt in range(_max_attempts):
+            try:
+                return self._execute_once(operation, await self.acquire_async())
+            except connector.Error as e:
+                if not is_connection_error(e):
+                    raise
+                self._log_failed_attempt(attempt, _max_attempts, e)
+                if attempt + 1 < _max_attempts:
+                    await asyncio.sleep(self.backoff_time(attempt))
+        raise ConnectionError("Cannot execute MySQL operation. Reached maximum attempts")
+
+    def execute_blocking(
+        self,
+        operation: Callable[[connector.connection.MySQLConnection], T],
+        max_attempts: Optional[int] = None,
+    ) -> T:
+        """
+        Same as execute for executor threads: backoff sleeps the thread, not event loop.
+        :param operation:
+        :param max_attempts: default mysql.reconnect_max_attempts
+        :return: result of operation
+        """
+        _max_attempts = max_attempts or self.reconnect_max_attempts
+        for attempt in range(_max_attempts):
+            try:
+                return self._execute_once(operation, self.acquire())
+            except connector.Error as e:
+                if not is_connection_error(e):
+                    raise
+                self._log_failed_attempt(attempt, _max_attempts, e)
+                if attempt + 1 < _max_attempts:
+                    time.sleep(self.backoff_time(attempt))
+        raise ConnectionError("Cannot execute MySQL operation. Reached maximum attempts")
+
+    def close(self):
+        while True:
+            with self._capacity:
+                if not self._idle:
+                    return
+                connection, _ = self._idle.pop()
+            self._discard(connection)
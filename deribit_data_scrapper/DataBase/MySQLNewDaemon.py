@@ -2,24 +2,42 @@ import asyncio
 import logging
 import os
 import signal
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
+from typing import Callable
+from typing import List
 from typing import Optional
-
-import mysql.connector as connector
+from typing import Tuple
 
 from deribit_data_scrapper.DataBase.AbstractDataSaverManager import AbstractDataManager
+from deribit_data_scrapper.DataBase.MySQLConnectionPool import MySQLConnectionPool
 from deribit_data_scrapper.Subsciption.AbstractSubscription import AbstractSubscription
 from deribit_data_scrapper.Utils import *
 
+# Period of daily partitions extension (in sec)
+PARTITION_MAINTENANCE_INTERVAL = 6 * 3600
+
 
 class MySqlDaemon(AbstractDataManager):
     """
     Daemon for MySQL record type.
-    TODO: insert docstring
+    mysql.insert_mode selects how batch is inserted:
+    executemany (default) - parameterized INSERT, rows are batched by connector in chunks of executemany_chunk_size;
+    load_data - LOAD DATA LOCAL INFILE of TSV built with NumPy (server needs local_infile=ON);
+    values - legacy INSERT built by string formatting of every value.
+    Subscriptions with tag_of_data UNLIMITED (full order book) are written to several tables in one transaction.
+    mysql.time_partitioned tables are RANGE partitioned by day of TIMESTAMP_VALUE, daemon keeps
+    partitions mysql.partition_days_ahead days ahead.
+    mysql.non_blocking moves batch preparation and every MySQL call to dedicated daemon thread,
+    event loop only awaits future of it, so callbacks are dispatched while large batch is committed.
+    Thread is single - batches of daemon are committed in flush order.
     """
 
-    connection: connector.connection.MySQLConnection
-    database_cursor: connector.connection.MySQLCursor
+    connection_pool: MySQLConnectionPool
+    _mysql_executor: Optional[ThreadPoolExecutor] = None
+    _partition_maintenance_future: Optional[asyncio.Future] = None
 
     def __init__(
         self,
@@ -32,70 +50,134 @@ class MySqlDaemon(AbstractDataManager):
             format="%(asctime)s | %(levelname)s %(module)s | %(message)s",
             datefmt="%Y-%m-%d %H:%M:%S",
         )
+        if configuration_path["mysql"].get("non_blocking", False):
+            self._mysql_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="MySqlDaemon"
+            )
         super().__init__(
             config_path=configuration_path,
             subscription_type=subscription_type,
             loop=loop,
         )
 
+    @property
+    def insert_mode(self) -> str:
+        return self.cfg["mysql"].get("insert_mode", "executemany")
+
     async def _connect_to_database(self):
         """
-        Connection to MySQL database
+        Connection to MySQL database. Daemons share process-wide connection pool.
         :return:
         """
-        flag = 0
-        while flag <= self.cfg["mysql"]["reconnect_max_attempts"]:
-            if flag >= self.cfg["mysql"]["reconnect_max_attempts"]:
-                logging.error("Cannot connect to MySQL. Reached maximum attempts")
-                os.kill(os.getpid(), signal.SIGUSR1)
-                raise ConnectionError(
-                    "Cannot connect to MySQL. Reached maximum attempts"
-                )
+        self.connection_pool = MySQLConnectionPool.get_pool(self.cfg["mysql"])
+        await self._mysql_execute(lambda connection: connection.is_connected())
+        logging.info("Success connection to MySQL database")
+        return 1
 
-            try:
-                self.connection = connector.connect(
-                    host=self.cfg["mysql"]["host"],
-                    user=self.cfg["mysql"]["user"],
-                    password=self.cfg["mysql"]["password"],
-                    database=self.cfg["mysql"]["database"],
+    @property
+    def non_blocking(self) -> bool:
+        return self._mysql_executor is not None
+
+    async def _run_in_mysql_thread(self, function: Callable, *args):
+        """
+        Run blocking function in daemon thread (non_blocking mode) or in place.
+        :param function:
+        :param args:
+        :return: result of function
+        """
+        if self._mysql_executor is None:
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._mysql_executor, partial(function, *args)
+        )
+
+    async def _mysql_execute(self, operation, spill_on_failure: bool = False):
+        """
+        Run operation(connection) on pooled connection. Reconnect and backoff are done by pool.
+        :param operation:
+        :param spill_on_failure: batch write. With spill buffer it is tried once, ConnectionError is handled
+        by record system (batch goes to spill buffer) instead of stopping scrapper
+        :return:
+        """
+        _spill = spill_on_failure and self.spill_buffer is not None
+        _max_attempts = 1 if _spill else None
+        try:
+            if self._mysql_executor is None:
+                return await self.connection_pool.execute(
+                    operation, max_attempts=_max_attempts
                 )
-                self.database_cursor = self.connection.cursor()
-                logging.info("Success connection to MySQL database")
-                return 1
-            except connector.Error as e:
-                flag += 1
-                logging.error(
-                    "Connection to database raise error: \n {error}".format(error=e)
+            return await self._run_in_mysql_thread(
+                partial(
+                    self.connection_pool.execute_blocking,
+                    operation,
+                    max_attempts=_max_attempts,
                 )
-                await asyncio.sleep(self.cfg["mysql"]["reconnect_wait_time"])
+            )
+        except ConnectionError:
+            if _spill:
+                raise
+            logging.error("Cannot connect to MySQL. Reached maximum attempts")
+            os.kill(os.getpid(), signal.SIGUSR1)
+            raise
 
     async def _mysql_post_execution_handler(
-        self, query, need_to_commit: bool = False
+        self,
+        query,
+        need_to_commit: bool = False,
+        parameters: list = None,
+        spill_on_failure: bool = False,
     ) -> int:
         """
         Interface to execute POST request to MySQL database
         :param query:
+        :param parameters: rows for executemany. Executed by chunks of mysql.executemany_chunk_size in one transaction
+        :param spill_on_failure: see _mysql_execute
+        :return:
+        """
+        return await self._mysql_post_transaction_handler(
+            queries=[(query, parameters)],
+            need_to_commit=need_to_commit,
+            spill_on_failure=spill_on_failure,
+        )
+
+    async def _mysql_post_transaction_handler(
+        self,
+        queries: List[Tuple[str, Optional[list]]],
+        need_to_commit: bool = True,
+        spill_on_failure: bool = False,
+    ) -> int:
+        """
+        Execute several POST requests on one connection in one transaction (commit after the last one).
+        On error whole transaction is rolled back and repeated by pool.
+        :param queries: (query, rows for executemany or None)
+        :param need_to_commit:
+        :param spill_on_failure: see _mysql_execute
         :return:
         """
         if self.developConfiguration["MY_SQL_DAEMON"]["SHOW_QUERY_FOR_POST"]:
-            print(f"POST MYSQL REQUEST: QUERY | {query} | TIME {datetime.now()}")
-        flag = 0
-        while flag <= self.cfg["mysql"]["reconnect_max_attempts"]:
-            if flag >= self.cfg["mysql"]["reconnect_max_attempts"]:
-                logging.error("Cannot connect to MySQL. Reached maximum attempts")
-                os.kill(os.getpid(), signal.SIGUSR1)
-                raise ConnectionError(
-                    "Cannot connect to MySQL. Reached maximum attempts"
-                )
+            for query, _ in queries:
+                print(f"POST MYSQL REQUEST: QUERY | {query} | TIME {datetime.now()}")
+
+        _chunk_size = self.cfg["mysql"].get("executemany_chunk_size", 5000)
+
+        def _post(connection) -> int:
+            _cursor = connection.cursor()
             try:
-                self.database_cursor.execute(query)
+                for query, parameters in queries:
+                    if parameters is None:
+                        _cursor.execute(query)
+                    else:
+                        for _start in range(0, len(parameters), _chunk_size):
+                            _cursor.executemany(
+                                query, parameters[_start : _start + _chunk_size]
+                            )
                 if need_to_commit:
-                    self.connection.commit()
+                    connection.commit()
                 return 1
-            except connector.Error as e:
-                flag += 1
-                logging.error("MySQL execution error: \n {error}".format(error=e))
-                await asyncio.sleep(self.cfg["mysql"]["reconnect_wait_time"])
+            finally:
+                _cursor.close()
+
+        return await self._mysql_execute(_post, spill_on_failure=spill_on_failure)
 
     # TODO: typing
     async def _mysql_get_execution_handler(self, query) -> object:
@@ -106,43 +188,24 @@ class MySqlDaemon(AbstractDataManager):
         """
         if self.developConfiguration["MY_SQL_DAEMON"]["SHOW_QUERY_FOR_GET"]:
             print(f"GET MYSQL REQUEST: QUERY | {query} | TIME {datetime.now()}")
-        flag = 0
-        while flag <= self.cfg["mysql"]["reconnect_max_attempts"]:
-            if flag >= self.cfg["mysql"]["reconnect_max_attempts"]:
-                logging.error("Cannot connect to MySQL. Reached maximum attempts")
-                os.kill(os.getpid(), signal.SIGUSR1)
-                raise ConnectionError(
-                    "Cannot connect to MySQL. Reached maximum attempts"
-                )
+
+        def _get(connection) -> object:
+            _cursor = connection.cursor()
             try:
-                self.database_cursor.execute(query)
-                return self.database_cursor.fetchone()
-            except connector.Error as e:
-                flag += 1
-                logging.error("MySQL execution error: \n {error}".format(error=e))
-                await asyncio.sleep(self.cfg["mysql"]["reconnect_wait_time"])
+                _cursor.execute(query)
+                return _cursor.fetchone()
+            finally:
+                _cursor.close()
+
+        return await self._mysql_execute(_get)
 
     async def _clean_exist_database(self):
         """
         Clean MySQL database body method
         :return:
         """
-        flag = 0
-        while flag <= self.cfg["mysql"]["reconnect_max_attempts"]:
-            if flag >= self.cfg["mysql"]["reconnect_max_attempts"]:
-                logging.error("Cannot connect to MySQL. Reached maximum attempts")
-                os.kill(os.getpid(), signal.SIGUSR1)
-                raise ConnectionError(
-                    "Cannot connect to MySQL. Reached maximum attempts"
-                )
-            try:
-                await self.__clean_up_pipeline()
-                return 0
-
-            except connector.Error as error:
-                flag += 1
-                logging.warning("Database clean up error! :{}".format(error))
-                await asyncio.sleep(self.cfg["mysql"]["reconnect_wait_time"])
+        await self.__clean_up_pipeline()
+        return 0
 
     async def __clean_up_pipeline(self):
         """
@@ -174,26 +237,155 @@ class MySqlDaemon(AbstractDataManager):
         if _all_exist:
             logging.info("All need tables already exists. That's good!")
 
-    # TODO: make it better
+        if self.cfg["mysql"].get("time_partitioned", False):
+            await self._extend_daily_partitions()
+            self._partition_maintenance_future = asyncio.ensure_future(
+                self._partition_maintenance()
+            )
+
+    async def _extend_daily_partitions(self):
+        """
+        Keep daily partitions of time partitioned tables mysql.partition_days_ahead days ahead of today.
+        Not partitioned tables are skipped.
+        :return:
+        """
+        _days_ahead = self.cfg["mysql"].get("partition_days_ahead", 7)
+        _target_bound = UTC_DAY_START_MS() + (_days_ahead + 1) * DAY_MS
+        for table_name in self.subscription_type.tables_names:
+            _last_bound = await self._mysql_get_execution_handler(
+                REQUEST_TO_GET_LAST_DAILY_PARTITION_BOUND(table_name)
+            )
+            if not _last_bound or _last_bound[0] is None:
+                continue
+            _last_bound = int(_last_bound[0])
+            if _last_bound < _target_bound:
+                await self._mysql_post_execution_handler(
+                    REQUEST_TO_ADD_DAILY_PARTITIONS(
+                        table_name,
+                        first_day_ms=_last_bound,
+                        number_of_days=(_target_bound - _last_bound) // DAY_MS,
+                    )
+                )
+                logging.info(f"Add daily partitions to table {table_name}")
+
+    async def _partition_maintenance(self):
+        while True:
+            await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL)
+            await self._extend_daily_partitions()
+
     async def __database_one_table_record(self, record_dataframe: DataFrame):
-        data = self.subscription_type.record_to_database(
-            record_dataframe=record_dataframe, tag_of_data="LIMITED"
+        data = await self._run_in_mysql_thread(
+            partial(
+                self.subscription_type.record_to_database,
+                record_dataframe=record_dataframe,
+                tag_of_data="LIMITED",
+            )
         )
-        query = INSERT_MULTIPLE_DATA_HEADER_TEMPLATE.format(
-            self.subscription_type.tables_names[0]
+        _table_name = self.subscription_type.tables_names[0]
+        if self.insert_mode == "executemany":
+            await self._mysql_post_execution_handler(
+                query=INSERT_MULTIPLE_DATA_PARAMETERIZED_TEMPLATE(
+                    _table_name, list(data.columns)
+                ),
+                parameters=await self._run_in_mysql_thread(
+                    dataframe_to_parameters, data
+                ),
+                need_to_commit=True,
+                spill_on_failure=True,
+            )
+        elif self.insert_mode == "load_data":
+            await self.__load_data_local_infile(data=data, table_name=_table_name)
+        else:
+            query = INSERT_MULTIPLE_DATA_HEADER_TEMPLATE.format(_table_name)
+            # -1 for delete last coma
+            query += await self._run_in_mysql_thread(
+                partial(INSERT_MULTIPLE_DATA_VALUES_SYMBOL_TEMPLATE, dataframe=data)
+            )
+            await self._mysql_post_execution_handler(
+                query=query, need_to_commit=True, spill_on_failure=True
+            )
+
+    async def __load_data_local_infile(self, data: DataFrame, table_name: str):
+        """
+        Write TSV of batch to tmp file (mysql.load_data_directory, default system tmp) and LOAD DATA it.
+        :param data:
+        :param table_name:
+        :return:
+        """
+        _path = await self._run_in_mysql_thread(
+            self.__write_tsv_file, data, table_name
+        )
+        try:
+            await self._mysql_post_execution_handler(
+                query=LOAD_DATA_LOCAL_INFILE_TEMPLATE(
+                    table_name, _path, list(data.columns)
+                ),
+                need_to_commit=True,
+                spill_on_failure=True,
+            )
+        finally:
+            os.remove(_path)
+
+    def __write_tsv_file(self, data: DataFrame, table_name: str) -> str:
+        with tempfile.NamedTemporaryFile(
+            dir=self.cfg["mysql"].get("load_data_directory", None),
+            prefix=f"{table_name}_",
+            suffix=".tsv",
+            delete=False,
+        ) as _file:
+            _file.write(dataframe_to_tsv(data))
+        return _file.name
+
+    async def __database_several_tables_record(self, record_dataframe: DataFrame):
+        """
+        Batch of subscription with several tables (tag UNLIMITED, e.g. full order book: snapshot headers + levels).
+        Subscription splits batch to rows of every table, all tables are inserted by executemany in one transaction.
+        Rows with existing primary key are skipped: snapshot split between two batches and journal replay
+        do not duplicate rows.
+        :param record_dataframe:
+        :return:
+        """
+        data = await self._run_in_mysql_thread(
+            partial(
+                self.subscription_type.record_to_database,
+                record_dataframe=record_dataframe,
+                tag_of_data="UNLIMITED",
+            )
+        )
+
+        def _prepare_queries() -> list:
+            return [
+                (
+                    INSERT_MULTIPLE_DATA_PARAMETERIZED_TEMPLATE(
+                        _table_name, list(_table_data.columns), skip_duplicates=True
+                    ),
+                    dataframe_to_parameters(_table_data),
+                )
+                for _table_name, _table_data in zip(
+                    self.subscription_type.tables_names,
+                    self.subscription_type.split_record_to_tables(data),
+                )
+            ]
+
+        await self._mysql_post_transaction_handler(
+            queries=await self._run_in_mysql_thread(_prepare_queries),
+            need_to_commit=True,
+            spill_on_failure=True,
         )
-        # -1 for delete last coma
-        query += INSERT_MULTIPLE_DATA_VALUES_SYMBOL_TEMPLATE(dataframe=data)
-        # await asyncio.gather(self._mysql_post_execution_handler(query=query, need_to_commit=True))
-        await self._mysql_post_execution_handler(query=query, need_to_commit=True)
-
-    def __database_several_tables_record(self, record_dataframe: DataFrame):
-        # TODO: implement
-        # self.subscription_type.record_to_database(record_dataframe=record_dataframe, tag_of_data="UNLIMITED")
-        self.subscription_type.scrapper.loop.stop()
-        logging.error("NotImplementedError")
-        os.kill(os.getpid(), signal.SIGUSR1)
-        raise NotImplementedError
 
     async def _place_data_to_database(self, record_dataframe: DataFrame):
-        await self.__database_one_table_record(record_dataframe=record_dataframe)
+        if self.subscription_type.tag_of_data == "UNLIMITED":
+            await self.__database_several_tables_record(record_dataframe=record_dataframe)
+        else:
+            await self.__database_one_table_record(record_dataframe=record_dataframe)
+
+    async def shutdown(self):
+        """
+        Flush record system and wait for daemon thread.
+        :return:
+        """
+        await super().shutdown()
+        if self._partition_maintenance_future is not None:
+            self._partition_maintenance_future.cancel()
+        if self._mysql_executor is not None:
+            self._mysql_executor.shutdown(wait=True)
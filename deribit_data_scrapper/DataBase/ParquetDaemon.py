@@ -0,0 +1,347 @@
+import asyncio
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from numpy import ndarray
+from pandas import DataFrame
+
+from deribit_data_scrapper.DataBase.AbstractDataSaverManager import AbstractDataManager
+from deribit_data_scrapper.Subsciption.AbstractSubscription import AbstractSubscription
+
+# Columns used as hive partitions: {dataset}/date=YYYY-MM-DD/INSTRUMENT_INDEX=i/part-*.parquet
+PARTITION_INSTRUMENT_COLUMN = "INSTRUMENT_INDEX"
+PARTITION_TIMESTAMP_COLUMN = "TIMESTAMP_VALUE"
+
+DEFAULT_DICTIONARY_COLUMNS = [
+    "INSTRUMENT_STRIKE",
+    "INSTRUMENT_MATURITY",
+    "INSTRUMENT_TYPE",
+    "ORDER_TYPE",
+    "ORDER_STATE",
+]
+DEFAULT_DELTA_COLUMNS = ["TIMESTAMP_VALUE", "CHANGE_ID"]
+# File without footer is written with this prefix, pyarrow datasets skip such files
+IN_PROGRESS_PREFIX = "."
+DEFAULT_ROW_GROUP_ROWS = 100_000
+
+
+@dataclass()
+class ParquetFileWriter:
+    """
+    Open parquet file of (day, INSTRUMENT_INDEX) partition and its rows not written to row group yet
+    """
+
+    writer: pq.ParquetWriter
+    path: str  # Final path, file is written to in_progress_path until close
+    rows: int = 0  # Written and pending rows
+    row_groups: int = 0
+    opened_at: float = field(default_factory=time.monotonic)
+    pending: List[ndarray] = field(default_factory=list)
+    pending_rows: int = 0
+
+    @property
+    def in_progress_path(self) -> str:
+        return in_progress_path(self.path)
+
+
+def in_progress_path(path: str) -> str:
+    return os.path.join(
+        os.path.dirname(path), f"{IN_PROGRESS_PREFIX}{os.path.basename(path)}"
+    )
+
+
+class ParquetDaemon(AbstractDataManager):
+    """
+    Daemon for Parquet record type (database_daemon: parquet).
+    Rows of flushed batches are buffered per open parquet file of their partition and written as one row group
+    when parquet.row_group_rows rows are collected (or at close of file), so row groups stay large even when
+    batch is split between many instruments.
+    Dataset of subscription is partitioned by date (UTC of TIMESTAMP_VALUE) and INSTRUMENT_INDEX (hive layout),
+    instrument columns use dictionary encoding, timestamp and change id - DELTA_BINARY_PACKED.
+    Parquet footer is written at file close: file of day is closed when data of next day comes,
+    when it has parquet.rows_per_file rows or parquet.row_groups_per_file row groups, when it is open longer
+    than parquet.max_file_age sec (checked also by timer, so idle files are closed) and at shutdown.
+    Open file has name with IN_PROGRESS_PREFIX and is renamed at close, readers of dataset see only complete files.
+    """
+
+    dataset_directory: str
+    _writers: Dict[Tuple[int, int], ParquetFileWriter]
+    # Writes (writer thread or event loop) and file age timer share open files
+    _writers_lock: threading.RLock
+    _arrow_schema: pa.Schema
+    _last_day: Optional[int] = None
+    max_file_age: Optional[float] = None
+    _file_age_timer_future: Optional[asyncio.Future] = None
+
+    def __init__(
+        self,
+        configuration_path,
+        subscription_type: Optional[AbstractSubscription],
+        loop: asyncio.SelectorEventLoop,
+    ):
+        logging.basicConfig(
+            level="INFO",
+            format="%(asctime)s | %(levelname)s %(module)s | %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        self._writers = dict()
+        self._writers_lock = threading.RLock()
+        self.max_file_age = configuration_path["parquet"].get("max_file_age", 3600)
+        super().__init__(
+            config_path=configuration_path,
+            subscription_type=subscription_type,
+            loop=loop,
+        )
+        if self.max_file_age:
+            self._file_age_timer_future = asyncio.run_coroutine_threadsafe(
+                self._file_age_timer(), self.async_loop
+            )
+
+    async def _connect_to_database(self):
+        print("Connect Parquet")
+        try:
+            self.dataset_directory = f"{self.cfg['parquet']['parquet_database_directory']}/{self.subscription_type.__class__.__name__}_{self.subscription_type.tables_names[0]}"
+            if not os.path.exists(self.dataset_directory):
+                os.makedirs(self.dataset_directory)
+                logging.warning("Create folder for parquet dataset")
+            self._warn_about_incomplete_files()
+
+            _record_dtype = self.subscription_type.create_record_dtype()
+            self._file_columns = [
+                name
+                for name in _record_dtype.names
+                if name != PARTITION_INSTRUMENT_COLUMN
+            ]
+            self._arrow_schema = pa.schema(
+                [
+                    (name, pa.from_numpy_dtype(_record_dtype[name]))
+                    if _record_dtype[name].kind != "U"
+                    else (name, pa.string())
+                    for name in self._file_columns
+                ]
+            )
+            logging.info("Success connection to Parquet database")
+        except Exception as e:
+            logging.error(
+                "Connection to database raise error: \n {error}".format(error=e)
+            )
+            raise ConnectionError("Cannot connect to Parquet database")
+
+    def _warn_about_incomplete_files(self):
+        """
+        Files left in progress by killed process have no footer and can not be read.
+        :return:
+        """
+        for _directory, _, _files in os.walk(self.dataset_directory):
+            for _file in _files:
+                if _file.startswith(IN_PROGRESS_PREFIX) and _file.endswith(".parquet"):
+                    logging.warning(
+                        f"Parquet file ({_directory}/{_file}) was not closed by previous run and has no footer"
+                    )
+
+    async def _clean_exist_database(self):
+        if os.path.exists(self.dataset_directory):
+            logging.warning("CleanUP Parquet dataset")
+            self._close_writers()
+            shutil.rmtree(self.dataset_directory)
+            os.makedirs(self.dataset_directory)
+
+    async def _create_not_exist_database(self):
+        pass
+
+    def _writer_options(self) -> dict:
+        """
+        Encodings of parquet columns. Delta encoded columns are excluded from dictionary encoding.
+        :return:
+        """
+        _delta_columns = [
+            name
+            for name in self.cfg["parquet"].get("delta_columns", DEFAULT_DELTA_COLUMNS)
+            if name in self._file_columns
+            and pa.types.is_integer(self._arrow_schema.field(name).type)
+        ]
+        _dictionary_columns = [
+            name
+            for name in self.cfg["parquet"].get(
+                "dictionary_columns", DEFAULT_DICTIONARY_COLUMNS
+            )
+            if name in self._file_columns and name not in _delta_columns
+        ]
+        return dict(
+            compression=self.cfg["parquet"].get("compression", "zstd"),
+            use_dictionary=_dictionary_columns,
+            column_encoding={name: "DELTA_BINARY_PACKED" for name in _delta_columns},
+        )
+
+    def _partition_keys(self, records: ndarray) -> Tuple[ndarray, ndarray]:
+        """
+        Day number (UTC) and instrument index of every record.
+        Records without TIMESTAMP_VALUE use time of write, without INSTRUMENT_INDEX - single partition -1.
+        :param records:
+        :return:
+        """
+        if PARTITION_TIMESTAMP_COLUMN in records.dtype.names:
+            _timestamps = records[PARTITION_TIMESTAMP_COLUMN].astype(np.int64)
+        else:
+            _timestamps = np.full(
+                records.shape[0], int(time.time() * 1_000), dtype=np.int64
+            )
+        _days = _timestamps // 86_400_000
+        if PARTITION_INSTRUMENT_COLUMN in records.dtype.names:
+            _instruments = records[PARTITION_INSTRUMENT_COLUMN].astype(np.int64)
+        else:
+            _instruments = np.full(records.shape[0], -1, dtype=np.int64)
+        return _days, _instruments
+
+    def _partition_path(self, day: int, instrument_index: int) -> str:
+        _date = np.datetime64(day, "D").astype(str)
+        _directory = f"{self.dataset_directory}/date={_date}/{PARTITION_INSTRUMENT_COLUMN}={instrument_index}"
+        if not os.path.exists(_directory):
+            os.makedirs(_directory)
+        _sequence = 0
+        while os.path.exists(
+            f"{_directory}/part-{_sequence:05d}.parquet"
+        ) or os.path.exists(in_progress_path(f"{_directory}/part-{_sequence:05d}.parquet")):
+            _sequence += 1
+        return f"{_directory}/part-{_sequence:05d}.parquet"
+
+    def _get_writer(self, day: int, instrument_index: int) -> ParquetFileWriter:
+        _key = (day, instrument_index)
+        if _key not in self._writers:
+            _path = self._partition_path(day, instrument_index)
+            self._writers[_key] = ParquetFileWriter(
+                writer=pq.ParquetWriter(
+                    in_progress_path(_path), self._arrow_schema, **self._writer_options()
+                ),
+                path=_path,
+            )
+            logging.info(f"Open parquet file ({_path})")
+        return self._writers[_key]
+
+    def _write_row_group(self, file: ParquetFileWriter):
+        """
+        Write pending rows of file as one row group.
+        :param file:
+        :return:
+        """
+        if file.pending_rows == 0:
+            return
+        _records = (
+            file.pending[0] if len(file.pending) == 1 else np.concatenate(file.pending)
+        )
+        file.writer.write_table(
+            self._records_to_arrow(_records), row_group_size=file.pending_rows
+        )
+        file.row_groups += 1
+        file.pending = []
+        file.pending_rows = 0
+
+    def _close_writer(self, key: Tuple[int, int]):
+        _file = self._writers.pop(key)
+        self._write_row_group(_file)
+        _file.writer.close()
+        os.replace(_file.in_progress_path, _file.path)
+        logging.info(f"Close parquet file ({_file.path}), rows = ({_file.rows})")
+
+    def _close_writers(self, before_day: int = None):
+        """
+        Close files (write parquet footers). Only files of days before before_day if it is set.
+        :param before_day:
+        :return:
+        """
+        with self._writers_lock:
+            for key in list(self._writers):
+                if before_day is None or key[0] < before_day:
+                    self._close_writer(key)
+
+    def _close_old_writers(self):
+        """
+        Close files open longer than parquet.max_file_age sec.
+        :return:
+        """
+        with self._writers_lock:
+            for key, _file in list(self._writers.items()):
+                if time.monotonic() - _file.opened_at >= self.max_file_age:
+                    self._close_writer(key)
+
+    async def _file_age_timer(self):
+        """
+        Files of partitions without new rows are closed by age too.
+        :return:
+        """
+        while True:
+            await asyncio.sleep(self.max_file_age / 2)
+            try:
+                self._close_old_writers()
+            except Exception as e:
+                logging.exception(f"Close of old parquet files raise error: {e}")
+
+    def _records_to_arrow(self, records: ndarray) -> pa.Table:
+        return pa.Table.from_arrays(
+            [pa.array(records[name]) for name in self._file_columns],
+            schema=self._arrow_schema,
+        )
+
+    async def _place_records_to_database(self, records: ndarray) -> int:
+        with self._writers_lock:
+            self._write_records(records)
+        return 1
+
+    def _write_records(self, records: ndarray):
+        _days, _instruments = self._partition_keys(records)
+        _max_day = int(_days.max())
+        if self._last_day is None or _max_day > self._last_day:
+            # New day started - files of previous days are complete
+            self._close_writers(before_day=_max_day)
+            self._last_day = _max_day
+        if self.max_file_age:
+            self._close_old_writers()
+
+        _rows_per_file = self.cfg["parquet"].get("rows_per_file", 1_000_000)
+        _row_groups_per_file = self.cfg["parquet"].get("row_groups_per_file", None)
+        _row_group_rows = self.cfg["parquet"].get("row_group_rows", DEFAULT_ROW_GROUP_ROWS)
+        for day in np.unique(_days):
+            _day_mask = _days == day
+            for instrument_index in np.unique(_instruments[_day_mask]):
+                _mask = _day_mask & (_instruments == instrument_index)
+                _key = (int(day), int(instrument_index))
+                _file = self._get_writer(*_key)
+                _rows = records[_mask]
+                _file.pending.append(_rows)
+                _file.pending_rows += _rows.shape[0]
+                _file.rows += _rows.shape[0]
+                if _file.pending_rows >= _row_group_rows:
+                    self._write_row_group(_file)
+                if _file.rows >= _rows_per_file or (
+                    _row_groups_per_file and _file.row_groups >= _row_groups_per_file
+                ):
+                    self._close_writer(_key)
+
+    async def _place_data_to_database(self, record_dataframe: DataFrame) -> int:
+        return await self._place_records_to_database(
+            records=record_dataframe.to_records(index=False).astype(
+                self.circular_batch_tables.record_dtype
+            )
+        )
+
+    async def shutdown(self):
+        """
+        Flush record system and close all parquet files.
+        :return:
+        """
+        await super().shutdown()
+        if self._file_age_timer_future is not None:
+            self._file_age_timer_future.cancel()
+        self._close_writers()
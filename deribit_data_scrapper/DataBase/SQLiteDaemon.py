@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import os
+import sqlite3
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from numpy import ndarray
+from pandas import DataFrame
+
+from deribit_data_scrapper.DataBase.AbstractDataSaverManager import AbstractDataManager
+from deribit_data_scrapper.Subsciption.AbstractSubscription import AbstractSubscription
+
+TIME_INDEX_COLUMN = "TIMESTAMP_VALUE"
+
+
+def SQLITE_COLUMN_TYPE(dtype: np.dtype) -> str:
+    if dtype.kind in ("i", "u", "b"):
+        return "INTEGER"
+    if dtype.kind == "f":
+        return "REAL"
+    return "TEXT"
+
+
+def REQUEST_TO_CREATE_SQLITE_TABLE(
+    table_name: str, dtype: np.dtype, primary_key: Optional[List[str]] = None
+) -> str:
+    _columns = [
+        f"{name} {SQLITE_COLUMN_TYPE(dtype[name])}" for name in dtype.names
+    ]
+    if primary_key:
+        _columns.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+    return f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(_columns)})"
+
+
+def REQUEST_TO_CREATE_SQLITE_TIME_INDEX(table_name: str) -> str:
+    return f"CREATE INDEX IF NOT EXISTS {table_name}_TIME_INDEX ON {table_name} ({TIME_INDEX_COLUMN})"
+
+
+def INSERT_SQLITE_TEMPLATE(
+    table_name: str, columns: List[str], skip_duplicates: bool = False
+) -> str:
+    return "INSERT {}INTO {} ({}) VALUES ({})".format(
+        "OR IGNORE " if skip_duplicates else "",
+        table_name,
+        ", ".join(columns),
+        ", ".join("?" * len(columns)),
+    )
+
+
+class SQLiteDaemon(AbstractDataManager):
+    """
+    Daemon for SQLite record type (database_daemon: sqlite). Local record system without server:
+    all subscriptions write to one database file, every daemon has own connection.
+    Journal mode is WAL, so readers (research notebooks) do not block writer.
+    Schema is generated from record dtype of subscription (create_columns_list), every flushed batch is
+    one executemany per table inside one BEGIN IMMEDIATE ... COMMIT transaction. Insert statements are
+    the same for every batch, so they are prepared once and taken from sqlite statement cache.
+    Busy database (sqlite3.OperationalError) is raised as ConnectionError, so spill buffer handles it.
+    """
+
+    connection: Optional[sqlite3.Connection] = None
+    database_path: str
+    # (table name, columns, insert statement) for every table of subscription
+    _tables: List[Tuple[str, List[str], str]]
+
+    def __init__(
+        self,
+        configuration_path,
+        subscription_type: Optional[AbstractSubscription],
+        loop: asyncio.SelectorEventLoop,
+    ):
+        logging.basicConfig(
+            level="INFO",
+            format="%(asctime)s | %(levelname)s %(module)s | %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        super().__init__(
+            config_path=configuration_path,
+            subscription_type=subscription_type,
+            loop=loop,
+        )
+
+    def _tables_dtypes(self) -> List[np.dtype]:
+        """
+        Dtype of every table of subscription. UNLIMITED subscriptions split record to several tables.
+        :return:
+        """
+        _record_dtype = self.subscription_type.create_record_dtype()
+        if self.subscription_type.tag_of_data != "UNLIMITED":
+            return [_record_dtype]
+        return [
+            _table.to_records(index=False).dtype
+            for _table in self.subscription_type.split_record_to_tables(
+                DataFrame(np.zeros(0, dtype=_record_dtype))
+            )
+        ]
+
+    async def _connect_to_database(self):
+        print("Connect SQLite")
+        try:
+            self.database_path = self.cfg["sqlite"]["sqlite_database_path"]
+            _directory = os.path.dirname(self.database_path)
+            if _directory and not os.path.exists(_directory):
+                os.makedirs(_directory)
+                logging.warning("Create folder for sqlite database")
+
+            # Autocommit mode: transactions are opened explicitly for every batch.
+            # Background flush writes from writer thread, so connection is not bound to thread
+            self.connection = sqlite3.connect(
+                self.database_path,
+                isolation_level=None,
+                check_same_thread=False,
+                timeout=self.cfg["sqlite"].get("busy_timeout", 5),
+                cached_statements=self.cfg["sqlite"].get("cached_statements", 128),
+            )
+            _journal_mode = self.connection.execute(
+                "PRAGMA journal_mode=WAL"
+            ).fetchone()[0]
+            if _journal_mode.lower() != "wal":
+                logging.warning(f"SQLite journal mode is ({_journal_mode}), not WAL")
+            self.connection.execute(
+                f"PRAGMA synchronous={self.cfg['sqlite'].get('synchronous', 'NORMAL')}"
+            )
+
+            _primary_keys = self.subscription_type.tables_primary_keys
+            self._tables = [
+                (
+                    _table_name,
+                    list(_dtype.names),
+                    INSERT_SQLITE_TEMPLATE(
+                        _table_name,
+                        list(_dtype.names),
+                        skip_duplicates=_primary_keys is not None,
+                    ),
+                )
+                for _table_name, _dtype in zip(
+                    self.subscription_type.tables_names, self._tables_dtypes()
+                )
+            ]
+            logging.info("Success connection to SQLite database")
+        except Exception as e:
+            logging.error(
+                "Connection to database raise error: \n {error}".format(error=e)
+            )
+            raise ConnectionError("Cannot connect to SQLite database")
+
+    async def _clean_exist_database(self):
+        logging.warning("CleanUP SQLite tables")
+        self._execute_transaction(
+            [(f"DELETE FROM {_table_name}", None) for _table_name, _, _ in self._tables]
+        )
+
+    async def _create_not_exist_database(self):
+        _primary_keys = self.subscription_type.tables_primary_keys
+        _queries = []
+        for _number, (_dtype, (_table_name, _columns, _)) in enumerate(
+            zip(self._tables_dtypes(), self._tables)
+        ):
+            _queries.append(
+                (
+                    REQUEST_TO_CREATE_SQLITE_TABLE(
+                        _table_name,
+                        _dtype,
+                        primary_key=_primary_keys[_number] if _primary_keys else None,
+                    ),
+                    None,
+                )
+            )
+            if self.cfg["sqlite"].get("time_index", True) and TIME_INDEX_COLUMN in _columns:
+                _queries.append((REQUEST_TO_CREATE_SQLITE_TIME_INDEX(_table_name), None))
+        self._execute_transaction(_queries)
+
+    def _execute_transaction(self, queries: List[Tuple[str, Optional[list]]]) -> int:
+        """
+        Execute queries in one transaction. Query with rows is executed by executemany.
+        :param queries: (query, rows for executemany or None)
+        :return: number of inserted rows
+        """
+        _inserted = 0
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                for _query, _rows in queries:
+                    if _rows is None:
+                        self.connection.execute(_query)
+                    else:
+                        _inserted += self.connection.executemany(_query, _rows).rowcount
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+        except sqlite3.OperationalError as e:
+            logging.error(f"SQLite transaction raise error: \n {e}")
+            raise ConnectionError(f"Cannot execute SQLite transaction: {e}")
+        return _inserted
+
+    async def _place_records_to_database(self, records: ndarray) -> int:
+        if self.subscription_type.tag_of_data == "UNLIMITED":
+            return await self._place_data_to_database(record_dataframe=DataFrame(records))
+        # Records are already typed rows of the table: tolist gives tuples of python scalars
+        _table_name, _columns, _insert = self._tables[0]
+        return self._execute_transaction([(_insert, records[_columns].tolist())])
+
+    async def _place_data_to_database(self, record_dataframe: DataFrame) -> int:
+        if self.subscription_type.tag_of_data == "UNLIMITED":
+            _tables_data = self.subscription_type.split_record_to_tables(record_dataframe)
+        else:
+            _tables_data = [record_dataframe]
+        return self._execute_transaction(
+            [
+                (_insert, _data[_columns].to_records(index=False).tolist())
+                for (_table_name, _columns, _insert), _data in zip(
+                    self._tables, _tables_data
+                )
+            ]
+        )
+
+    async def shutdown(self):
+        """
+        Flush record system and close connection (WAL is checkpointed by sqlite on close).
+        :return:
+        """
+        await super().shutdown()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
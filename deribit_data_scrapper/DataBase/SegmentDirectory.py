@@ -0,0 +1,45 @@
+import logging
+import os
+import re
+from typing import List
+
+
+class SegmentDirectory:
+    """
+    Папка с пронумерованными файлами сегментов {name}_{segment_id:012d}{segment_suffix}.
+    Общая основа WriteAheadJournal и SpillBuffer: путь сегмента, поиск сегментов предыдущего запуска
+    (по возрастанию id) и создание папки.
+    """
+
+    segment_suffix: str
+    directory: str
+    name: str
+
+    def __init__(self, directory: str, name: str, description: str):
+        """
+        :param directory: папка для сегментов
+        :param name: префикс файлов сегментов (уникален для daemon)
+        :param description: название хранилища для лога создания папки
+        """
+        self.directory = directory
+        self.name = name
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+            logging.warning(f"Create folder for {description}")
+
+    def segment_path(self, segment_id: int) -> str:
+        return os.path.join(
+            self.directory, f"{self.name}_{segment_id:012d}{self.segment_suffix}"
+        )
+
+    def _find_existing_segments(self) -> List[int]:
+        _pattern = re.compile(
+            rf"^{re.escape(self.name)}_(\d+){re.escape(self.segment_suffix)}$"
+        )
+        _segments = []
+        for file_name in os.listdir(self.directory):
+            _match = _pattern.match(file_name)
+            if _match:
+                _segments.append(int(_match.group(1)))
+        return sorted(_segments)
@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+from typing import List
+
+from numpy import ndarray
+
+from deribit_data_scrapper.DataBase.SegmentDirectory import SegmentDirectory
+
+SPILL_SEGMENT_SUFFIX = ".spill"
+QUARANTINE_SEGMENT_SUFFIX = ".quarantine"
+
+
+@dataclass()
+class SpillStatistics:
+    """
+    Counters of spill buffer. Exported to {name}_metrics.json at every change
+    """
+
+    spilled_batches: int = 0  # Batches written to disk because database was unavailable
+    spilled_rows: int = 0
+    replayed_batches: int = 0  # Batches placed to database by drainer
+    replayed_rows: int = 0
+    dropped_batches: int = 0  # Batches lost because spill reached max_bytes
+    dropped_rows: int = 0
+    quarantined_batches: int = 0  # Segments rejected by database (not connection error), kept for inspection
+    quarantined_rows: int = 0
+    pending_segments: int = 0  # Segments waiting for database
+    pending_bytes: int = 0
+    failed_drain_attempts: int = 0
+    last_spill_time: float = 0.0  # Unix time
+    last_drain_time: float = 0.0
+
+
+class SpillBuffer(SegmentDirectory):
+    """
+    Disk buffer of batches that can not be written to database (outage).
+    One failed batch - one segment file with raw rows of record dtype (the same bytes as tmp table).
+    Segment is written to tmp file, fsynced and renamed, so drainer never sees half written segment.
+    Segments are replayed in order of ids; while any segment is pending, new batches are spilled behind it,
+    so database receives batches in the same order as without outage.
+    Size of all segments is limited by max_bytes: batch that does not fit is dropped and counted.
+    Segment that database rejects (data or syntax error) is renamed to *.quarantine and is not replayed again.
+    """
+
+    segment_suffix = SPILL_SEGMENT_SUFFIX
+    max_bytes: int
+    pending_segments: List[int]
+    statistics: SpillStatistics
+
+    def __init__(self, directory: str, name: str, max_bytes: int):
+        """
+        :param directory: папка для сегментов
+        :param name: префикс файлов сегментов (уникален для daemon)
+        :param max_bytes: максимальный суммарный размер сегментов
+        """
+        super().__init__(directory=directory, name=name, description="spill buffer")
+        self.max_bytes = max_bytes
+
+        self.statistics = SpillStatistics()
+        self.pending_segments = self._find_existing_segments()
+        self._next_segment_id = (
+            self.pending_segments[-1] + 1 if self.pending_segments else 0
+        )
+        self.statistics.pending_segments = len(self.pending_segments)
+        self.statistics.pending_bytes = sum(
+            os.path.getsize(self.segment_path(segment_id))
+            for segment_id in self.pending_segments
+        )
+        if self.pending_segments:
+            logging.warning(
+                f"Spill buffer has ({len(self.pending_segments)}) segments of previous run"
+            )
+        self._export_statistics()
+
+    @property
+    def metrics_path(self) -> str:
+        return os.path.join(self.directory, f"{self.name}_metrics.json")
+
+    @property
+    def has_pending(self) -> bool:
+        return len(self.pending_segments) != 0
+
+    def _export_statistics(self):
+        _tmp_path = self.metrics_path + ".tmp"
+        with open(_tmp_path, "w") as _file:
+            json.dump(asdict(self.statistics), _file)
+        os.replace(_tmp_path, self.metrics_path)
+
+    def spill(self, records: ndarray) -> bool:
+        """
+        Write batch to new segment.
+        :param records: rows of tmp table
+        :return: False if batch was dropped because of max_bytes
+        """
+        _data = records.tobytes()
+        if self.statistics.pending_bytes + len(_data) > self.max_bytes:
+            self.statistics.dropped_batches += 1
+            self.statistics.dropped_rows += records.shape[0]
+            logging.error(
+                f"Spill buffer is full ({self.statistics.pending_bytes} bytes). Drop batch of ({records.shape[0]}) rows"
+            )
+            self._export_statistics()
+            return False
+
+        _path = self.segment_path(self._next_segment_id)
+        with open(_path + ".tmp", "wb") as _file:
+            _file.write(_data)
+            _file.flush()
+            os.fsync(_file.fileno())
+        os.replace(_path + ".tmp", _path)
+        self.pending_segments.append(self._next_segment_id)
+        self._next_segment_id += 1
+
+        self.statistics.spilled_batches += 1
+        self.statistics.spilled_rows += records.shape[0]
+        self.statistics.pending_segments = len(self.pending_segments)
+        self.statistics.pending_bytes += len(_data)
+        self.statistics.last_spill_time = time.time()
+        self._export_statistics()
+        return True
+
+    def read_segment(self, segment_id: int) -> bytes:
+        with open(self.segment_path(segment_id), "rb") as _file:
+            return _file.read()
+
+    def acknowledge(self, segment_id: int, number_of_rows: int):
+        """
+        Segment is written to database - remove it.
+        :param segment_id:
+        :param number_of_rows:
+        :return:
+        """
+        _path = self.segment_path(segment_id)
+        if os.path.exists(_path):
+            self.statistics.pending_bytes -= os.path.getsize(_path)
+            os.remove(_path)
+        self.pending_segments.remove(segment_id)
+        self.statistics.replayed_batches += 1
+        self.statistics.replayed_rows += number_of_rows
+        self.statistics.pending_segments = len(self.pending_segments)
+        self.statistics.last_drain_time = time.time()
+        self._export_statistics()
+
+    def quarantine(self, segment_id: int, number_of_rows: int):
+        """
+        Segment can not be written to database - move it out of replay queue, file is kept.
+        :param segment_id:
+        :param number_of_rows:
+        :return:
+        """
+        _path = self.segment_path(segment_id)
+        if os.path.exists(_path):
+            self.statistics.pending_bytes -= os.path.getsize(_path)
+            os.replace(
+                _path, _path[: -len(SPILL_SEGMENT_SUFFIX)] + QUARANTINE_SEGMENT_SUFFIX
+            )
+        self.pending_segments.remove(segment_id)
+        self.statistics.quarantined_batches += 1
+        self.statistics.quarantined_rows += number_of_rows
+        self.statistics.pending_segments = len(self.pending_segments)
+        self._export_statistics()
+
+    def record_failed_drain(self):
+        self.statistics.failed_drain_attempts += 1
+        self._export_statistics()
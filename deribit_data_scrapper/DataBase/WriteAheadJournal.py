@@ -0,0 +1,167 @@
+import logging
+import os
+import struct
+import threading
+from typing import BinaryIO
+from typing import List
+from typing import Optional
+
+import numpy as np
+from numpy import ndarray
+
+from deribit_data_scrapper.DataBase.SegmentDirectory import SegmentDirectory
+
+JOURNAL_SEGMENT_SUFFIX = ".wal"
+LENGTH_PREFIX = struct.Struct("<I")
+
+
+class WriteAheadJournal(SegmentDirectory):
+    """
+    Append-only журнал строк record system. Каждая строка пишется как length-prefixed запись
+    фиксированной ширины (uint32 длина + байты строки tmp таблицы).
+    Один сегмент журнала соответствует одной tmp таблице: при закрытии таблицы сегмент ротируется,
+    после подтверждения записи в БД сегмент удаляется. Оставшиеся после падения сегменты
+    проигрываются в daemon при старте.
+    Каждый append сразу передается в page cache (flush), поэтому падение процесса не теряет строк;
+    fsync (защита от падения ОС) выполняет timer daemon раз в fsync_interval.
+    append/rotate вызываются из event loop, acknowledge - также из writer thread, поэтому состояние
+    журнала защищено lock.
+    """
+
+    segment_suffix = JOURNAL_SEGMENT_SUFFIX
+    row_nbytes: int
+    fsync_interval: float
+
+    pending_segments: List[int]
+    current_segment_id: int
+    _current_file: Optional[BinaryIO] = None
+    _lock: threading.Lock
+
+    def __init__(
+        self, directory: str, name: str, row_nbytes: int, fsync_interval: float = 1.0
+    ):
+        """
+        :param directory: папка для сегментов журнала
+        :param name: префикс файлов сегментов (уникален для daemon)
+        :param row_nbytes: ширина одной строки в байтах
+        :param fsync_interval: период fsync в сек (timer daemon). 0 - fsync после каждой записи
+        """
+        super().__init__(
+            directory=directory, name=name, description="write-ahead journal"
+        )
+        self.row_nbytes = row_nbytes
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+
+        self.pending_segments = self._find_existing_segments()
+        self.current_segment_id = (
+            self.pending_segments[-1] + 1 if self.pending_segments else 0
+        )
+        self._record_dtype = np.dtype(
+            [("length", "<u4"), ("row", np.void, self.row_nbytes)]
+        )
+        self._open_segment()
+        if self.pending_segments:
+            logging.warning(
+                f"Write-ahead journal has ({len(self.pending_segments)}) not acknowledged segments"
+            )
+
+    def _open_segment(self):
+        self._current_file = open(self.segment_path(self.current_segment_id), "ab")
+
+    def append(self, rows: ndarray):
+        """
+        Append строк (2D ndarray фиксированной ширины) с flush в page cache. Fsync только при fsync_interval 0.
+        :param rows:
+        :return:
+        """
+        _rows = np.ascontiguousarray(rows)
+        _records = np.empty(_rows.shape[0], dtype=self._record_dtype)
+        _records["length"] = self.row_nbytes
+        _records["row"] = _rows.view(np.dtype((np.void, self.row_nbytes))).reshape(-1)
+        with self._lock:
+            self._current_file.write(_records.tobytes())
+            self._current_file.flush()
+            if self.fsync_interval == 0:
+                os.fsync(self._current_file.fileno())
+
+    def sync(self):
+        """
+        Fsync текущего сегмента. Append не ждет fsync: он выполняется на копии дескриптора вне lock.
+        :return:
+        """
+        with self._lock:
+            if self._current_file.closed:
+                return
+            self._current_file.flush()
+            _fileno = os.dup(self._current_file.fileno())
+        try:
+            os.fsync(_fileno)
+        finally:
+            os.close(_fileno)
+
+    def _sync_locked(self):
+        self._current_file.flush()
+        os.fsync(self._current_file.fileno())
+
+    def rotate(self) -> int:
+        """
+        Закрывает текущий сегмент и открывает новый.
+        :return: id закрытого сегмента (передается в acknowledge после записи в БД)
+        """
+        with self._lock:
+            self._sync_locked()
+            self._current_file.close()
+            closed_segment = self.current_segment_id
+            self.current_segment_id += 1
+            self._open_segment()
+        return closed_segment
+
+    def acknowledge(self, segment_id: int):
+        """
+        Downstream запись подтверждена - сегмент больше не нужен.
+        :param segment_id:
+        :return:
+        """
+        _path = self.segment_path(segment_id)
+        with self._lock:
+            if os.path.exists(_path):
+                os.remove(_path)
+            if segment_id in self.pending_segments:
+                self.pending_segments.remove(segment_id)
+
+    def read_segment(self, segment_id: int) -> bytes:
+        """
+        Читает строки сегмента. Недописанная при падении последняя запись отбрасывается.
+        :param segment_id:
+        :return: конкатенация байтов строк
+        """
+        with open(self.segment_path(segment_id), "rb") as _file:
+            _data = _file.read()
+        _number_of_records = len(_data) // self._record_dtype.itemsize
+        _records = np.frombuffer(
+            _data,
+            dtype=self._record_dtype,
+            count=_number_of_records,
+        )
+        _broken = np.flatnonzero(_records["length"] != self.row_nbytes)
+        if _broken.size != 0:
+            logging.error(
+                f"Journal segment ({segment_id}) has record with unexpected length. Read only ({_broken[0]}) rows"
+            )
+            _records = _records[: _broken[0]]
+        if len(_data) != _number_of_records * self._record_dtype.itemsize:
+            logging.warning(
+                f"Journal segment ({segment_id}) has incomplete tail record. It is dropped"
+            )
+        return _records["row"].tobytes()
+
+    def close(self):
+        with self._lock:
+            if self._current_file is not None and not self._current_file.closed:
+                self._sync_locked()
+                self._current_file.close()
+        # Empty current segment is not needed after clean shutdown
+        _path = self.segment_path(self.current_segment_id)
+        if os.path.exists(_path) and os.path.getsize(_path) == 0:
+            os.remove(_path)
@@ -1,3 +1,12 @@
+from .CircularBatchStore import CircularBatchStore
+from .SegmentDirectory import SegmentDirectory
+from .WriteAheadJournal import WriteAheadJournal
+from .SpillBuffer import SpillBuffer
+from .HDF5PartitionManifest import HDF5PartitionManifest
 from .HDF5NewDaemon import HDF5Daemon
 from .AbstractDataSaverManager import AbstractDataManager, AutoIncrementDict
+from .MySQLConnectionPool import MySQLConnectionPool
 from .MySQLNewDaemon import MySqlDaemon
+from .SQLiteDaemon import SQLiteDaemon
+from .MmapColumnSegment import MmapColumnSegment, list_mmap_segments, read_mmap_segment
+from .MmapDaemon import MmapDaemon
@@ -0,0 +1,261 @@
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+from numpy.lib import recfunctions
+
+from deribit_data_scrapper.DataBase.AbstractDataSaverManager import AbstractDataManager
+
+
+class _Scrapper:
+    developConfiguration = {"DATA_MANAGER": {"SHOW_WHEN_DATA_TRANSFERS": False}}
+
+
+class _Subscription:
+    scrapper = _Scrapper()
+    tables_names = ["TEST_TABLE"]
+    number_of_columns = 3
+
+    def create_columns_list(self):
+        return ["CHANGE_ID", "TIMESTAMP_VALUE", "PRICE"]
+
+    def create_record_dtype(self):
+        return np.dtype(
+            [("CHANGE_ID", np.int64), ("TIMESTAMP_VALUE", np.int64), ("PRICE", np.float64)]
+        )
+
+
+class _ListDaemon(AbstractDataManager):
+    """Record system that keeps flushed tables in memory."""
+
+    def __init__(self, *args, **kwargs):
+        self.flushed_tables = []
+        self.flushed_dataframes = []
+        super().__init__(*args, **kwargs)
+
+    async def _connect_to_database(self):
+        pass
+
+    async def _clean_exist_database(self):
+        pass
+
+    async def _create_not_exist_database(self):
+        pass
+
+    async def _place_data_to_database(self, record_dataframe) -> int:
+        self.flushed_tables.append(record_dataframe.to_numpy(dtype=np.float64))
+        self.flushed_dataframes.append(record_dataframe.copy())
+        return 1
+
+
+class _SlowListDaemon(_ListDaemon):
+    """Record system that reads table only after slow write."""
+
+    write_time = 0.1
+
+    async def _place_data_to_database(self, record_dataframe) -> int:
+        self.writer_threads = getattr(self, "writer_threads", set()) | {threading.get_ident()}
+        time.sleep(self.write_time)
+        return await super()._place_data_to_database(record_dataframe)
+
+
+def make_configuration(number_of_tmp_tables: int, size_of_tmp_batch_table: int):
+    return {
+        "orderBookScrapper": {"enable_database_record": False},
+        "record_system": {
+            "use_batches_to_record": True,
+            "number_of_tmp_tables": number_of_tmp_tables,
+            "size_of_tmp_batch_table": size_of_tmp_batch_table,
+            "clean_database_at_startup": False,
+        },
+    }
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def make_daemon(self, number_of_tmp_tables: int, size_of_tmp_batch_table: int):
+        daemon = _ListDaemon(
+            make_configuration(number_of_tmp_tables, size_of_tmp_batch_table),
+            _Subscription(),
+            self.loop,
+        )
+        # Execute connection/validation coroutines scheduled by constructor
+        self.loop.run_until_complete(asyncio.sleep(0))
+        return daemon
+
+    def test_block_inside_one_table(self):
+        daemon = self.make_daemon(number_of_tmp_tables=3, size_of_tmp_batch_table=10)
+        block = np.arange(12, dtype=np.float64).reshape(4, 3)
+        self.loop.run_until_complete(daemon.add_data(update_line=block))
+
+        self.assertEqual(len(daemon.flushed_tables), 0)
+        self.assertEqual(daemon.circular_batch_tables.mutable_pointer, 4)
+        np.testing.assert_array_equal(
+            recfunctions.structured_to_unstructured(
+                daemon.circular_batch_tables[0][:4]
+            ),
+            block,
+        )
+
+    def test_block_spans_several_tables(self):
+        daemon = self.make_daemon(number_of_tmp_tables=3, size_of_tmp_batch_table=4)
+        # Shift pointer so block starts in the middle of table
+        self.loop.run_until_complete(
+            daemon.add_data(update_line=np.array([-1.0, -1.0, -1.0]))
+        )
+        block = np.arange(33, dtype=np.float64).reshape(11, 3)
+        self.loop.run_until_complete(daemon.add_data(update_line=block))
+
+        # 1 + 11 rows -> 3 full tables, ring pointer back at first table
+        self.assertEqual(len(daemon.flushed_tables), 3)
+        self.assertEqual(daemon.circular_batch_tables.currently_selected_table, 0)
+        self.assertEqual(daemon.circular_batch_tables.mutable_pointer, 0)
+        np.testing.assert_array_equal(
+            np.concatenate(daemon.flushed_tables),
+            np.vstack([np.array([[-1.0, -1.0, -1.0]]), block]),
+        )
+
+    def test_block_longer_than_ring(self):
+        daemon = self.make_daemon(number_of_tmp_tables=2, size_of_tmp_batch_table=3)
+        block = np.arange(45, dtype=np.float64).reshape(15, 3)
+        self.loop.run_until_complete(daemon.add_data(update_line=block))
+
+        # Every table is flushed before ring overwrites it
+        self.assertEqual(len(daemon.flushed_tables), 5)
+        np.testing.assert_array_equal(np.concatenate(daemon.flushed_tables), block)
+
+    def test_rows_and_blocks_keep_order(self):
+        daemon = self.make_daemon(number_of_tmp_tables=2, size_of_tmp_batch_table=5)
+        expected = []
+        for i in range(4):
+            row = np.full(3, float(i))
+            block = np.full((3, 3), float(10 + i))
+            self.loop.run_until_complete(daemon.add_data(update_line=row))
+            self.loop.run_until_complete(daemon.add_data(update_line=block))
+            expected.extend([row, *block])
+
+        self.assertEqual(len(daemon.flushed_tables), 3)
+        np.testing.assert_array_equal(
+            np.concatenate(daemon.flushed_tables), np.vstack(expected[:15])
+        )
+
+    def test_partial_flush_by_bytes(self):
+        configuration = make_configuration(
+            number_of_tmp_tables=2, size_of_tmp_batch_table=10
+        )
+        # 2 int64 + 1 float64 columns -> 24 bytes per row
+        configuration["record_system"]["max_batch_bytes"] = 72
+        daemon = _ListDaemon(configuration, _Subscription(), self.loop)
+        self.loop.run_until_complete(asyncio.sleep(0))
+        block = np.arange(15, dtype=np.float64).reshape(5, 3)
+        self.loop.run_until_complete(daemon.add_data(update_line=block))
+
+        self.assertEqual(len(daemon.flushed_tables), 1)
+        np.testing.assert_array_equal(daemon.flushed_tables[0], block)
+        self.assertEqual(daemon.last_flush_statistics.reason, "bytes")
+        self.assertEqual(daemon.last_flush_statistics.number_of_rows, 5)
+        self.assertEqual(daemon.circular_batch_tables.currently_selected_table, 1)
+
+    def test_partial_flush_by_age_on_idle_stream(self):
+        configuration = make_configuration(
+            number_of_tmp_tables=2, size_of_tmp_batch_table=10
+        )
+        configuration["record_system"]["max_batch_age"] = 0.05
+        daemon = _ListDaemon(configuration, _Subscription(), self.loop)
+        self.loop.run_until_complete(asyncio.sleep(0))
+        block = np.arange(9, dtype=np.float64).reshape(3, 3)
+        self.loop.run_until_complete(daemon.add_data(update_line=block))
+        self.assertEqual(len(daemon.flushed_tables), 0)
+        # No add_data calls: age timer flushes partial table
+        self.loop.run_until_complete(asyncio.sleep(0.2))
+
+        self.assertEqual(len(daemon.flushed_tables), 1)
+        np.testing.assert_array_equal(daemon.flushed_tables[0], block)
+        self.assertEqual(daemon.last_flush_statistics.reason, "age")
+        self.assertGreaterEqual(daemon.last_flush_statistics.batch_age, 0.05)
+        self.loop.run_until_complete(daemon.shutdown())
+        self.loop.run_until_complete(asyncio.sleep(0))
+        # Empty current table is not flushed at shutdown
+        self.assertEqual(len(daemon.flushed_tables), 1)
+
+    def test_typed_columns_keep_exact_ids(self):
+        daemon = self.make_daemon(number_of_tmp_tables=2, size_of_tmp_batch_table=2)
+        _trade_id = 2**60 + 1
+        records = np.array(
+            [(_trade_id, 1, 0.5), (_trade_id + 1, 2, 1.5)],
+            dtype=daemon.subscription_type.create_record_dtype(),
+        )
+        self.loop.run_until_complete(daemon.add_data(update_line=records))
+
+        self.assertEqual(daemon.circular_batch_tables.row_nbytes, 24)
+        self.assertEqual(
+            daemon.flushed_dataframes[0]["CHANGE_ID"].tolist(),
+            [_trade_id, _trade_id + 1],
+        )
+
+    def test_journal_is_synced_by_timer_after_burst(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        configuration = make_configuration(number_of_tmp_tables=2, size_of_tmp_batch_table=10)
+        configuration["record_system"].update(
+            use_write_ahead_journal=True,
+            journal_directory=directory.name,
+            journal_fsync_interval=0.05,
+        )
+        daemon = _ListDaemon(configuration, _Subscription(), self.loop)
+        self.loop.run_until_complete(asyncio.sleep(0))
+        synced = []
+        _sync = daemon.journal.sync
+        daemon.journal.sync = lambda: synced.append(_sync())
+        self.loop.run_until_complete(daemon.add_data(update_line=np.ones((3, 3))))
+        # No new rows after burst
+        self.loop.run_until_complete(asyncio.sleep(0.2))
+
+        self.assertGreaterEqual(len(synced), 2)
+        self.loop.run_until_complete(daemon.shutdown())
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+    def make_background_daemon(self, daemon_class, number_of_tmp_tables: int, size_of_tmp_batch_table: int):
+        configuration = make_configuration(number_of_tmp_tables, size_of_tmp_batch_table)
+        configuration["record_system"]["flush_in_background"] = True
+        daemon = daemon_class(configuration, _Subscription(), self.loop)
+        self.loop.run_until_complete(asyncio.sleep(0))
+        return daemon
+
+    def test_background_flush_keeps_row_order(self):
+        daemon = self.make_background_daemon(_ListDaemon, number_of_tmp_tables=2, size_of_tmp_batch_table=3)
+        block = np.arange(45, dtype=np.float64).reshape(15, 3)
+        for offset in range(0, 15, 2):
+            self.loop.run_until_complete(daemon.add_data(update_line=block[offset : offset + 2]))
+        self.loop.run_until_complete(daemon.shutdown())
+
+        self.assertEqual(len(daemon.flushed_tables), 5)
+        np.testing.assert_array_equal(np.concatenate(daemon.flushed_tables), block)
+        self.assertEqual(daemon.last_flush_statistics.number_of_rows, 3)
+
+    def test_slow_background_writer_blocks_add_data_instead_of_overwriting_table(self):
+        daemon = self.make_background_daemon(
+            _SlowListDaemon, number_of_tmp_tables=2, size_of_tmp_batch_table=3
+        )
+        blocks = [np.full((3, 3), float(i)) for i in range(4)]
+        start = time.monotonic()
+        for block in blocks:
+            self.loop.run_until_complete(daemon.add_data(update_line=block))
+        # Ring of 2 tables: 3rd and 4th tables wait until writer frees the ones being written
+        self.assertGreaterEqual(time.monotonic() - start, 2 * _SlowListDaemon.write_time)
+        self.loop.run_until_complete(daemon.shutdown())
+
+        np.testing.assert_array_equal(np.concatenate(daemon.flushed_tables), np.concatenate(blocks))
+        self.assertNotIn(threading.get_ident(), daemon.writer_threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
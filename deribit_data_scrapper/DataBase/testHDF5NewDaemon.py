@@ -0,0 +1,163 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import tables
+
+from deribit_data_scrapper.DataBase.HDF5NewDaemon import HDF5_LOCK
+from deribit_data_scrapper.DataBase.HDF5NewDaemon import HDF5Daemon
+
+
+class _Scrapper:
+    developConfiguration = {"DATA_MANAGER": {"SHOW_WHEN_DATA_TRANSFERS": False}}
+
+
+class _Subscription:
+    scrapper = _Scrapper()
+    tables_names = ["TEST_TABLE"]
+    number_of_columns = 3
+
+    def create_columns_list(self):
+        return ["CHANGE_ID", "TIMESTAMP_VALUE", "PRICE"]
+
+    def create_record_dtype(self):
+        return np.dtype(
+            [("CHANGE_ID", np.int64), ("TIMESTAMP_VALUE", np.int64), ("PRICE", np.float64)]
+        )
+
+
+def make_configuration(directory: str, **hdf5) -> dict:
+    return {
+        "orderBookScrapper": {"enable_database_record": True},
+        "hdf5": {"hdf5_database_directory": directory, **hdf5},
+        "record_system": {
+            "use_batches_to_record": True,
+            "number_of_tmp_tables": 2,
+            "size_of_tmp_batch_table": 4,
+            "clean_database_at_startup": False,
+        },
+    }
+
+
+def make_block(start: int, number_of_rows: int) -> np.ndarray:
+    return np.array(
+        [[i, 1_700_000_000_000 + i, 100.0 + i] for i in range(start, start + number_of_rows)],
+        dtype=np.float64,
+    )
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        # Let cancelled timers finish
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        self.loop.close()
+        self.directory.cleanup()
+
+    def make_daemon(self, **hdf5) -> HDF5Daemon:
+        daemon = HDF5Daemon(
+            make_configuration(self.directory.name, **hdf5), _Subscription(), self.loop
+        )
+        # Execute connection/validation coroutines scheduled by constructor
+        self.loop.run_until_complete(asyncio.sleep(0))
+        return daemon
+
+    def test_indexes_are_built_by_timer_without_shutdown(self):
+        daemon = self.make_daemon(index_interval=0.05)
+        self.loop.run_until_complete(daemon.add_data(update_line=make_block(0, 8)))
+        self.loop.run_until_complete(asyncio.sleep(0.3))
+
+        with HDF5_LOCK:
+            self.assertTrue(daemon.hdf5_table.cols.TIMESTAMP_VALUE.is_indexed)
+        # Rows appended after index is built are found by indexed query
+        self.loop.run_until_complete(daemon.add_data(update_line=make_block(8, 4)))
+        with HDF5_LOCK:
+            found = daemon.hdf5_table.read_where("TIMESTAMP_VALUE >= 1700000000010")
+        self.assertEqual(found["CHANGE_ID"].tolist(), [10, 11])
+        self.loop.run_until_complete(daemon.shutdown())
+
+    def test_index_timer_is_disabled_by_null_interval(self):
+        daemon = self.make_daemon(index_interval=None)
+        self.loop.run_until_complete(daemon.add_data(update_line=make_block(0, 8)))
+        self.loop.run_until_complete(asyncio.sleep(0.1))
+
+        with HDF5_LOCK:
+            self.assertFalse(daemon.hdf5_table.cols.TIMESTAMP_VALUE.is_indexed)
+        self.loop.run_until_complete(daemon.shutdown())
+        with tables.open_file(
+            os.path.join(self.directory.name, "_Subscription_TEST_TABLE.h5"), mode="r"
+        ) as hdf5_file:
+            self.assertTrue(hdf5_file.root.TEST_TABLE.cols.TIMESTAMP_VALUE.is_indexed)
+            self.assertEqual(hdf5_file.root.TEST_TABLE.nrows, 8)
+
+    def read_written_table(self, daemon: HDF5Daemon) -> tuple:
+        self.loop.run_until_complete(daemon.add_data(update_line=make_block(0, 8)))
+        self.loop.run_until_complete(daemon.shutdown())
+        with tables.open_file(daemon.path_to_hdf5_file, mode="r") as hdf5_file:
+            table = hdf5_file.root.TEST_TABLE
+            return table.filters, table.chunkshape, table.nrows
+
+    def test_new_table_has_configured_filters_and_chunkshape(self):
+        daemon = self.make_daemon(
+            index_interval=None,
+            complib="blosc:zstd",
+            complevel=3,
+            shuffle=False,
+            chunkshape=64,
+            expectedrows=1_000,
+        )
+        filters, chunkshape, rows = self.read_written_table(daemon)
+
+        self.assertEqual(
+            (filters.complib, filters.complevel, filters.shuffle), ("blosc:zstd", 3, False)
+        )
+        self.assertEqual(chunkshape, (64,))
+        self.assertEqual(rows, 8)
+
+    def test_table_is_not_compressed_without_complib(self):
+        daemon = self.make_daemon(index_interval=None)
+        filters, _, rows = self.read_written_table(daemon)
+
+        self.assertEqual(filters.complevel, 0)
+        self.assertEqual(rows, 8)
+
+    def test_blosc2_without_chunkshape_is_warned(self):
+        with self.assertLogs(level="WARNING") as logs:
+            daemon = self.make_daemon(index_interval=None, complib="blosc2:lz4")
+        self.assertTrue(any("Set hdf5.chunkshape" in message for message in logs.output))
+        filters, _, _ = self.read_written_table(daemon)
+
+        self.assertEqual(
+            (filters.complib, filters.complevel, filters.shuffle), ("blosc2:lz4", 5, True)
+        )
+
+    def test_partition_left_open_is_recovered_at_startup(self):
+        daemon = self.make_daemon(rollover_period="day", index_interval=None)
+        self.loop.run_until_complete(daemon.add_data(update_line=make_block(0, 8)))
+        file_name = os.path.basename(daemon.path_to_hdf5_file)
+        # Process is killed: no shutdown, rows of open partition are not saved to manifest
+        with HDF5_LOCK:
+            daemon.hdf5_file.close()
+        daemon._stop_index_worker()
+
+        daemon = self.make_daemon(rollover_period="day", index_interval=None)
+        daemon._stop_index_worker()
+
+        partition = daemon.manifest.partitions[file_name]
+        self.assertTrue(partition["closed"])
+        self.assertTrue(partition["indexed"])
+        self.assertEqual(partition["rows"], 8)
+        self.assertEqual(
+            (partition["min_ts"], partition["max_ts"]),
+            (1_700_000_000_000, 1_700_000_000_007),
+        )
+        self.assertEqual(daemon.manifest.files_between(None, None), [file_name])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from deribit_data_scrapper.DataBase.HDF5PartitionManifest import HDF5PartitionManifest
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("INSTRUMENT_INDEX", np.int8),
+        ("INSTRUMENT_STRIKE", np.float32),
+        ("INSTRUMENT_MATURITY", np.int32),
+        ("INSTRUMENT_TYPE", np.int8),
+        ("TIMESTAMP_VALUE", np.int64),
+    ]
+)
+
+
+def make_records(timestamps: list, strikes: list) -> np.ndarray:
+    records = np.zeros(len(timestamps), dtype=RECORD_DTYPE)
+    records["TIMESTAMP_VALUE"] = timestamps
+    records["INSTRUMENT_STRIKE"] = strikes
+    return records
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "manifest.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_update_keeps_range_rows_and_instruments(self):
+        manifest = HDF5PartitionManifest(self.path)
+        manifest.open_partition("a.h5")
+        for timestamps, strikes in (([30, 10], [1000, 1000]), ([20, 40], [1500, 1000])):
+            records = make_records(timestamps, strikes)
+            manifest.update("a.h5", records, records["TIMESTAMP_VALUE"])
+        manifest.close_partition("a.h5")
+
+        partition = HDF5PartitionManifest(self.path).partitions["a.h5"]
+        self.assertEqual((partition["min_ts"], partition["max_ts"]), (10, 40))
+        self.assertEqual(partition["rows"], 4)
+        self.assertEqual(partition["instruments"], [[0, 1000.0, 0, 0], [0, 1500.0, 0, 0]])
+        self.assertTrue(partition["closed"])
+        self.assertFalse(partition["indexed"])
+
+    def test_files_between_selects_overlapping_partitions(self):
+        manifest = HDF5PartitionManifest(self.path)
+        for file_name, timestamps in (("b.h5", [100, 199]), ("a.h5", [0, 99]), ("c.h5", [200, 299])):
+            manifest.open_partition(file_name)
+            records = make_records(timestamps, [1000, 1000])
+            manifest.update(file_name, records, records["TIMESTAMP_VALUE"])
+        manifest.open_partition("empty.h5")
+
+        self.assertEqual(manifest.files_between(150, 250), ["b.h5", "c.h5"])
+        self.assertEqual(manifest.files_between(None, 50), ["a.h5"])
+        self.assertEqual(manifest.files_between(None, None), ["a.h5", "b.h5", "c.h5"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from deribit_data_scrapper.DataBase.MmapColumnSegment import list_mmap_segments
+from deribit_data_scrapper.DataBase.MmapColumnSegment import read_mmap_segment
+from deribit_data_scrapper.DataBase.MmapDaemon import MmapDaemon
+
+
+class _Scrapper:
+    developConfiguration = {"DATA_MANAGER": {"SHOW_WHEN_DATA_TRANSFERS": False}}
+
+
+class _Subscription:
+    scrapper = _Scrapper()
+    tables_names = ["TEST_TABLE"]
+    number_of_columns = 3
+
+    def create_columns_list(self):
+        return ["CHANGE_ID", "TIMESTAMP_VALUE", "PRICE"]
+
+    def create_record_dtype(self):
+        return np.dtype(
+            [("CHANGE_ID", np.int64), ("TIMESTAMP_VALUE", np.int64), ("PRICE", np.float32)]
+        )
+
+
+def make_configuration(directory: str, chunk_rows: int, segment_max_bytes: int):
+    return {
+        "orderBookScrapper": {"enable_database_record": True},
+        "record_system": {
+            "use_batches_to_record": True,
+            "number_of_tmp_tables": 2,
+            "size_of_tmp_batch_table": 4,
+            "clean_database_at_startup": False,
+        },
+        "mmap": {
+            "mmap_database_directory": directory,
+            "chunk_rows": chunk_rows,
+            "segment_max_bytes": segment_max_bytes,
+        },
+    }
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def make_daemon(self, chunk_rows: int, segment_max_bytes: int) -> MmapDaemon:
+        daemon = MmapDaemon(
+            make_configuration(self.directory, chunk_rows, segment_max_bytes),
+            _Subscription(),
+            self.loop,
+        )
+        # Execute connection/validation coroutines scheduled by constructor
+        self.loop.run_until_complete(asyncio.sleep(0))
+        return daemon
+
+    def test_reader_sees_live_rows_of_growing_segment(self):
+        daemon = self.make_daemon(chunk_rows=3, segment_max_bytes=1 << 20)
+        block = np.column_stack([np.arange(8), np.arange(8) + 1700000000000, np.arange(8) / 2])
+        self.loop.run_until_complete(daemon.add_data(update_line=block))
+
+        segment_path = list_mmap_segments(daemon.dataset_directory)[0]
+        live = read_mmap_segment(segment_path)
+        # Two tables of 4 rows are flushed, files grew to 3 chunks of 3 rows
+        np.testing.assert_array_equal(live["CHANGE_ID"], np.arange(8))
+        np.testing.assert_array_equal(live["PRICE"], (np.arange(8) / 2).astype(np.float32))
+        self.assertEqual(os.path.getsize(os.path.join(segment_path, "CHANGE_ID.col")), 9 * 8)
+
+        self.loop.run_until_complete(daemon.add_data(update_line=block[:2]))
+        self.loop.run_until_complete(daemon.shutdown())
+        sealed = read_mmap_segment(segment_path)
+        self.assertEqual(sealed["TIMESTAMP_VALUE"].shape[0], 10)
+        # Sealed segment is trimmed to rows
+        self.assertEqual(os.path.getsize(os.path.join(segment_path, "CHANGE_ID.col")), 10 * 8)
+
+    def test_segments_are_rotated_by_size(self):
+        # Row is 20 bytes: segment is sealed after every flushed table of 4 rows
+        daemon = self.make_daemon(chunk_rows=16, segment_max_bytes=80)
+        block = np.column_stack([np.arange(12), np.arange(12), np.arange(12)])
+        self.loop.run_until_complete(daemon.add_data(update_line=block))
+        self.loop.run_until_complete(daemon.shutdown())
+
+        segments = list_mmap_segments(daemon.dataset_directory)
+        self.assertEqual(len(segments), 3)
+        np.testing.assert_array_equal(
+            np.concatenate([read_mmap_segment(path)["CHANGE_ID"] for path in segments]),
+            np.arange(12),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
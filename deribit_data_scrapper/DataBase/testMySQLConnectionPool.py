@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector as connector
+
+from deribit_data_scrapper.DataBase.MySQLConnectionPool import MySQLConnectionPool
+
+
+class _Connection:
+    """Connection that fails first `failures` operations."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.closed = False
+        self.rolled_back = False
+
+    def run(self):
+        if self.failures > 0:
+            self.failures -= 1
+            raise connector.errors.OperationalError("Lost connection", errno=2013)
+        return 1
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class _TestPool(MySQLConnectionPool):
+    def __init__(self, configuration: dict, failures: int = 0):
+        super().__init__(configuration)
+        self.failures = failures
+        self.created = []
+
+    def _create_connection(self):
+        _connection = _Connection(failures=self.failures)
+        self.failures = 0
+        self.created.append(_connection)
+        return _connection
+
+
+def make_configuration(database: str = "TestDataBase") -> dict:
+    return {
+        "host": "localhost",
+        "user": "root",
+        "password": "password",
+        "database": database,
+        "reconnect_max_attempts": 3,
+        "reconnect_wait_time": 0,
+        "pool_size": 2,
+    }
+
+
+class MyTestCase(unittest.TestCase):
+    def test_pool_is_shared_by_database(self):
+        first = MySQLConnectionPool.get_pool(make_configuration())
+        self.assertIs(first, MySQLConnectionPool.get_pool(make_configuration()))
+        self.assertIsNot(
+            first, MySQLConnectionPool.get_pool(make_configuration("OtherDataBase"))
+        )
+        MySQLConnectionPool.close_all_pools()
+
+    def test_connections_are_reused_up_to_pool_size(self):
+        pool = _TestPool(make_configuration())
+        first, second = pool.acquire(), pool.acquire()
+        self.assertIsNot(first, second)
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(len(pool.created), 2)
+
+    def test_broken_connection_is_replaced_and_operation_repeated(self):
+        pool = _TestPool(make_configuration(), failures=1)
+        result = asyncio.run(pool.execute(lambda connection: connection.run()))
+
+        self.assertEqual(result, 1)
+        self.assertEqual(len(pool.created), 2)
+        self.assertTrue(pool.created[0].rolled_back)
+        self.assertTrue(pool.created[0].closed)
+        self.assertEqual(pool._number_of_connections, 1)
+
+    def test_raise_after_max_attempts(self):
+        pool = _TestPool(make_configuration())
+
+        def _always_fail(connection):
+            raise connector.errors.InterfaceError("Can't connect to MySQL server", errno=2003)
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(pool.execute(_always_fail))
+        self.assertEqual(len(pool.created), 3)
+        self.assertEqual(pool._number_of_connections, 0)
+
+    def test_statement_error_is_raised_without_retry(self):
+        pool = _TestPool(make_configuration())
+
+        def _bad_statement(connection):
+            raise connector.errors.ProgrammingError("You have an error in your SQL syntax", errno=1064)
+
+        with self.assertRaises(connector.errors.ProgrammingError):
+            asyncio.run(pool.execute(_bad_statement))
+        with self.assertRaises(connector.errors.ProgrammingError):
+            pool.execute_blocking(_bad_statement)
+        # Connection is healthy: rolled back and returned to pool
+        self.assertEqual(len(pool.created), 1)
+        self.assertTrue(pool.created[0].rolled_back)
+        self.assertFalse(pool.created[0].closed)
+        self.assertEqual(pool._number_of_connections, 1)
+
+    def test_discarded_connection_wakes_waiting_caller(self):
+        configuration = make_configuration()
+        configuration["pool_size"] = 1
+        pool = _TestPool(configuration)
+        borrowed = pool.acquire()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Writer thread waits for the only connection
+            waiting = executor.submit(pool.acquire)
+            time.sleep(0.05)
+            self.assertFalse(waiting.done())
+            # Connection of other caller is broken during outage
+            pool._discard(borrowed)
+            self.assertIsNot(waiting.result(timeout=5), borrowed)
+        self.assertEqual(len(pool.created), 2)
+        self.assertEqual(pool._number_of_connections, 1)
+
+    def test_event_loop_is_not_blocked_while_pool_is_full(self):
+        configuration = make_configuration()
+        configuration["pool_size"] = 1
+        pool = _TestPool(configuration)
+        borrowed = pool.acquire()
+        ticks = []
+
+        async def _run():
+            execution = asyncio.ensure_future(pool.execute(lambda connection: connection.run()))
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+                ticks.append(execution.done())
+            # Other thread returns connection
+            threading.Thread(target=pool.release, args=(borrowed,)).start()
+            return await asyncio.wait_for(execution, timeout=5)
+
+        self.assertEqual(asyncio.run(_run()), 1)
+        self.assertEqual(ticks, [False] * 5)
+        self.assertEqual(len(pool.created), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,385 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+from mysql import connector
+
+from deribit_data_scrapper.DataBase.MySQLConnectionPool import MySQLConnectionPool
+from deribit_data_scrapper.DataBase.MySQLNewDaemon import MySqlDaemon
+from deribit_data_scrapper.Subsciption.OrderBookSubscriptionUnlimitedDepth import (
+    OrderBookSubscriptionUNLIMITED,
+)
+
+# Simulated time of large batch commit (in sec)
+COMMIT_TIME = 0.3
+# Period of latency probe callback (in sec)
+PROBE_INTERVAL = 0.005
+
+
+class _Cursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query):
+        self.connection.queries.append(query)
+
+    def executemany(self, query, parameters):
+        if self.connection.is_down:
+            raise connector.errors.OperationalError(
+                "Lost connection to MySQL server", errno=2013
+            )
+        if any(row[0] in self.connection.rejected_values for row in parameters):
+            raise connector.errors.IntegrityError("Duplicate entry", errno=1062)
+        self.connection.rows.extend(parameters)
+        self.connection.statements.append((query, len(parameters)))
+
+    def close(self):
+        pass
+
+
+class _Connection:
+    """Connection with slow commit."""
+
+    def __init__(self):
+        self.rows = []
+        self.statements = []
+        # Queries without parameters (values insert mode)
+        self.queries = []
+        self.commit_time = COMMIT_TIME
+        self.commits = 0
+        # Simulated database outage
+        self.is_down = False
+        # Rows with these first values are rejected by database
+        self.rejected_values = set()
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        time.sleep(self.commit_time)
+        self.commits += 1
+
+    def is_connected(self):
+        return True
+
+    def rollback(self):
+        pass
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass
+
+
+class _TestPool(MySQLConnectionPool):
+    def __init__(self, configuration: dict):
+        super().__init__(configuration)
+        self.fake_connection = _Connection()
+
+    def _create_connection(self):
+        return self.fake_connection
+
+
+class _Instrument:
+    def get_fields(self):
+        return 0, 3000.0, 1700000000, 1
+
+
+class _Scrapper:
+    developConfiguration = {
+        "DATA_MANAGER": {"SHOW_WHEN_DATA_TRANSFERS": False},
+        "MY_SQL_DAEMON": {"SHOW_QUERY_FOR_POST": False, "SHOW_QUERY_FOR_GET": False},
+    }
+    configuration = {
+        "user_data": {"test_net": {"client_id": None, "client_secret": None}},
+        "orderBookScrapper": {"test_net": True},
+    }
+    instrument_name_instrument_id_map = {"ETH-PERPETUAL": _Instrument()}
+
+
+def book_notification(notification_type: str, change_id: int, bids: list, asks: list) -> dict:
+    return {
+        "method": "subscription",
+        "params": {
+            "channel": "book.ETH-PERPETUAL.100ms",
+            "data": {
+                "type": notification_type,
+                "instrument_name": "ETH-PERPETUAL",
+                "timestamp": 1700000000000 + change_id,
+                "change_id": change_id,
+                "bids": bids,
+                "asks": asks,
+            },
+        },
+    }
+
+
+class _Subscription:
+    scrapper = _Scrapper()
+    tables_names = ["TEST_TABLE"]
+    number_of_columns = 3
+    tag_of_data = "LIMITED"
+
+    def create_columns_list(self):
+        return ["CHANGE_ID", "TIMESTAMP_VALUE", "PRICE"]
+
+    def create_record_dtype(self):
+        return np.dtype(
+            [("CHANGE_ID", np.int64), ("TIMESTAMP_VALUE", np.int64), ("PRICE", np.float64)]
+        )
+
+    def record_to_database(self, record_dataframe, tag_of_data=None):
+        return record_dataframe.copy()
+
+
+def make_configuration(non_blocking: bool, spill_directory: str = None, **mysql) -> dict:
+    configuration = {
+        "orderBookScrapper": {"enable_database_record": False},
+        "record_system": {
+            "use_batches_to_record": True,
+            "number_of_tmp_tables": 2,
+            "size_of_tmp_batch_table": 1000,
+            "clean_database_at_startup": False,
+            "use_spill_buffer": spill_directory is not None,
+            "spill_directory": spill_directory,
+            "spill_max_bytes": 2 * 1000 * 24,
+            "spill_retry_wait_time": 0.05,
+            "spill_retry_max_wait_time": 0.1,
+        },
+        "mysql": {
+            "host": "localhost",
+            "user": "root",
+            "password": "password",
+            "database": "TestDataBase",
+            "reconnect_max_attempts": 1,
+            "reconnect_wait_time": 0,
+            "pool_size": 1,
+            "non_blocking": non_blocking,
+        },
+    }
+    configuration["mysql"].update(mysql)
+    return configuration
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        MySQLConnectionPool.close_all_pools()
+        self.loop.close()
+
+    def make_daemon(
+        self, non_blocking: bool, subscription=None, spill_directory: str = None, **mysql
+    ) -> MySqlDaemon:
+        configuration = make_configuration(non_blocking, spill_directory, **mysql)
+        self.pool = _TestPool(configuration["mysql"])
+        MySQLConnectionPool._pools[("localhost", "root", "TestDataBase")] = self.pool
+        daemon = MySqlDaemon(
+            configuration,
+            subscription if subscription is not None else _Subscription(),
+            self.loop,
+        )
+        # Execute connection/validation coroutines scheduled by constructor
+        self.loop.run_until_complete(asyncio.sleep(0))
+        return daemon
+
+    async def _probe_latency(self, duration: float) -> float:
+        """
+        Max delay of periodic callback dispatch during duration.
+        """
+        _max_delay = 0.0
+        _end = self.loop.time() + duration
+        while self.loop.time() < _end:
+            _expected = self.loop.time() + PROBE_INTERVAL
+            await asyncio.sleep(PROBE_INTERVAL)
+            _max_delay = max(_max_delay, self.loop.time() - _expected)
+        return _max_delay
+
+    def measure_latency_during_commit(self, non_blocking: bool) -> float:
+        daemon = self.make_daemon(non_blocking=non_blocking)
+        block = np.ones((1000, 3), dtype=np.float64)
+
+        async def _flush_and_probe():
+            _probe = asyncio.ensure_future(self._probe_latency(2 * COMMIT_TIME))
+            # Let probe start before table is flushed
+            await asyncio.sleep(PROBE_INTERVAL)
+            await daemon.add_data(update_line=block)
+            return await _probe
+
+        max_delay = self.loop.run_until_complete(_flush_and_probe())
+        self.loop.run_until_complete(daemon.shutdown())
+        self.assertEqual(len(self.pool.fake_connection.rows), 1000)
+        return max_delay
+
+    def test_blocking_commit_stalls_event_loop(self):
+        self.assertGreaterEqual(
+            self.measure_latency_during_commit(non_blocking=False), COMMIT_TIME * 0.9
+        )
+
+    def test_non_blocking_commit_keeps_latency_flat(self):
+        self.assertLess(
+            self.measure_latency_during_commit(non_blocking=True), COMMIT_TIME / 3
+        )
+
+    def test_ring_is_not_overwritten_while_table_is_committed(self):
+        daemon = self.make_daemon(non_blocking=True)
+        blocks = [np.full((1000, 3), i, dtype=np.float64) for i in range(4)]
+
+        async def _concurrent_ingestion():
+            # Every block fills table; ring has 2 tables, so 3rd and 4th wait for commits
+            await asyncio.gather(*(daemon.add_data(update_line=b) for b in blocks))
+
+        self.loop.run_until_complete(_concurrent_ingestion())
+        self.loop.run_until_complete(daemon.shutdown())
+        # Producers waiting for the same table resume in any order, every row is written once
+        written = np.array(self.pool.fake_connection.rows, dtype=np.float64)
+        np.testing.assert_array_equal(
+            np.sort(written[:, 0]), np.concatenate(blocks)[:, 0]
+        )
+        self.assertEqual(len(np.unique(written, axis=0)), len(blocks))
+
+    def test_full_book_is_written_to_snapshot_and_levels_tables_in_one_transaction(self):
+        subscription = OrderBookSubscriptionUNLIMITED(scrapper=_Scrapper())
+        daemon = self.make_daemon(non_blocking=True, subscription=subscription)
+        subscription.plug_in_record_system(database=daemon)
+        self.pool.fake_connection.commit_time = 0
+        notifications = [
+            book_notification(
+                "snapshot", 1, [["new", 99.0, 1.0], ["new", 100.0, 2.0]], [["new", 101.0, 3.0]]
+            ),
+            book_notification("change", 2, [["delete", 100.0, 0.0]], [["new", 102.0, 4.0]]),
+        ]
+        for notification in notifications:
+            self.loop.run_until_complete(subscription.process_response_from_server(notification))
+        self.loop.run_until_complete(daemon.shutdown())
+
+        connection = self.pool.fake_connection
+        self.assertEqual(connection.commits, 1)
+        self.assertEqual(
+            [(query.split(" ")[2], rows) for query, rows in connection.statements],
+            [("ORDER_BOOK_SNAPSHOTS", 2), ("ORDER_BOOK_LEVELS", 5)],
+        )
+        self.assertTrue(all("ON DUPLICATE KEY UPDATE" in q for q, _ in connection.statements))
+        first_snapshot, second_snapshot = connection.rows[:2]
+        self.assertEqual(second_snapshot[0], first_snapshot[0] + 1)
+        self.assertEqual(second_snapshot[1], 2)
+        # Change notification is keyed to full snapshot
+        self.assertEqual(second_snapshot[-1], first_snapshot[0])
+        # Changed levels of second snapshot: (SNAPSHOT_ID, SIDE, LEVEL, PRICE, AMOUNT)
+        self.assertEqual(
+            connection.rows[5:],
+            [
+                (second_snapshot[0], 0, 0, 100.0, 0.0),
+                (second_snapshot[0], 1, 0, 102.0, 4.0),
+            ],
+        )
+
+    def write_batch(self, block: np.ndarray, **mysql) -> _Connection:
+        daemon = self.make_daemon(non_blocking=True, **mysql)
+        connection = self.pool.fake_connection
+        connection.commit_time = 0
+        self.loop.run_until_complete(daemon.add_data(update_line=block))
+        self.loop.run_until_complete(daemon.shutdown())
+        MySQLConnectionPool.close_all_pools()
+        return connection
+
+    def test_executemany_chunks_have_same_rows_as_values_mode(self):
+        block = np.arange(1000 * 3, dtype=np.float64).reshape(1000, 3)
+
+        executemany = self.write_batch(block, executemany_chunk_size=300)
+        values = self.write_batch(block, insert_mode="values")
+
+        self.assertEqual([rows for _, rows in executemany.statements], [300, 300, 300, 100])
+        self.assertEqual(executemany.commits, 1)
+        values_queries = [q for q in values.queries if q.startswith("INSERT INTO TEST_TABLE")]
+        self.assertEqual(len(values_queries), 1)
+        self.assertEqual(values_queries[0].count("),(") + 1, len(executemany.rows))
+        np.testing.assert_array_equal(np.array(executemany.rows), block)
+
+    def test_outage_spills_batches_and_drainer_replays_them_in_order(self):
+        spill_directory = tempfile.mkdtemp()
+        daemon = self.make_daemon(non_blocking=True, spill_directory=spill_directory)
+        connection = self.pool.fake_connection
+        connection.commit_time = 0
+        blocks = [np.full((1000, 3), i, dtype=np.float64) for i in range(4)]
+
+        async def _ingest(blocks_to_add):
+            for block in blocks_to_add:
+                await daemon.add_data(update_line=block)
+
+        connection.is_down = True
+        # Third batch does not fit spill_max_bytes (2 batches) and is dropped
+        self.loop.run_until_complete(_ingest(blocks[:3]))
+        statistics = daemon.spill_statistics
+        self.assertEqual(
+            (statistics.spilled_batches, statistics.dropped_batches, statistics.pending_segments),
+            (2, 1, 2),
+        )
+        self.assertEqual(connection.rows, [])
+
+        connection.is_down = False
+        # Background drainer replays spilled batches without new data
+        self.loop.run_until_complete(asyncio.sleep(0.3))
+        self.assertEqual(daemon.spill_statistics.replayed_batches, 2)
+        self.loop.run_until_complete(_ingest(blocks[3:]))
+        self.loop.run_until_complete(daemon.shutdown())
+        # Let cancelled drainer finish
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+        written = np.array(connection.rows, dtype=np.float64)
+        np.testing.assert_array_equal(
+            written[:, 0], np.concatenate([blocks[0], blocks[1], blocks[3]])[:, 0]
+        )
+        with open(daemon.spill_buffer.metrics_path) as metrics_file:
+            metrics = json.load(metrics_file)
+        self.assertEqual(
+            (metrics["replayed_rows"], metrics["dropped_rows"], metrics["pending_bytes"]),
+            (2000, 1000, 0),
+        )
+
+    def test_rejected_batch_is_raised_and_rejected_spill_segment_is_quarantined(self):
+        spill_directory = tempfile.mkdtemp()
+        daemon = self.make_daemon(non_blocking=True, spill_directory=spill_directory)
+        connection = self.pool.fake_connection
+        connection.commit_time = 0
+        blocks = [np.full((1000, 3), i, dtype=np.float64) for i in range(4)]
+
+        connection.is_down = True
+        for block in blocks[:2]:
+            self.loop.run_until_complete(daemon.add_data(update_line=block))
+        # First spilled batch is rejected at replay, second one is still replayed
+        connection.rejected_values.add(0)
+        connection.is_down = False
+        self.loop.run_until_complete(asyncio.sleep(0.3))
+        statistics = daemon.spill_statistics
+        self.assertEqual(
+            (statistics.quarantined_batches, statistics.replayed_batches, statistics.pending_segments),
+            (1, 1, 0),
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(spill_directory, "_Subscription_TEST_TABLE_000000000000.quarantine"))
+        )
+
+        self.loop.run_until_complete(daemon.add_data(update_line=blocks[2]))
+        # Rejected batch is not retried and never spilled
+        connection.rejected_values.add(3)
+        with self.assertRaises(connector.errors.IntegrityError):
+            self.loop.run_until_complete(daemon.add_data(update_line=blocks[3]))
+        self.assertEqual(daemon.spill_statistics.spilled_batches, 2)
+        self.assertEqual(self.pool._number_of_connections, 1)
+        self.loop.run_until_complete(daemon.shutdown())
+        # Let cancelled drainer finish
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+        written = np.array(connection.rows, dtype=np.float64)
+        np.testing.assert_array_equal(written[:, 0], np.concatenate(blocks[1:3])[:, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+try:
+    import pyarrow.parquet as pq
+
+    from deribit_data_scrapper.DataBase.ParquetDaemon import ParquetDaemon
+except ImportError:
+    # pyarrow is needed only for parquet record system
+    pq = None
+
+
+class _Scrapper:
+    developConfiguration = {"DATA_MANAGER": {"SHOW_WHEN_DATA_TRANSFERS": False}}
+
+
+class _Subscription:
+    scrapper = _Scrapper()
+    tables_names = ["TEST_TABLE"]
+    number_of_columns = 4
+
+    def create_columns_list(self):
+        return ["CHANGE_ID", "INSTRUMENT_INDEX", "TIMESTAMP_VALUE", "PRICE"]
+
+    def create_record_dtype(self):
+        return np.dtype(
+            [
+                ("CHANGE_ID", np.int64),
+                ("INSTRUMENT_INDEX", np.int8),
+                ("TIMESTAMP_VALUE", np.int64),
+                ("PRICE", np.float64),
+            ]
+        )
+
+
+def make_configuration(directory: str, **parquet) -> dict:
+    return {
+        "orderBookScrapper": {"enable_database_record": True},
+        "parquet": {"parquet_database_directory": directory, **parquet},
+        "record_system": {
+            "use_batches_to_record": True,
+            "number_of_tmp_tables": 2,
+            "size_of_tmp_batch_table": 4,
+            "clean_database_at_startup": False,
+        },
+    }
+
+
+def make_block(start: int, number_of_rows: int) -> np.ndarray:
+    return np.array(
+        [[i, 1, 1_700_000_000_000 + i, 100.0 + i] for i in range(start, start + number_of_rows)],
+        dtype=np.float64,
+    )
+
+
+@unittest.skipIf(pq is None, "pyarrow is not installed")
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        # Let cancelled timers finish
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        self.loop.close()
+        self.directory.cleanup()
+
+    def make_daemon(self, **parquet) -> "ParquetDaemon":
+        daemon = ParquetDaemon(
+            make_configuration(self.directory.name, **parquet), _Subscription(), self.loop
+        )
+        # Execute connection/validation coroutines scheduled by constructor
+        self.loop.run_until_complete(asyncio.sleep(0))
+        return daemon
+
+    def partition_files(self, daemon) -> list:
+        return sorted(
+            os.path.join(directory, file)
+            for directory, _, files in os.walk(daemon.dataset_directory)
+            for file in files
+        )
+
+    def test_open_file_is_hidden_from_dataset_readers(self):
+        daemon = self.make_daemon(max_file_age=None)
+        self.loop.run_until_complete(daemon.add_data(update_line=make_block(0, 4)))
+
+        (path,) = self.partition_files(daemon)
+        self.assertTrue(os.path.basename(path).startswith("."))
+        self.assertEqual(pq.read_table(daemon.dataset_directory).num_rows, 0)
+
+        self.loop.run_until_complete(daemon.shutdown())
+        (path,) = self.partition_files(daemon)
+        self.assertEqual(os.path.basename(path), "part-00000.parquet")
+        self.assertEqual(pq.read_table(daemon.dataset_directory).num_rows, 4)
+
+    def test_file_is_closed_after_row_groups_per_file(self):
+        daemon = self.make_daemon(max_file_age=None, row_groups_per_file=2, row_group_rows=4)
+        self.loop.run_until_complete(daemon.add_data(update_line=make_block(0, 12)))
+
+        # 3 flushed batches: first file closed after 2 row groups, third batch in next file
+        self.assertEqual(pq.read_table(daemon.dataset_directory).num_rows, 8)
+        self.assertEqual(len(self.partition_files(daemon)), 2)
+        self.loop.run_until_complete(daemon.shutdown())
+
+    def test_several_batches_are_written_to_one_row_group(self):
+        daemon = self.make_daemon(max_file_age=None, row_group_rows=8)
+        self.loop.run_until_complete(daemon.add_data(update_line=make_block(0, 12)))
+        self.loop.run_until_complete(daemon.shutdown())
+
+        (path,) = self.partition_files(daemon)
+        metadata = pq.ParquetFile(path).metadata
+        # 3 batches of 4 rows: row group of 8 rows, the rest is written at close
+        self.assertEqual(
+            [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)], [8, 4]
+        )
+        self.assertEqual(pq.read_table(path).column("CHANGE_ID").to_pylist(), list(range(12)))
+
+    def test_idle_file_is_closed_by_age_timer(self):
+        daemon = self.make_daemon(max_file_age=0.1)
+        self.loop.run_until_complete(daemon.add_data(update_line=make_block(0, 4)))
+        self.loop.run_until_complete(asyncio.sleep(0.3))
+
+        # Readable while daemon still works, no shutdown
+        table = pq.read_table(daemon.dataset_directory)
+        self.assertEqual(sorted(table.column("CHANGE_ID").to_pylist()), [0, 1, 2, 3])
+        self.loop.run_until_complete(daemon.shutdown())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import numpy as np
+
+from deribit_data_scrapper.DataBase.SQLiteDaemon import SQLiteDaemon
+from deribit_data_scrapper.Subsciption.OrderBookSubscriptionUnlimitedDepth import (
+    OrderBookSubscriptionUNLIMITED,
+)
+
+
+class _Instrument:
+    def get_fields(self):
+        return 0, 3000.0, 1700000000, 1
+
+
+class _Scrapper:
+    developConfiguration = {"DATA_MANAGER": {"SHOW_WHEN_DATA_TRANSFERS": False}}
+    configuration = {
+        "user_data": {"test_net": {"client_id": None, "client_secret": None}},
+        "orderBookScrapper": {"test_net": True},
+    }
+    instrument_name_instrument_id_map = {"ETH-PERPETUAL": _Instrument()}
+
+
+class _Subscription:
+    scrapper = _Scrapper()
+    tables_names = ["TEST_TABLE"]
+    number_of_columns = 3
+    tag_of_data = "LIMITED"
+    tables_primary_keys = None
+
+    def create_columns_list(self):
+        return ["CHANGE_ID", "TIMESTAMP_VALUE", "PRICE"]
+
+    def create_record_dtype(self):
+        return np.dtype(
+            [("CHANGE_ID", np.int64), ("TIMESTAMP_VALUE", np.int64), ("PRICE", np.float64)]
+        )
+
+
+def book_notification(notification_type: str, change_id: int, bids: list, asks: list) -> dict:
+    return {
+        "method": "subscription",
+        "params": {
+            "channel": "book.ETH-PERPETUAL.100ms",
+            "data": {
+                "type": notification_type,
+                "instrument_name": "ETH-PERPETUAL",
+                "timestamp": 1700000000000 + change_id,
+                "change_id": change_id,
+                "bids": bids,
+                "asks": asks,
+            },
+        },
+    }
+
+
+def make_configuration(database_path: str, size_of_tmp_batch_table: int, spill_directory: str = None):
+    return {
+        "orderBookScrapper": {"enable_database_record": True},
+        "record_system": {
+            "use_batches_to_record": True,
+            "number_of_tmp_tables": 2,
+            "size_of_tmp_batch_table": size_of_tmp_batch_table,
+            "clean_database_at_startup": False,
+            "use_spill_buffer": spill_directory is not None,
+            "spill_directory": spill_directory,
+            "spill_retry_wait_time": 0.05,
+            "spill_retry_max_wait_time": 0.1,
+        },
+        "sqlite": {"sqlite_database_path": database_path, "busy_timeout": 0},
+    }
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.directory = tempfile.mkdtemp()
+        self.database_path = os.path.join(self.directory, "data", "deribit.db")
+
+    def tearDown(self):
+        self.loop.close()
+
+    def make_daemon(self, subscription, size_of_tmp_batch_table: int, spill_directory: str = None):
+        daemon = SQLiteDaemon(
+            make_configuration(self.database_path, size_of_tmp_batch_table, spill_directory),
+            subscription,
+            self.loop,
+        )
+        # Execute connection/validation coroutines scheduled by constructor
+        self.loop.run_until_complete(asyncio.sleep(0))
+        return daemon
+
+    def read_table(self, query: str) -> list:
+        with sqlite3.connect(self.database_path) as connection:
+            return connection.execute(query).fetchall()
+
+    def test_batches_are_written_in_wal_mode(self):
+        daemon = self.make_daemon(_Subscription(), size_of_tmp_batch_table=4)
+        block = np.column_stack([np.arange(10), np.arange(10) + 1700000000000, np.arange(10) / 2])
+        self.loop.run_until_complete(daemon.add_data(update_line=block))
+        # Two full tables are committed, the rest is in current table
+        self.assertEqual(len(self.read_table("SELECT * FROM TEST_TABLE")), 8)
+        self.loop.run_until_complete(daemon.shutdown())
+
+        self.assertEqual(self.read_table("PRAGMA journal_mode"), [("wal",)])
+        self.assertEqual(
+            self.read_table("SELECT CHANGE_ID, TIMESTAMP_VALUE, PRICE FROM TEST_TABLE ORDER BY rowid"),
+            [tuple(row) for row in block.tolist()],
+        )
+        self.assertIn(
+            ("TEST_TABLE_TIME_INDEX",),
+            self.read_table("SELECT name FROM sqlite_master WHERE type = 'index'"),
+        )
+
+    def test_full_book_snapshot_split_between_batches_is_written_once(self):
+        subscription = OrderBookSubscriptionUNLIMITED(scrapper=_Scrapper())
+        # Table of 2 rows: 3 levels of snapshot go to two batches
+        daemon = self.make_daemon(subscription, size_of_tmp_batch_table=2)
+        subscription.plug_in_record_system(database=daemon)
+        notification = book_notification(
+            "snapshot", 1, [["new", 99.0, 1.0], ["new", 100.0, 2.0]], [["new", 101.0, 3.0]]
+        )
+        self.loop.run_until_complete(subscription.process_response_from_server(notification))
+        self.loop.run_until_complete(daemon.shutdown())
+
+        self.assertEqual(
+            self.read_table("SELECT CHANGE_ID, TIMESTAMP_VALUE FROM ORDER_BOOK_SNAPSHOTS"),
+            [(1, 1700000000001)],
+        )
+        self.assertEqual(
+            self.read_table("SELECT SIDE, LEVEL, PRICE, AMOUNT FROM ORDER_BOOK_LEVELS ORDER BY SIDE, LEVEL"),
+            [(0, 0, 100.0, 2.0), (0, 1, 99.0, 1.0), (1, 0, 101.0, 3.0)],
+        )
+
+    def test_locked_database_spills_and_drains(self):
+        daemon = self.make_daemon(
+            _Subscription(), size_of_tmp_batch_table=2, spill_directory=os.path.join(self.directory, "spill")
+        )
+        # Other writer holds write lock
+        lock_connection = sqlite3.connect(self.database_path, isolation_level=None)
+        lock_connection.execute("BEGIN IMMEDIATE")
+        self.loop.run_until_complete(daemon.add_data(update_line=np.ones((2, 3))))
+        self.assertEqual(daemon.spill_statistics.spilled_batches, 1)
+
+        lock_connection.execute("COMMIT")
+        lock_connection.close()
+        self.loop.run_until_complete(asyncio.sleep(0.3))
+        self.loop.run_until_complete(daemon.shutdown())
+        # Let cancelled drainer finish
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+        self.assertEqual(daemon.spill_statistics.replayed_rows, 2)
+        self.assertEqual(len(self.read_table("SELECT * FROM TEST_TABLE")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+
+from deribit_data_scrapper.DataBase.SpillBuffer import SpillBuffer
+from deribit_data_scrapper.DataBase.WriteAheadJournal import WriteAheadJournal
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_journal_and_spill_buffer_find_only_own_segments(self):
+        directory = os.path.join(self.directory.name, "segments")
+        journal = WriteAheadJournal(directory, name="Daemon_TABLE", row_nbytes=8)
+        journal.close()
+        for file_name in (
+            "Daemon_TABLE_000000000010.wal",
+            "Daemon_TABLE_000000000002.wal",
+            "Daemon_TABLE_000000000005.spill",
+            "Daemon_TABLE_000000000006.quarantine",
+            "Other_TABLE_000000000001.spill",
+            "Daemon_TABLE_000000000007.spill.tmp",
+        ):
+            open(os.path.join(directory, file_name), "wb").close()
+
+        journal = WriteAheadJournal(directory, name="Daemon_TABLE", row_nbytes=8)
+        self.assertEqual(journal.pending_segments, [2, 10])
+        self.assertEqual(journal.current_segment_id, 11)
+        journal.close()
+        spill_buffer = SpillBuffer(directory, name="Daemon_TABLE", max_bytes=1024)
+        self.assertEqual(spill_buffer.pending_segments, [5])
+        self.assertEqual(
+            spill_buffer.segment_path(5), os.path.join(directory, "Daemon_TABLE_000000000005.spill")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
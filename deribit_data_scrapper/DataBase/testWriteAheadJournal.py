@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from deribit_data_scrapper.DataBase.WriteAheadJournal import WriteAheadJournal
+
+ROW_NBYTES = 16
+
+
+def make_rows(start: int, number_of_rows: int) -> np.ndarray:
+    return np.arange(start * 2, (start + number_of_rows) * 2, dtype=np.int64).reshape(-1, 2)
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_journal(self) -> WriteAheadJournal:
+        return WriteAheadJournal(
+            self.directory.name, name="Daemon_TABLE", row_nbytes=ROW_NBYTES, fsync_interval=60
+        )
+
+    def read_rows(self, journal: WriteAheadJournal, segment_id: int) -> np.ndarray:
+        return np.frombuffer(journal.read_segment(segment_id), dtype=np.int64).reshape(-1, 2)
+
+    def test_rows_of_killed_process_are_replayed(self):
+        journal = self.make_journal()
+        journal.append(make_rows(0, 3))
+        first_segment = journal.rotate()
+        journal.append(make_rows(3, 2))
+        # Process is killed: no sync, no close. Rows are already in page cache
+        self.addCleanup(journal._current_file.close)
+
+        journal = self.make_journal()
+        self.assertEqual(journal.pending_segments, [0, 1])
+        np.testing.assert_array_equal(self.read_rows(journal, first_segment), make_rows(0, 3))
+        np.testing.assert_array_equal(self.read_rows(journal, 1), make_rows(3, 2))
+        journal.close()
+
+    def test_acknowledge_removes_segment(self):
+        journal = self.make_journal()
+        journal.append(make_rows(0, 3))
+        segment_id = journal.rotate()
+        journal.acknowledge(segment_id)
+        journal.close()
+
+        self.assertFalse(os.path.exists(journal.segment_path(segment_id)))
+        self.assertEqual(self.make_journal().pending_segments, [])
+
+    def test_incomplete_tail_record_is_dropped(self):
+        journal = self.make_journal()
+        journal.append(make_rows(0, 3))
+        segment_id = journal.rotate()
+        journal.close()
+        # Crash in the middle of record
+        path = journal.segment_path(segment_id)
+        os.truncate(path, os.path.getsize(path) - 5)
+
+        journal = self.make_journal()
+        np.testing.assert_array_equal(self.read_rows(journal, segment_id), make_rows(0, 2))
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
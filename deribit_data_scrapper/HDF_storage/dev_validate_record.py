@@ -1,7 +1,10 @@
 import pandas as pd
+import tables
 
 
-df = pd.read_hdf("OrderBookSubscriptionCONSTANT_TABLE_DEPTH_10.h5")
+# HDF5Daemon with hdf5.writer = pytables stores plain PyTables table (use pd.read_hdf for hdf5.writer = pandas)
+with tables.open_file("OrderBookSubscriptionCONSTANT_TABLE_DEPTH_10.h5", mode="r") as hdf5_file:
+    df = pd.DataFrame(hdf5_file.root.TABLE_DEPTH_10.read())
 print(df.columns)
 print(df)
-print(df["TIMESTAMP_VALUE"])
\ No newline at end of file
+print(df["TIMESTAMP_VALUE"])
@@ -125,7 +125,11 @@ class AbstractInstrumentInfo(ABC):
             _type = self.instrument_type.number
         else:
             _type = -1
-        return [self.get_int_instrument_index, _strike, _maturity, _type]
+        if self.get_int_instrument_index is not None:
+            _index = self.get_int_instrument_index
+        else:
+            _index = -1
+        return [_index, _strike, _maturity, _type]
 
     @property
     def instrument_strike(self):
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Awaitable
+from typing import Deque
+from typing import Optional
+
+import websockets
+from websockets.client import WebSocketClientProtocol
+
+from deribit_data_scrapper.Scrapper.TradingInterface import DeribitClient
+from deribit_data_scrapper.Utils import Currency
+
+# Same delay as reconnect of WebSocketApp.run_forever in DeribitClient
+RECONNECT_DELAY = 20
+
+
+class DeribitAsyncClient(DeribitClient):
+    """
+    DeribitClient на одном asyncio event loop (loopB). Чтение websocket (websockets), декодирование
+    и обработка подписками выполняются в том же loop, без потока websocket-client
+    и без run_coroutine_threadsafe на каждое сообщение: обработчики сообщения выполняются
+    до чтения следующего кадра, поэтому порядок уведомлений сохраняется.
+    Подписки (AbstractSubscription), стратегии (AbstractStrategy), record system и менеджеры те же, что у DeribitClient.
+    Запуск: await client.run_async() внутри loopB, либо client.start() - loopB работает в потоке клиента.
+    """
+
+    websocket: Optional[WebSocketClientProtocol]
+    reconnect_delay: float = RECONNECT_DELAY
+    _dispatched: Deque[Awaitable]
+    _run_task: Optional[asyncio.Task] = None
+
+    def __init__(
+        self,
+        cfg,
+        cfg_path: dict,
+        dev_cfg: dict,
+        loopB,
+        client_currency: Currency,
+        instruments_listed: list = None,
+    ):
+        super().__init__(
+            cfg=cfg,
+            cfg_path=cfg_path,
+            dev_cfg=dev_cfg,
+            loopB=loopB,
+            client_currency=client_currency,
+            instruments_listed=instruments_listed,
+        )
+        self._dispatched = deque()
+
+    def run(self):
+        """
+        Thread entry point: event loop of client runs in thread of client.
+        :return:
+        """
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.run_async())
+
+    async def run_async(self):
+        """
+        Connect, read and process messages until cancelled or shutdown. Reconnects after reconnect_delay sec.
+        Record systems are closed when it returns.
+        :return:
+        """
+        self._run_task = asyncio.current_task()
+        try:
+            while not self._stopping:
+                try:
+                    async with websockets.connect(
+                        self.exchange_version,
+                        ping_interval=self.configuration["orderBookScrapper"]["hearth_beat_time"],
+                        max_size=None,
+                    ) as websocket:
+                        self.websocket = websocket
+                        self._on_open(websocket)
+                        async for message in websocket:
+                            self._on_message(websocket, message)
+                            await self._process_dispatched()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self._on_error(self.websocket, e)
+                logging.warning(f"Connection is closed, reconnect in {self.reconnect_delay} sec")
+                await asyncio.sleep(self.reconnect_delay)
+        except asyncio.CancelledError:
+            # Cancelled by shutdown() is normal exit
+            if not self._stopping:
+                raise
+        finally:
+            self._stopping = True
+            self.websocket = None
+            self.request_queue.close()
+            await self.shutdown_record_systems()
+
+    def _stop_connection(self):
+        # run_async is cancelled, its exit path closes record systems
+        if self._run_task is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._run_task.cancel)
+
+    def _stop_loop(self):
+        # Loop ends with run_async (run) or belongs to caller of run_async
+        pass
+
+    def _dispatch(self, coroutine):
+        """
+        Coroutine of handler is awaited by read loop after _on_message (no thread hop, no task).
+        :param coroutine:
+        :return:
+        """
+        self._dispatched.append(coroutine)
+
+    async def _process_dispatched(self):
+        while self._dispatched:
+            try:
+                await self._dispatched.popleft()
+            except Exception as e:
+                logging.exception(f"Processing of message raise error: {e}")
+
+    def _send_frame(self, request: dict) -> Awaitable:
+        # Awaited by sender of request_queue. Error is set to future of request, sender keeps working
+        if self.websocket is None:
+            raise ConnectionError("Websocket is not connected")
+        return self.websocket.send(json.dumps(request))
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
+import concurrent.futures
 import json
 import logging
 import os
+import signal
+import threading
 import time
 from datetime import datetime
 from threading import Thread
@@ -11,6 +15,7 @@ from typing import Optional
 from typing import Union
 
 import requests
+import tables
 import yaml
 from websocket import ABNF
 from websocket import enableTrace
@@ -31,6 +36,17 @@ from deribit_data_scrapper.Utils import *
 # nest_asyncio.apply()
 
 
+def running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """
+    Event loop, работающий в текущем потоке, или None.
+    :return:
+    """
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
 async def scrap_available_instruments(currency: Currency, cfg):
     """
     Функция для получения всех доступных опционов для какой-либо валюты.
@@ -118,7 +134,57 @@ def validate_configuration_file(configuration_path: str) -> dict:
     cfg["hdf5"][
         "hdf5_database_directory"
     ] = f'{os.getcwd()}/{cfg["hdf5"]["hdf5_database_directory"]}'
-    if type(cfg["orderBookScrapper"]["depth"]) != int:
+    if cfg["mysql"].get("insert_mode", "executemany") not in (
+        "executemany",
+        "load_data",
+        "values",
+    ):
+        raise TypeError("Invalid type for mysql configuration")
+    if type(cfg["mysql"].get("executemany_chunk_size", 5000)) != int:
+        raise TypeError("Invalid type for mysql configuration")
+    if type(cfg["mysql"].get("pool_size", 4)) != int or cfg["mysql"].get("pool_size", 4) < 1:
+        raise TypeError("Invalid type for mysql configuration")
+    if type(cfg["mysql"].get("health_check_interval", 30)) not in (int, float):
+        raise TypeError("Invalid type for mysql configuration")
+    if type(cfg["mysql"].get("reconnect_max_wait_time", 30)) not in (int, float):
+        raise TypeError("Invalid type for mysql configuration")
+    if type(cfg["mysql"].get("non_blocking", False)) != bool:
+        raise TypeError("Invalid type for mysql configuration")
+    if type(cfg["mysql"].get("time_index", True)) != bool:
+        raise TypeError("Invalid type for mysql configuration")
+    if type(cfg["mysql"].get("time_partitioned", False)) != bool:
+        raise TypeError("Invalid type for mysql configuration")
+    if type(cfg["mysql"].get("partition_days_ahead", 7)) != int or cfg["mysql"].get("partition_days_ahead", 7) < 0:
+        raise TypeError("Invalid type for mysql configuration")
+    if cfg["hdf5"].get("writer", "pytables") not in ("pytables", "pandas"):
+        raise TypeError("Invalid type for hdf5 configuration")
+    if type(cfg["hdf5"].get("expectedrows", 1_000_000)) != int:
+        raise TypeError("Invalid type for hdf5 configuration")
+    if cfg["hdf5"].get("chunkshape", None) is not None and type(
+        cfg["hdf5"]["chunkshape"]
+    ) != int:
+        raise TypeError("Invalid type for hdf5 configuration")
+    if type(cfg["hdf5"].get("index_columns", [])) != list:
+        raise TypeError("Invalid type for hdf5 configuration")
+    if cfg["hdf5"].get("complib", None) is not None and cfg["hdf5"][
+        "complib"
+    ] not in tables.filters.all_complibs:
+        raise TypeError("Invalid type for hdf5 configuration")
+    if cfg["hdf5"].get("complevel", 5) not in range(10):
+        raise TypeError("Invalid type for hdf5 configuration")
+    if type(cfg["hdf5"].get("shuffle", True)) != bool:
+        raise TypeError("Invalid type for hdf5 configuration")
+    if cfg["hdf5"].get("index_interval", 600) is not None and type(
+        cfg["hdf5"].get("index_interval", 600)
+    ) not in (int, float):
+        raise TypeError("Invalid type for hdf5 configuration")
+    if cfg["hdf5"].get("rollover_period", None) not in (None, "hour", "day"):
+        raise TypeError("Invalid type for hdf5 configuration")
+    if cfg["hdf5"].get("rollover_max_bytes", None) is not None and type(
+        cfg["hdf5"]["rollover_max_bytes"]
+    ) != int:
+        raise TypeError("Invalid type for hdf5 configuration")
+    if type(cfg["orderBookScrapper"]["depth"]) != int and cfg["orderBookScrapper"]["depth"] is not False:
         raise TypeError("Invalid type for scrapper configuration")
     if type(cfg["orderBookScrapper"]["test_net"]) != bool:
         raise TypeError("Invalid type for scrapper configuration")
@@ -128,11 +194,78 @@ def validate_configuration_file(configuration_path: str) -> dict:
         raise TypeError("Invalid type for scrapper configuration")
     if type(cfg["orderBookScrapper"]["hearth_beat_time"]) != int:
         raise TypeError("Invalid type for scrapper configuration")
-    if (
-        cfg["orderBookScrapper"]["database_daemon"] != "hdf5"
-        and cfg["orderBookScrapper"]["database_daemon"] != "mysql"
+    if cfg["orderBookScrapper"]["database_daemon"] not in (
+        "hdf5",
+        "mysql",
+        "parquet",
+        "sqlite",
+        "mmap",
+    ):
+        raise TypeError("Invalid type for scrapper configuration")
+    if "parquet" in cfg:
+        cfg["parquet"][
+            "parquet_database_directory"
+        ] = f'{os.getcwd()}/{cfg["parquet"]["parquet_database_directory"]}'
+        if type(cfg["parquet"].get("rows_per_file", 1_000_000)) != int:
+            raise TypeError("Invalid type for parquet configuration")
+        if type(cfg["parquet"].get("row_group_rows", 100_000)) != int:
+            raise TypeError("Invalid type for parquet configuration")
+        if cfg["parquet"].get("row_groups_per_file", None) is not None and type(
+            cfg["parquet"]["row_groups_per_file"]
+        ) != int:
+            raise TypeError("Invalid type for parquet configuration")
+        if cfg["parquet"].get("max_file_age", 3600) is not None and type(
+            cfg["parquet"].get("max_file_age", 3600)
+        ) not in (int, float):
+            raise TypeError("Invalid type for parquet configuration")
+        if type(cfg["parquet"].get("dictionary_columns", [])) != list:
+            raise TypeError("Invalid type for parquet configuration")
+        if type(cfg["parquet"].get("delta_columns", [])) != list:
+            raise TypeError("Invalid type for parquet configuration")
+    if "sqlite" in cfg:
+        cfg["sqlite"][
+            "sqlite_database_path"
+        ] = f'{os.getcwd()}/{cfg["sqlite"]["sqlite_database_path"]}'
+        if type(cfg["sqlite"].get("busy_timeout", 5)) not in (int, float):
+            raise TypeError("Invalid type for sqlite configuration")
+        if cfg["sqlite"].get("synchronous", "NORMAL") not in ("OFF", "NORMAL", "FULL"):
+            raise TypeError("Invalid type for sqlite configuration")
+        if type(cfg["sqlite"].get("time_index", True)) != bool:
+            raise TypeError("Invalid type for sqlite configuration")
+    if "mmap" in cfg:
+        cfg["mmap"][
+            "mmap_database_directory"
+        ] = f'{os.getcwd()}/{cfg["mmap"]["mmap_database_directory"]}'
+        if type(cfg["mmap"].get("chunk_rows", 1)) != int:
+            raise TypeError("Invalid type for mmap configuration")
+        if type(cfg["mmap"].get("segment_max_bytes", 1)) != int:
+            raise TypeError("Invalid type for mmap configuration")
+    if type(cfg["orderBookScrapper"].get("change_only_record", False)) != bool:
+        raise TypeError("Invalid type for scrapper configuration")
+    if type(cfg["orderBookScrapper"].get("change_only_heartbeat", None)) not in (
+        int,
+        float,
+        type(None),
+    ):
+        raise TypeError("Invalid type for scrapper configuration")
+    if type(cfg["orderBookScrapper"].get("full_book_snapshot_interval", 60)) not in (
+        int,
+        float,
+        type(None),
     ):
         raise TypeError("Invalid type for scrapper configuration")
+    if type(cfg["orderBookScrapper"].get("subscription_chunk_size", 100)) != int:
+        raise TypeError("Invalid type for scrapper configuration")
+    if cfg["orderBookScrapper"].get("json_decoder", "auto") not in AVAILABLE_DECODERS:
+        raise TypeError("Invalid type for scrapper configuration")
+    for _key in (
+        "matching_engine_rate",
+        "matching_engine_burst",
+        "non_matching_rate",
+        "non_matching_burst",
+    ):
+        if type(cfg.get("request_queue", dict()).get(_key, 1)) not in (int, float):
+            raise TypeError("Invalid type for request queue configuration")
     if type(cfg["orderBookScrapper"]["add_extra_instruments"]) != list:
         raise TypeError("Invalid type for scrapper configuration")
     print(cfg["orderBookScrapper"]["scrapper_body"])
@@ -157,6 +290,32 @@ def validate_configuration_file(configuration_path: str) -> dict:
         raise TypeError("Invalid type for record system configuration")
     if type(cfg["record_system"]["size_of_tmp_batch_table"]) != int:
         raise TypeError("Invalid type for record system configuration")
+    if type(cfg["record_system"].get("flush_in_background", False)) != bool:
+        raise TypeError("Invalid type for record system configuration")
+    if type(cfg["record_system"].get("flush_queue_size", 1)) != int:
+        raise TypeError("Invalid type for record system configuration")
+    for _key in ("max_batch_age", "max_batch_bytes", "flush_check_interval"):
+        if type(cfg["record_system"].get(_key, None)) not in (int, float, type(None)):
+            raise TypeError("Invalid type for record system configuration")
+    if type(cfg["record_system"].get("use_write_ahead_journal", False)) != bool:
+        raise TypeError("Invalid type for record system configuration")
+    if type(cfg["record_system"].get("journal_fsync_interval", 1)) not in (int, float):
+        raise TypeError("Invalid type for record system configuration")
+    if type(cfg["record_system"].get("use_spill_buffer", False)) != bool:
+        raise TypeError("Invalid type for record system configuration")
+    if type(cfg["record_system"].get("spill_max_bytes", 1)) != int:
+        raise TypeError("Invalid type for record system configuration")
+    for _key in ("spill_retry_wait_time", "spill_retry_max_wait_time"):
+        if type(cfg["record_system"].get(_key, 1)) not in (int, float):
+            raise TypeError("Invalid type for record system configuration")
+    if "spill_directory" in cfg["record_system"]:
+        cfg["record_system"][
+            "spill_directory"
+        ] = f'{os.getcwd()}/{cfg["record_system"]["spill_directory"]}'
+    if "journal_directory" in cfg["record_system"]:
+        cfg["record_system"][
+            "journal_directory"
+        ] = f'{os.getcwd()}/{cfg["record_system"]["journal_directory"]}'
 
     return cfg
 
@@ -171,7 +330,13 @@ def subscription_map(scrapper, conf: dict) -> dict[str, AbstractSubscription]:
     """
     res_dict: dict[str, AbstractSubscription] = dict()
     for sub in conf["orderBookScrapper"]["scrapper_body"]:
-        if sub == "OrderBook":
+        if sub == "OrderBook" and conf["orderBookScrapper"]["depth"] is False:
+            res_dict[
+                "OrderBook"
+            ]: OrderBookSubscriptionUNLIMITED = OrderBookSubscriptionUNLIMITED(
+                scrapper=scrapper
+            )
+        elif sub == "OrderBook":
             res_dict[
                 "OrderBook"
             ]: OrderBookSubscriptionCONSTANT = OrderBookSubscriptionCONSTANT(
@@ -302,6 +467,42 @@ def net_databases_to_subscriptions(
                     )
                     result_netting[subscription_type] = database
                     subscription_type.plug_in_record_system(database=database)
+        case "parquet":
+            # pyarrow is needed only for parquet record system
+            from deribit_data_scrapper.DataBase.ParquetDaemon import ParquetDaemon
+
+            for action, subscription_type in scrapper.subscriptions_objects.items():
+                if action not in ("OrderBook", "Trades", "OwnOrderChange", "Portfolio"):
+                    continue
+                database = ParquetDaemon(
+                    configuration_path=scrapper.configuration_path,
+                    subscription_type=subscription_type,
+                    loop=scrapper.loop,
+                )
+                result_netting[subscription_type] = database
+                subscription_type.plug_in_record_system(database=database)
+        case "sqlite":
+            for action, subscription_type in scrapper.subscriptions_objects.items():
+                if action not in ("OrderBook", "Trades", "OwnOrderChange", "Portfolio"):
+                    continue
+                database = SQLiteDaemon(
+                    configuration_path=scrapper.configuration_path,
+                    subscription_type=subscription_type,
+                    loop=scrapper.loop,
+                )
+                result_netting[subscription_type] = database
+                subscription_type.plug_in_record_system(database=database)
+        case "mmap":
+            for action, subscription_type in scrapper.subscriptions_objects.items():
+                if action not in ("OrderBook", "Trades", "OwnOrderChange", "Portfolio"):
+                    continue
+                database = MmapDaemon(
+                    configuration_path=scrapper.configuration_path,
+                    subscription_type=subscription_type,
+                    loop=scrapper.loop,
+                )
+                result_netting[subscription_type] = database
+                subscription_type.plug_in_record_system(database=database)
         case _:
             logging.warning("Unknown database daemon selected")
             scrapper.database = None
@@ -331,6 +532,16 @@ class DeribitClient(Thread, WebSocketApp):
     order_manager: OrderManager = None
     connected_strategy: Optional[AbstractStrategy] = None
     client_currency: Optional[Currency] = None
+    request_queue: RateLimitedRequestQueue
+    subscription_planner: SubscriptionPlanner
+    channel_router: ChannelRouter
+    message_decoder: MessageDecoder
+    # Record system of every subscription (sub -> daemon), see net_databases_to_subscriptions
+    subscription_type: dict[AbstractSubscription, AbstractDataManager]
+
+    # Shutdown state (see shutdown)
+    _stopping: bool = False
+    _record_systems_shutdown: Optional[asyncio.Future] = None
 
     def __init__(
         self,
@@ -377,6 +588,12 @@ class DeribitClient(Thread, WebSocketApp):
         Thread.__init__(self)
         self.loop = loopB
         asyncio.set_event_loop(self.loop)
+        # Outbound requests are rate limited by Deribit credits in event loop, senders never sleep
+        self.request_queue = RateLimitedRequestQueue(
+            send=self._send_frame,
+            loop=self.loop,
+            **self.configuration.get("request_queue", dict()),
+        )
 
         # Set client currency
         self.client_currency = client_currency
@@ -385,6 +602,16 @@ class DeribitClient(Thread, WebSocketApp):
         self.subscriptions_objects = subscription_map(
             scrapper=self, conf=self.configuration
         )
+        # Subscription notifications are routed by channel prefix to exactly its subscriptions
+        self.channel_router = ChannelRouter()
+        for action, sub in self.subscriptions_objects.items():
+            for _prefix in sub.channel_prefixes:
+                self.channel_router.register(_prefix, sub.process_response_from_server)
+        # Notifications of channels without consumer are dropped before json decoding
+        self.message_decoder = MessageDecoder(
+            backend=self.configuration["orderBookScrapper"].get("json_decoder", "auto"),
+            consumes=self.channel_router.consumes,
+        )
 
         # Make list of instruments
         self.instruments_list = instruments_listed
@@ -398,10 +625,22 @@ class DeribitClient(Thread, WebSocketApp):
 
         self.websocket = None
         self.enable_traceback = enable_traceback
-        # Set storages for requested data
+        # Set storages for requested data (channels subscribed at current connection)
         self.instrument_requested = set()
+        # Channels of all subscriptions are sent in few multi-channel subscribe requests
+        self.subscription_planner = SubscriptionPlanner(
+            send=self.send_new_request,
+            requested=self.instrument_requested,
+            chunk_size=self.configuration["orderBookScrapper"].get(
+                "subscription_chunk_size", 100
+            ),
+        )
+        self.subscription_type = dict()
+        self._previous_signal_handlers = dict()
         if enable_database_record:
             self.subscription_type = net_databases_to_subscriptions(scrapper=self)
+            # Tail batches, journals and files of record systems are closed when process stops
+            self._register_shutdown_hooks()
 
         # Set flag for authentication validation
         self.auth_complete: bool = False
@@ -443,6 +682,8 @@ class DeribitClient(Thread, WebSocketApp):
         Don't touch me!
         :return:
         """
+        if self._stopping:
+            return
         self.websocket = WebSocketApp(
             self.exchange_version,
             on_message=self._on_message,
@@ -454,7 +695,7 @@ class DeribitClient(Thread, WebSocketApp):
         # Run forever loop
         # self.websocket.last_ping_tm = 32
         # self.websocket.last_pong_tm = 1
-        while True:
+        while not self._stopping:
             try:
                 self.websocket.run_forever(
                     # dispatcher=rel,
@@ -467,6 +708,97 @@ class DeribitClient(Thread, WebSocketApp):
                 # TODO: place here notificator
                 continue
 
+    def _register_shutdown_hooks(self):
+        """
+        shutdown() вызывается при выходе интерпретатора (atexit) и по SIGINT/SIGTERM.
+        Обработчики сигналов ставятся только из main thread, предыдущий обработчик вызывается после shutdown.
+        :return:
+        """
+        atexit.register(self.shutdown)
+        if threading.current_thread() is not threading.main_thread():
+            logging.warning(
+                "Client is created outside of main thread. No signal handlers installed, call shutdown() before exit"
+            )
+            return
+        for _signal in (signal.SIGINT, signal.SIGTERM):
+            self._previous_signal_handlers[_signal] = signal.getsignal(_signal)
+            signal.signal(_signal, self._on_shutdown_signal)
+
+    def _on_shutdown_signal(self, signum, frame):
+        logging.warning(f"Received {signal.Signals(signum).name}. Shutdown client")
+        if not self.shutdown():
+            # Shutdown continues in event loop of this thread, previous handler must not interrupt it
+            return
+        _previous = self._previous_signal_handlers.get(signum)
+        if callable(_previous):
+            _previous(signum, frame)
+        elif _previous == signal.SIG_DFL:
+            raise SystemExit(128 + signum)
+
+    def shutdown(self, timeout: Optional[float] = 60) -> bool:
+        """
+        Остановка клиента: закрыть websocket, записать хвост батчей и закрыть record systems
+        (AbstractDataManager.shutdown), затем остановить loopB. Вызывается atexit и SIGINT/SIGTERM,
+        может быть вызван из любого потока. Повторные вызовы ничего не делают.
+        :param timeout: max time in sec to wait for record systems
+        :return: True если shutdown завершен, False если он продолжается в event loop текущего потока
+        """
+        if self._stopping:
+            return True
+        self._stopping = True
+        self._stop_connection()
+        if self.loop.is_closed():
+            return True
+        if not self.loop.is_running():
+            self.loop.run_until_complete(self.shutdown_record_systems())
+            return True
+        if running_loop() is self.loop:
+            # Caller is inside loopB and cannot block it
+            self.loop.create_task(self._shutdown_in_loop())
+            return False
+        try:
+            asyncio.run_coroutine_threadsafe(
+                self.shutdown_record_systems(), self.loop
+            ).result(timeout)
+        except concurrent.futures.TimeoutError:
+            logging.error(f"Record systems are not closed in ({timeout}) sec")
+        self.loop.call_soon_threadsafe(self._stop_loop)
+        return True
+
+    async def shutdown_record_systems(self):
+        """
+        Закрыть record systems всех подписок. Повторные и параллельные вызовы ждут первый.
+        :return:
+        """
+        if self._record_systems_shutdown is None:
+            self._record_systems_shutdown = asyncio.ensure_future(
+                self._shutdown_record_systems()
+            )
+        await asyncio.shield(self._record_systems_shutdown)
+
+    async def _shutdown_record_systems(self):
+        for subscription, database in self.subscription_type.items():
+            try:
+                await database.shutdown()
+            except Exception as e:
+                logging.exception(
+                    f"Shutdown of {subscription.__class__.__name__} record system raise error: {e}"
+                )
+        logging.info("Record systems are closed")
+
+    async def _shutdown_in_loop(self):
+        await self.shutdown_record_systems()
+        self._stop_loop()
+
+    def _stop_connection(self):
+        # run() leaves reconnect loop when run_forever returns
+        if self.websocket is not None:
+            self.websocket.close()
+
+    def _stop_loop(self):
+        # Thread of loopB (run_forever) ends after shutdown
+        self.loop.stop()
+
     def _on_error(self, websocket, error):
         # TODO: send Telegram notification
         logging.error(error)
@@ -481,18 +813,19 @@ class DeribitClient(Thread, WebSocketApp):
         :param message:
         :return:
         """
-        response = json.loads(message)
+        response = self.message_decoder.decode(message)
+        if response is None:
+            return
         self._process_callback(response)
         # print(response)
         # Process initial order placement
         if "result" in response:
             if "order" in response["result"]:
                 if "OwnOrderChange" in self.subscriptions_objects:
-                    asyncio.run_coroutine_threadsafe(
+                    self._dispatch(
                         self.subscriptions_objects[
                             "OwnOrderChange"
-                        ].process_response_from_server(response=response),
-                        loop=self.loop,
+                        ].process_response_from_server(response=response)
                     )
         # subscriptions
         if "method" in response:
@@ -501,11 +834,12 @@ class DeribitClient(Thread, WebSocketApp):
                 # Send test message to approve that connection is still alive
                 self.send_new_request(MSG_LIST.test_message())
                 return
-            # TODO
-            for action, sub in self.subscriptions_objects.items():
-                asyncio.run_coroutine_threadsafe(
-                    sub.process_response_from_server(response=response), loop=self.loop
-                )
+            # One dispatch per consumer of channel, channels without consumer are dropped
+            if response["method"] == "subscription":
+                for _handler in self.channel_router.handlers_of(
+                    response["params"]["channel"]
+                ):
+                    self._dispatch(_handler(response=response))
 
         if self.instrument_manager is not None:
             # validation requests for instrument manager
@@ -516,11 +850,10 @@ class DeribitClient(Thread, WebSocketApp):
                     if "token_type" not in response["result"]:
                         if response["result"] != "ok":
                             for dict_obj in response["result"]:
-                                asyncio.run_coroutine_threadsafe(
+                                self._dispatch(
                                     self.instrument_manager.process_validation(
                                         dict_obj
-                                    ),
-                                    self.loop,
+                                    )
                                 )
 
         # Process errors
@@ -531,18 +864,23 @@ class DeribitClient(Thread, WebSocketApp):
         if "message" in response["error"]:
             if "not_enough_funds" in response["error"]["message"]:
                 logging.warning(f"{response}")
-                asyncio.run_coroutine_threadsafe(
-                    self.order_manager.not_enough_funds(callback=response),
-                    loop=self.loop,
+                self._dispatch(
+                    self.order_manager.not_enough_funds(callback=response)
                 )
             elif "price_too_high" in response["error"]["message"]:
                 logging.warning(f"{response}")
-                asyncio.run_coroutine_threadsafe(
-                    self.order_manager.price_too_high(callback=response), loop=self.loop
-                )
+                self._dispatch(self.order_manager.price_too_high(callback=response))
             else:
                 logging.error(f"Unknown error callback: | {response}")
 
+    def _dispatch(self, coroutine):
+        """
+        Передать coroutine обработчика в event loop клиента (из потока websocket).
+        :param coroutine:
+        :return:
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, loop=self.loop)
+
     def _process_callback(self, response):
         logging.info(response)
         pass
@@ -564,20 +902,29 @@ class DeribitClient(Thread, WebSocketApp):
         )
 
         logging.info("Client start his work")
-        # Execute initial subscription's request pipelines
+        # New connection (also reconnect) has no auth and no subscriptions
+        self.auth_complete = False
+        self.subscription_planner.reset()
+        # Execute initial subscription's request pipelines. Channels of all subscriptions are sent together
         for action, sub in self.subscriptions_objects.items():
-            sub.create_subscription_request()
+            sub.create_subscription_request(flush=False)
+        self.subscription_planner.flush()
 
-    def send_new_request(self, request: dict):
+    def send_new_request(
+        self, request: dict
+    ) -> Union[asyncio.Future, concurrent.futures.Future]:
         """
         Don't touch me.
-        Отправляет запрос на сервер. Блокирующий time-sleep вызван спецификой запросов к deribit.
+        Ставит запрос в очередь отправки на сервер (не блокирует). Лимит запросов deribit соблюдается
+        request_queue: ордера и отмены идут вне очереди подписок.
         :param request:
-        :return:
+        :return: future, завершается после отправки запроса. В event loop клиента - awaitable asyncio future,
+        из других потоков - concurrent future
         """
+        return self.request_queue.send(request)
+
+    def _send_frame(self, request: dict):
         self.websocket.send(json.dumps(request), ABNF.OPCODE_TEXT)
-        # TODO: do it better. Unsync.
-        time.sleep(0.05)
 
     def send_block_sync_request(
         self, params: dict, method="get_position", _private="private"
@@ -1,3 +1,3 @@
 from .TradingInterface import *
 from .ScrapperWithPreSelectedMaturities import *
-
+from .AsyncTradingInterface import DeribitAsyncClient
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import threading
+import unittest
+
+import websockets
+
+from deribit_data_scrapper.Scrapper.AsyncTradingInterface import DeribitAsyncClient
+from deribit_data_scrapper.Utils import Currency
+
+
+class _Instrument:
+    def get_fields(self):
+        return 0, 0.0, 0, 1
+
+
+class _Database:
+    def __init__(self):
+        self.rows = []
+        self.threads = set()
+
+        self.is_shut_down = False
+
+    async def add_data(self, update_line):
+        self.rows.append(update_line.copy())
+        self.threads.add(threading.get_ident())
+
+    async def shutdown(self):
+        self.is_shut_down = True
+
+
+def configuration() -> dict:
+    return {
+        "user_data": {"test_net": {"client_id": None, "client_secret": None}},
+        "orderBookScrapper": {
+            "scrapper_body": ["Trades"],
+            "depth": 1,
+            "test_net": True,
+            "enable_traceback": False,
+            "enable_database_record": False,
+            "only_api_orders_processing": True,
+            "add_extra_instruments": ["ETH-PERPETUAL"],
+            "hearth_beat_time": 60,
+        },
+        "record_system": {"instrumentNameToIdMapFile": None},
+        "externalModules": {"add_instrument_manager": False},
+    }
+
+
+def trades_notification(instrument_name: str, trade_seq: int) -> str:
+    return json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "method": "subscription",
+            "params": {
+                "channel": f"trades.{instrument_name}.100ms",
+                "data": [
+                    {
+                        "trade_seq": trade_seq,
+                        "trade_id": str(trade_seq),
+                        "timestamp": 1700000000000 + trade_seq,
+                        "instrument_name": instrument_name,
+                        "price": 2000.0,
+                        "direction": "buy",
+                        "amount": 1.0,
+                    }
+                ],
+            },
+        },
+        separators=(",", ":"),
+    )
+
+
+class _WebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send(self, frame):
+        self.frames.append(json.loads(frame))
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def make_client(self) -> DeribitAsyncClient:
+        client = DeribitAsyncClient(
+            cfg=configuration(),
+            cfg_path=configuration(),
+            dev_cfg={},
+            loopB=self.loop,
+            client_currency=Currency.ETHER,
+        )
+        client.instrument_name_instrument_id_map["ETH-PERPETUAL"] = _Instrument()
+        return client
+
+    def test_messages_are_read_and_processed_in_one_event_loop(self):
+        client = self.make_client()
+        database = _Database()
+        client.subscriptions_objects["Trades"].plug_in_record_system(database=database)
+        requests = []
+
+        async def _server(websocket, path):
+            # Heartbeat and one subscribe request for all channels
+            for _ in range(2):
+                requests.append(json.loads(await websocket.recv()))
+            for trade_seq in (1, 2, 3):
+                await websocket.send(trades_notification("ETH-PERPETUAL", trade_seq))
+            # Nobody consumes book, notification is dropped before decoding
+            await websocket.send(trades_notification("ETH-PERPETUAL", 4).replace("trades.", "book."))
+            await websocket.send(trades_notification("ETH-PERPETUAL", 5))
+            await websocket.wait_closed()
+
+        async def _run():
+            server = await websockets.serve(_server, "localhost", 0)
+            client.exchange_version = f"ws://localhost:{server.sockets[0].getsockname()[1]}"
+            task = self.loop.create_task(client.run_async())
+            while len(database.rows) < 4:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            server.close()
+            await server.wait_closed()
+
+        self.loop.run_until_complete(asyncio.wait_for(_run(), timeout=10))
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+        self.assertEqual(
+            [request["method"] for request in requests],
+            ["public/set_heartbeat", "public/subscribe"],
+        )
+        self.assertEqual(requests[1]["params"]["channels"], ["trades.ETH-PERPETUAL.100ms"])
+        self.assertEqual(
+            [int(trade_seq) for row in database.rows for trade_seq in row["TRADE_SEQ"]],
+            [1, 2, 3, 5],
+        )
+        # Processed by thread of event loop, no separate websocket thread
+        self.assertEqual(database.threads, {threading.get_ident()})
+        self.assertEqual(client.message_decoder.dropped_messages, 1)
+
+    def test_shutdown_from_other_thread_closes_record_systems(self):
+        client = self.make_client()
+        database = _Database()
+        client.subscriptions_objects["Trades"].plug_in_record_system(database=database)
+        client.subscription_type = {client.subscriptions_objects["Trades"]: database}
+
+        async def _server(websocket, path):
+            await websocket.send(trades_notification("ETH-PERPETUAL", 1))
+            await websocket.wait_closed()
+
+        async def _run():
+            server = await websockets.serve(_server, "localhost", 0)
+            client.exchange_version = f"ws://localhost:{server.sockets[0].getsockname()[1]}"
+            task = self.loop.create_task(client.run_async())
+            while not database.rows:
+                await asyncio.sleep(0.01)
+            # Signal handler / atexit call shutdown outside of event loop
+            completed = await self.loop.run_in_executor(None, client.shutdown)
+            await asyncio.wait_for(task, timeout=5)
+            server.close()
+            await server.wait_closed()
+            return completed
+
+        completed = self.loop.run_until_complete(asyncio.wait_for(_run(), timeout=10))
+
+        self.assertTrue(completed)
+        self.assertTrue(database.is_shut_down)
+        self.assertIsNone(client.websocket)
+        # Second call (atexit after signal) does nothing
+        self.assertTrue(client.shutdown())
+
+    def test_reconnect_resubscribes_and_keeps_processing(self):
+        client = self.make_client()
+        client.reconnect_delay = 0.01
+        database = _Database()
+        client.subscriptions_objects["Trades"].plug_in_record_system(database=database)
+        connections = []
+
+        async def _server(websocket, path):
+            connections.append([json.loads(await websocket.recv()) for _ in range(2)])
+            if len(connections) == 1:
+                # Server drops first connection
+                await websocket.close()
+                return
+            await websocket.send(trades_notification("ETH-PERPETUAL", 1))
+            await websocket.wait_closed()
+
+        async def _run():
+            server = await websockets.serve(_server, "localhost", 0)
+            client.exchange_version = f"ws://localhost:{server.sockets[0].getsockname()[1]}"
+            task = self.loop.create_task(client.run_async())
+            while not database.rows:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            server.close()
+            await server.wait_closed()
+
+        self.loop.run_until_complete(asyncio.wait_for(_run(), timeout=10))
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+        # Every connection sets heartbeat and subscribes all channels again
+        self.assertEqual(len(connections), 2)
+        for requests in connections:
+            self.assertEqual(
+                [request["method"] for request in requests],
+                ["public/set_heartbeat", "public/subscribe"],
+            )
+            self.assertEqual(requests[1]["params"]["channels"], ["trades.ETH-PERPETUAL.100ms"])
+        self.assertEqual([int(row["TRADE_SEQ"][0]) for row in database.rows], [1])
+
+    def test_request_without_connection_fails_its_future_only(self):
+        client = self.make_client()
+        client.websocket = None
+
+        async def _send():
+            failed = client.send_new_request({"method": "public/test"})
+            await asyncio.wait([failed], timeout=5)
+            self.assertIsInstance(failed.exception(), ConnectionError)
+            # Sender of queue is alive: next request is sent when connection is back
+            client.websocket = _WebSocket()
+            await asyncio.wait_for(client.send_new_request({"method": "public/get_time"}), timeout=5)
+            return client.websocket.frames
+
+        frames = self.loop.run_until_complete(_send())
+        client.request_queue.close()
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+        self.assertEqual([frame["method"] for frame in frames], ["public/get_time"])
+        self.assertEqual(client.request_queue.sent_requests, 1)
+
+    def test_dispatched_handlers_are_awaited_in_order(self):
+        client = self.make_client()
+        calls = []
+
+        async def _handler(name: str):
+            calls.append(name)
+            if name == "first":
+                # Handler dispatched by handler runs after already queued ones
+                client._dispatch(_handler("nested"))
+            if name == "failing":
+                raise ValueError(name)
+
+        for name in ("first", "failing", "last"):
+            client._dispatch(_handler(name))
+        self.assertEqual(calls, [])
+        self.loop.run_until_complete(client._process_dispatched())
+
+        # Error of handler is logged, next handlers are processed
+        self.assertEqual(calls, ["first", "failing", "last", "nested"])
+        self.assertEqual(len(client._dispatched), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
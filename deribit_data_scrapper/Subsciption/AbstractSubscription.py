@@ -2,8 +2,11 @@ from abc import ABC
 from abc import abstractmethod
 from enum import Enum
 from typing import List
+from typing import Optional
+from typing import Tuple
 from typing import TYPE_CHECKING
 
+import numpy as np
 from numpy import ndarray
 from pandas import DataFrame
 
@@ -39,8 +42,8 @@ class AbstractSubscription(ABC):
     При имплементации необходимо определить названия таблиц где будут храниться данные.
     Также следует определить запрос который отправляется на Deribit для запроса подписки.
     Следует определить поведение подписки на приходящий response от сервера
-    (note: src не выполняет предварительной фильтрации ответов,
-    и все пришедшие данные крутит через все подписки)
+    (note: subscription уведомления доставляются только подпискам, зарегистрировавшим префикс канала
+    в channel_prefixes, см. ChannelRouter)
     """
 
     tables_names: List[str]
@@ -49,6 +52,12 @@ class AbstractSubscription(ABC):
     database: database_typing
 
     request_typo: RequestTypo = None
+    # Prefixes of channels routed to subscription (book, trades, user.orders, user.portfolio)
+    channel_prefixes: Tuple[str, ...] = tuple()
+    # LIMITED - one row of batch is one row of tables_names[0]; UNLIMITED - rows are split to several tables
+    tag_of_data: str = "LIMITED"
+    # Primary key columns of every table of tables_names for schema generated from columns (sqlite). None - no keys
+    tables_primary_keys: Optional[List[List[str]]] = None
 
     def __init__(self, scrapper: scrapper_typing, request_typo: RequestTypo):
         self.scrapper = scrapper
@@ -84,15 +93,39 @@ class AbstractSubscription(ABC):
         """
         pass
 
+    def create_record_dtype(self) -> np.dtype:
+        """
+        Structured dtype одной строки в batch system и БД (порядок полей = create_columns_list).
+        По умолчанию все колонки float64. Подписки переопределяют для компактных int/float32 колонок
+        и точного хранения id.
+        :return:
+        """
+        return np.dtype([(column, np.float64) for column in self.create_columns_list()])
+
     @abstractmethod
-    async def _create_subscription_request(self) -> str:
+    def subscription_channels(self) -> List[str]:
         """
-        Запрос для "заказа" подписки
+        Каналы deribit, которые нужны подписке (например book.BTC-PERPETUAL.none.10.100ms)
         :return:
         """
         pass
 
-    def create_subscription_request(self) -> str:
+    def _create_subscription_request(self):
+        """
+        Запрос для "заказа" подписки. Каналы добавляются в subscription_planner клиента
+        и отправляются пачками при flush
+        :return:
+        """
+        self.scrapper.subscription_planner.add_channels(
+            self.subscription_channels(),
+            private=self.request_typo == RequestTypo.PRIVATE,
+        )
+
+    def create_subscription_request(self, flush: bool = True):
+        """
+        :param flush: отправить каналы сразу. False - клиент отправит каналы всех подписок вместе
+        :return:
+        """
         if (not self.scrapper.auth_complete) and (
             self.request_typo == RequestTypo.PRIVATE
         ):
@@ -100,6 +133,8 @@ class AbstractSubscription(ABC):
             self.scrapper.auth_complete = True
 
         self._create_subscription_request()
+        if flush:
+            self.scrapper.subscription_planner.flush()
 
     @abstractmethod
     async def _process_response(self, response: dict):
@@ -28,8 +28,8 @@ class NullSub(AbstractSubscription):
         columns[1] = "UNKNOWN_TABLE"
         return columns
 
-    def _create_subscription_request(self) -> str:
-        pass
+    def subscription_channels(self) -> list[str]:
+        return []
 
     def _process_response(self, response: dict):
         pass
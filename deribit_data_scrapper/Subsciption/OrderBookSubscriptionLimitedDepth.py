@@ -1,6 +1,8 @@
 import logging
 from functools import partial
+from typing import Dict
 from typing import List
+from typing import Optional
 from typing import TYPE_CHECKING
 
 import numpy as np
@@ -12,6 +14,7 @@ from deribit_data_scrapper.Subsciption.AbstractSubscription import flatten
 from deribit_data_scrapper.Subsciption.AbstractSubscription import RequestTypo
 from deribit_data_scrapper.Utils import *
 from deribit_data_scrapper.Utils import REQUEST_TO_CREATE_LIMITED_ORDER_BOOK_CONTENT
+from deribit_data_scrapper.Utils import time_partitioning_options
 
 if TYPE_CHECKING:
     from deribit_data_scrapper.Scrapper.TradingInterface import DeribitClient
@@ -20,13 +23,32 @@ if TYPE_CHECKING:
 else:
     scrapper_typing = object
 
+# Initial number of instruments in change-only buffer (doubled when full)
+CHANGE_ONLY_INITIAL_CAPACITY = 1024
+
 
 class OrderBookSubscriptionCONSTANT(AbstractSubscription):
     """
     Class for subscription to order book with constant depth. Depth is set in constructor.
+    CHANGE_ID is placeholder of database row key, exchange change_id/prev_change_id are stored at the
+    last columns EXCHANGE_CHANGE_ID/PREV_CHANGE_ID (-1 if notification has no prev_change_id, as grouped book).
+    Every notification is checked by sequence_tracker (per instrument gaps).
+    Change-only mode (orderBookScrapper.change_only_record) forwards to record system only rows whose
+    price/amount levels differ from the last forwarded row of instrument (byte compare of preallocated
+    buffer row), and optionally one heartbeat row every change_only_heartbeat sec of exchange time.
     """
 
     tables_names = ["TABLE_DEPTH_{}"]
+    channel_prefixes = ("book",)
+
+    # Change-only record stage
+    change_only: bool = False
+    change_only_heartbeat_ms: Optional[int] = None
+    _change_only_slots: Dict[str, int]
+    _last_levels: Optional[ndarray] = None
+    _last_forwarded_timestamp: Optional[ndarray] = None
+    forwarded_rows: int = 0
+    deduplicated_rows: int = 0
 
     def __init__(self, scrapper: scrapper_typing, order_book_depth: int):
         self.depth: int = order_book_depth
@@ -34,7 +56,9 @@ class OrderBookSubscriptionCONSTANT(AbstractSubscription):
         self.tables_names_creation = list(
             map(
                 partial(
-                    REQUEST_TO_CREATE_LIMITED_ORDER_BOOK_CONTENT, depth_size=self.depth
+                    REQUEST_TO_CREATE_LIMITED_ORDER_BOOK_CONTENT,
+                    depth_size=self.depth,
+                    **time_partitioning_options(scrapper.configuration),
                 ),
                 self.tables_names,
             )
@@ -43,18 +67,89 @@ class OrderBookSubscriptionCONSTANT(AbstractSubscription):
         super(OrderBookSubscriptionCONSTANT, self).__init__(
             scrapper=scrapper, request_typo=RequestTypo.PUBLIC
         )
-        self.number_of_columns = self.depth * 4 + 6
+        self.number_of_columns = self.depth * 4 + 8
+        self.record_dtype = self.create_record_dtype()
+        self.sequence_tracker = SequenceGapTracker(name=self.tables_names[0])
+        self._create_change_only_buffer()
 
         self.instrument_name_instrument_id_map = (
             self.scrapper.instrument_name_instrument_id_map
         )
 
+    def _create_change_only_buffer(self):
+        """
+        Preallocate last forwarded levels (raw bytes of BID/ASK columns) and timestamp for every instrument.
+        :return:
+        """
+        self._change_only_slots = dict()
+        self.change_only = self.scrapper.configuration["orderBookScrapper"].get(
+            "change_only_record", False
+        )
+        if not self.change_only:
+            return
+        _heartbeat = self.scrapper.configuration["orderBookScrapper"].get(
+            "change_only_heartbeat", None
+        )
+        self.change_only_heartbeat_ms = (
+            int(_heartbeat * 1_000) if _heartbeat is not None else None
+        )
+        # Levels are consecutive float32 fields from BID_0_PRICE to ASK_{depth-1}_AMOUNT
+        self._levels_offset = self.record_dtype.fields["BID_0_PRICE"][1]
+        self._levels_nbytes = 4 * self.depth * np.dtype(np.float32).itemsize
+        self._last_levels = np.empty(
+            (CHANGE_ONLY_INITIAL_CAPACITY, self._levels_nbytes), dtype=np.uint8
+        )
+        self._last_forwarded_timestamp = np.empty(
+            CHANGE_ONLY_INITIAL_CAPACITY, dtype=np.int64
+        )
+
+    def _is_changed(self, instrument_name: str, update_line: ndarray) -> bool:
+        """
+        Change-only stage: compare levels of row with last forwarded row of instrument. O(depth), no allocation
+        except growth of buffer.
+        :param instrument_name:
+        :param update_line: 0-d record of record_dtype
+        :return: True if row has to be forwarded to record system
+        """
+        _levels = update_line.reshape(1).view(np.uint8)[
+            self._levels_offset : self._levels_offset + self._levels_nbytes
+        ]
+        _timestamp = update_line["TIMESTAMP_VALUE"]
+        _slot = self._change_only_slots.get(instrument_name)
+        if _slot is None:
+            _slot = len(self._change_only_slots)
+            if _slot == self._last_levels.shape[0]:
+                self._last_levels = np.concatenate(
+                    [self._last_levels, np.empty_like(self._last_levels)]
+                )
+                self._last_forwarded_timestamp = np.concatenate(
+                    [
+                        self._last_forwarded_timestamp,
+                        np.empty_like(self._last_forwarded_timestamp),
+                    ]
+                )
+            self._change_only_slots[instrument_name] = _slot
+        elif np.array_equal(self._last_levels[_slot], _levels) and (
+            self.change_only_heartbeat_ms is None
+            or _timestamp - self._last_forwarded_timestamp[_slot]
+            < self.change_only_heartbeat_ms
+        ):
+            self.deduplicated_rows += 1
+            return False
+
+        self._last_levels[_slot] = _levels
+        self._last_forwarded_timestamp[_slot] = _timestamp
+        self.forwarded_rows += 1
+        return True
+
     def _place_here_tables_names_and_creation_requests(self):
         self.tables_names = [f"TABLE_DEPTH_{self.depth}"]
         self.tables_names_creation = list(
             map(
                 partial(
-                    REQUEST_TO_CREATE_LIMITED_ORDER_BOOK_CONTENT, depth_size=self.depth
+                    REQUEST_TO_CREATE_LIMITED_ORDER_BOOK_CONTENT,
+                    depth_size=self.depth,
+                    **time_partitioning_options(self.scrapper.configuration),
                 ),
                 self.tables_names,
             )
@@ -78,10 +173,17 @@ class OrderBookSubscriptionCONSTANT(AbstractSubscription):
             columns.extend(
                 map(lambda x: [f"ASK_{x}_PRICE", f"ASK_{x}_AMOUNT"], range(self.depth))
             )
+            columns.extend(BOOK_SEQUENCE_COLUMNS)
 
             columns = flatten(columns)
             return columns
 
+    def create_record_dtype(self) -> np.dtype:
+        _types = [np.int64, np.int8, np.float32, np.int32, np.int8, np.int64]
+        _types.extend([np.float32] * (4 * self.depth))
+        _types.extend([np.int64] * len(BOOK_SEQUENCE_COLUMNS))
+        return np.dtype(list(zip(self.create_columns_list(), _types)))
+
     async def _process_response(self, response: dict):
         # SUBSCRIPTION processing
         if response["method"] == "subscription":
@@ -94,16 +196,24 @@ class OrderBookSubscriptionCONSTANT(AbstractSubscription):
                     )
 
                 if self.database:
-                    await self.database.add_data(
-                        update_line=self.extract_data_from_response(
-                            input_response=response
-                        )
+                    _update_line = self.extract_data_from_response(
+                        input_response=response
                     )
+                    if not self.change_only or self._is_changed(
+                        response["params"]["data"]["instrument_name"], _update_line
+                    ):
+                        await self.database.add_data(update_line=_update_line)
                 return 1
 
     def extract_data_from_response(self, input_response: dict) -> ndarray:
         _change_id = input_response["params"]["data"]["change_id"]
+        _prev_change_id = input_response["params"]["data"].get("prev_change_id")
         _timestamp = input_response["params"]["data"]["timestamp"]
+        self.sequence_tracker.observe_chain(
+            input_response["params"]["data"]["instrument_name"],
+            _change_id,
+            _prev_change_id,
+        )
         (
             _ins_idx,
             _instrument_strike,
@@ -140,7 +250,10 @@ class OrderBookSubscriptionCONSTANT(AbstractSubscription):
         ]
         _update_line.extend(_bids_insert_array)
         _update_line.insert(0, 0)
-        _update_line = np.array(flatten(_update_line))
+        _update_line.extend(
+            [_change_id, _prev_change_id if _prev_change_id is not None else -1]
+        )
+        _update_line = np.array(tuple(flatten(_update_line)), dtype=self.record_dtype)
         del _bids, _asks, _bids_insert_array, _asks_insert_array, _pointer
         return _update_line
 
@@ -161,53 +274,29 @@ class OrderBookSubscriptionCONSTANT(AbstractSubscription):
         :param group:
         :return:
         """
-        if instrument_name not in self.scrapper.instrument_requested:
-            subscription_message = MSG_LIST.make_subscription_constant_book_depth(
-                instrument_name,
-                type_of_data=type_of_data,
-                interval=interval,
-                depth=depth,
-                group=group,
-            )
-
-            self.scrapper.send_new_request(request=subscription_message)
-            self.scrapper.instrument_requested.add(instrument_name)
-        else:
+        channel = MSG_LIST.constant_book_depth_channel(
+            instrument_name,
+            type_of_data=type_of_data,
+            interval=interval,
+            depth=depth,
+            group=group,
+        )
+        if channel in self.scrapper.instrument_requested:
             logging.warning(f"Instrument {instrument_name} already subscribed")
-            subscription_message = MSG_LIST.make_subscription_constant_book_depth(
-                instrument_name,
-                type_of_data=type_of_data,
-                interval=interval,
-                depth=depth,
-                group=group,
-            )
+        return self.scrapper.subscription_planner.subscribe([channel])
 
-            self.scrapper.send_new_request(request=subscription_message)
-            # self.scrapper.instrument_requested.add(instrument_name)
-
-    def _create_subscription_request(self):
-        # Send all subscriptions
-        for _instrument_name in self.scrapper.instruments_list:
-            self.make_new_subscribe_constant_depth_book(
-                instrument_name=_instrument_name,
-                depth=self.scrapper.configuration["orderBookScrapper"]["depth"],
-                group=self.scrapper.configuration["orderBookScrapper"][
-                    "group_in_limited_order_book"
-                ],
-            )
-
-        # Extra like BTC-PERPETUAL
-        for _instrument_name in self.scrapper.configuration["orderBookScrapper"][
-            "add_extra_instruments"
-        ]:
-            print("Extra:", _instrument_name)
-            self.make_new_subscribe_constant_depth_book(
-                instrument_name=_instrument_name,
+    def subscription_channels(self) -> List[str]:
+        # instruments_list already contains extra instruments like BTC-PERPETUAL
+        return [
+            MSG_LIST.constant_book_depth_channel(
+                _instrument_name,
                 depth=self.scrapper.configuration["orderBookScrapper"]["depth"],
                 group=self.scrapper.configuration["orderBookScrapper"][
                     "group_in_limited_order_book"
                 ],
             )
+            for _instrument_name in self.scrapper.instruments_list
+        ]
 
     def _record_to_daemon_database_pipeline(
         self, record_dataframe: DataFrame, tag_of_data: str
@@ -0,0 +1,265 @@
+import logging
+import time
+from typing import Dict
+from typing import List
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numpy import ndarray
+from pandas import DataFrame
+
+from deribit_data_scrapper.Subsciption.AbstractSubscription import AbstractSubscription
+from deribit_data_scrapper.Subsciption.AbstractSubscription import RequestTypo
+from deribit_data_scrapper.Utils import *
+
+if TYPE_CHECKING:
+    from deribit_data_scrapper.Scrapper.TradingInterface import DeribitClient
+
+    scrapper_typing = DeribitClient
+else:
+    scrapper_typing = object
+
+BID_SIDE = 0
+ASK_SIDE = 1
+# sec of exchange time between full snapshots of instrument
+DEFAULT_FULL_BOOK_SNAPSHOT_INTERVAL = 60
+
+SNAPSHOT_COLUMNS = [
+    "SNAPSHOT_ID",
+    "CHANGE_ID",
+    "INSTRUMENT_INDEX",
+    "INSTRUMENT_STRIKE",
+    "INSTRUMENT_MATURITY",
+    "INSTRUMENT_TYPE",
+    "TIMESTAMP_VALUE",
+    "PREV_CHANGE_ID",
+    "BASE_SNAPSHOT_ID",
+]
+LEVEL_COLUMNS = ["SNAPSHOT_ID", "SIDE", "LEVEL", "PRICE", "AMOUNT"]
+
+
+class OrderBookSubscriptionUNLIMITED(AbstractSubscription):
+    """
+    Class for subscription to full order book (book.{instrument}.100ms, orderBookScrapper.depth: False).
+    Local book of every instrument is built from snapshot and change notifications and placed to batch system
+    as one row per level (snapshot fields are repeated in every row).
+    Record system writes it to two tables: snapshot header and levels (price, amount, side, level) keyed by
+    SNAPSHOT_ID, so depth is not limited by number of columns.
+    Full snapshot (all levels, LEVEL - 0 is best price) is placed at exchange snapshot and then once per
+    orderBookScrapper.full_book_snapshot_interval sec of exchange time. Other notifications place only changed
+    levels (LEVEL - number of change at side, AMOUNT 0 - level deleted). BASE_SNAPSHOT_ID is SNAPSHOT_ID of
+    last full snapshot of instrument (equal to SNAPSHOT_ID for full snapshot): book at any SNAPSHOT_ID is
+    levels of BASE_SNAPSHOT_ID with changes of next SNAPSHOT_ID's of instrument applied in order.
+    Interval 0 places full snapshot after every notification (number of rows = book size * notifications).
+    SNAPSHOT_ID = (start time in ms << 20) + number of snapshot, unique between restarts of scrapper
+    and the same for levels of snapshot split between two batches.
+    Change notifications are checked by sequence_tracker (prev_change_id chain), snapshot starts new chain.
+    """
+
+    tag_of_data = "UNLIMITED"
+    tables_primary_keys = [["SNAPSHOT_ID"], ["SNAPSHOT_ID", "SIDE", "LEVEL"]]
+    channel_prefixes = ("book",)
+
+    # instrument name -> (bids price -> amount, asks price -> amount)
+    _books: Dict[str, tuple]
+    # instrument name -> (SNAPSHOT_ID, exchange timestamp) of last full snapshot
+    _last_full_snapshots: Dict[str, tuple]
+    _snapshot_id: int
+
+    def __init__(self, scrapper: scrapper_typing):
+        self.tables_names = ["ORDER_BOOK_SNAPSHOTS", "ORDER_BOOK_LEVELS"]
+        self.tables_names_creation = [
+            REQUEST_TO_CREATE_ORDER_BOOK_SNAPSHOTS_TABLE(self.tables_names[0]),
+            REQUEST_TO_CREATE_ORDER_BOOK_LEVELS_TABLE(self.tables_names[1]),
+        ]
+
+        super(OrderBookSubscriptionUNLIMITED, self).__init__(
+            scrapper=scrapper, request_typo=RequestTypo.PUBLIC
+        )
+        self.number_of_columns = 13
+        self.record_dtype = self.create_record_dtype()
+        self.sequence_tracker = SequenceGapTracker(name=self.tables_names[0])
+        self._books = dict()
+        self._last_full_snapshots = dict()
+        _interval = self.scrapper.configuration["orderBookScrapper"].get(
+            "full_book_snapshot_interval", DEFAULT_FULL_BOOK_SNAPSHOT_INTERVAL
+        )
+        self.full_book_snapshot_interval_ms = (
+            int(_interval * 1_000) if _interval is not None else None
+        )
+        self._snapshot_id = int(time.time() * 1_000) << 20
+
+        self.instrument_name_instrument_id_map = (
+            self.scrapper.instrument_name_instrument_id_map
+        )
+
+    def _place_here_tables_names_and_creation_requests(self):
+        self.tables_names = ["ORDER_BOOK_SNAPSHOTS", "ORDER_BOOK_LEVELS"]
+        self.tables_names_creation = [
+            REQUEST_TO_CREATE_ORDER_BOOK_SNAPSHOTS_TABLE(self.tables_names[0]),
+            REQUEST_TO_CREATE_ORDER_BOOK_LEVELS_TABLE(self.tables_names[1]),
+        ]
+
+    def create_columns_list(self) -> List[str]:
+        return SNAPSHOT_COLUMNS + LEVEL_COLUMNS[1:]
+
+    def create_record_dtype(self) -> np.dtype:
+        _types = [
+            np.int64,
+            np.int64,
+            np.int8,
+            np.float32,
+            np.int32,
+            np.int8,
+            np.int64,
+            np.int64,
+            np.int64,
+            np.int8,
+            np.int32,
+            np.float32,
+            np.float32,
+        ]
+        return np.dtype(list(zip(self.create_columns_list(), _types)))
+
+    async def _process_response(self, response: dict):
+        # SUBSCRIPTION processing
+        if response["method"] == "subscription":
+            # ORDER BOOK processing. For full book only (notifications have type snapshot | change)
+            if (
+                response["params"]["channel"].startswith("book.")
+                and "type" in response["params"]["data"]
+            ):
+                if self.database:
+                    await self.database.add_data(
+                        update_line=self.extract_data_from_response(
+                            input_response=response
+                        )
+                    )
+                return 1
+
+    def _apply_notification(self, data: dict) -> tuple:
+        """
+        Apply snapshot or change notification to local book of instrument.
+        :param data:
+        :return: (bids, asks) dicts price -> amount
+        """
+        if data["type"] == "snapshot" or data["instrument_name"] not in self._books:
+            self._books[data["instrument_name"]] = (dict(), dict())
+        _bids, _asks = self._books[data["instrument_name"]]
+        for _side, _levels in ((_bids, data["bids"]), (_asks, data["asks"])):
+            for _action, _price, _amount in _levels:
+                if _action == "delete":
+                    _side.pop(_price, None)
+                else:
+                    _side[_price] = _amount
+        return _bids, _asks
+
+    def _is_full_snapshot(self, data: dict) -> bool:
+        """
+        Full snapshot is placed at exchange snapshot, at first notification of instrument and when
+        full_book_snapshot_interval is passed since last full snapshot.
+        :param data:
+        :return:
+        """
+        if data["type"] == "snapshot" or data["instrument_name"] not in self._last_full_snapshots:
+            return True
+        if self.full_book_snapshot_interval_ms is None:
+            return False
+        _, _last_timestamp = self._last_full_snapshots[data["instrument_name"]]
+        return data["timestamp"] - _last_timestamp >= self.full_book_snapshot_interval_ms
+
+    def extract_data_from_response(self, input_response: dict) -> ndarray:
+        _data = input_response["params"]["data"]
+        self.sequence_tracker.observe_chain(
+            _data["instrument_name"],
+            _data["change_id"],
+            _data.get("prev_change_id"),
+            reset=_data["type"] == "snapshot",
+        )
+        _is_full = self._is_full_snapshot(_data)
+        _bids, _asks = self._apply_notification(_data)
+
+        if _is_full:
+            _bid_prices = sorted(_bids, reverse=True)
+            _ask_prices = sorted(_asks)
+            _bid_amounts = [_bids[p] for p in _bid_prices]
+            _ask_amounts = [_asks[p] for p in _ask_prices]
+        else:
+            # Changed levels only, deleted level has AMOUNT 0
+            _bid_prices = [_level[1] for _level in _data["bids"]]
+            _ask_prices = [_level[1] for _level in _data["asks"]]
+            _bid_amounts = [
+                0.0 if _action == "delete" else _amount for _action, _, _amount in _data["bids"]
+            ]
+            _ask_amounts = [
+                0.0 if _action == "delete" else _amount for _action, _, _amount in _data["asks"]
+            ]
+        _number_of_levels = len(_bid_prices) + len(_ask_prices)
+        _update_block = np.zeros(_number_of_levels, dtype=self.record_dtype)
+        if _number_of_levels == 0:
+            return _update_block
+
+        self._snapshot_id += 1
+        if _is_full:
+            self._last_full_snapshots[_data["instrument_name"]] = (
+                self._snapshot_id,
+                _data["timestamp"],
+            )
+        (
+            _ins_idx,
+            _instrument_strike,
+            _instrument_maturity,
+            _instrument_type,
+        ) = self.instrument_name_instrument_id_map[_data["instrument_name"]].get_fields()
+
+        _update_block["SNAPSHOT_ID"] = self._snapshot_id
+        _update_block["CHANGE_ID"] = _data["change_id"]
+        _update_block["INSTRUMENT_INDEX"] = _ins_idx
+        _update_block["INSTRUMENT_STRIKE"] = _instrument_strike
+        _update_block["INSTRUMENT_MATURITY"] = _instrument_maturity
+        _update_block["INSTRUMENT_TYPE"] = _instrument_type
+        _update_block["TIMESTAMP_VALUE"] = _data["timestamp"]
+        _update_block["PREV_CHANGE_ID"] = _data.get("prev_change_id", -1)
+        _update_block["BASE_SNAPSHOT_ID"] = self._last_full_snapshots[_data["instrument_name"]][0]
+
+        _update_block["SIDE"][len(_bid_prices) :] = ASK_SIDE
+        _update_block["LEVEL"][: len(_bid_prices)] = np.arange(len(_bid_prices))
+        _update_block["LEVEL"][len(_bid_prices) :] = np.arange(len(_ask_prices))
+        _update_block["PRICE"] = _bid_prices + _ask_prices
+        _update_block["AMOUNT"] = _bid_amounts + _ask_amounts
+        return _update_block
+
+    def split_record_to_tables(self, record_dataframe: DataFrame) -> List[DataFrame]:
+        """
+        Rows of batch for every table of tables_names: unique snapshot headers and levels.
+        :param record_dataframe:
+        :return:
+        """
+        return [
+            record_dataframe[SNAPSHOT_COLUMNS].drop_duplicates(subset="SNAPSHOT_ID"),
+            record_dataframe[LEVEL_COLUMNS],
+        ]
+
+    def make_new_subscribe_full_book(self, instrument_name: str, interval="100ms"):
+        """
+        Make new deribit subscription to request full order book (snapshot and changes).
+        :param instrument_name:
+        :param interval:
+        :return:
+        """
+        channel = MSG_LIST.all_book_channel(instrument_name, interval=interval)
+        if channel in self.scrapper.instrument_requested:
+            logging.warning(f"Instrument {instrument_name} already subscribed")
+        return self.scrapper.subscription_planner.subscribe([channel])
+
+    def subscription_channels(self) -> List[str]:
+        # instruments_list already contains extra instruments like BTC-PERPETUAL
+        return [
+            MSG_LIST.all_book_channel(_instrument_name)
+            for _instrument_name in self.scrapper.instruments_list
+        ]
+
+    def _record_to_daemon_database_pipeline(
+        self, record_dataframe: DataFrame, tag_of_data: str
+    ) -> DataFrame:
+        return record_dataframe
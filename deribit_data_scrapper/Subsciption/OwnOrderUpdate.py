@@ -24,6 +24,7 @@ class OwnOrdersSubscription(AbstractSubscription):
     """
 
     tables_names = ["User_orders_test{}"]
+    channel_prefixes = ("user.orders",)
 
     def __init__(self, scrapper: scrapper_typing):
         self.tables_names = [f"User_orders_test"]
@@ -35,6 +36,7 @@ class OwnOrdersSubscription(AbstractSubscription):
             scrapper=scrapper, request_typo=RequestTypo.PRIVATE
         )
         self.number_of_columns = 16
+        self.record_dtype = self.create_record_dtype()
         self.instrument_name_instrument_id_map = (
             self.scrapper.instrument_name_instrument_id_map
         )
@@ -67,6 +69,27 @@ class OwnOrdersSubscription(AbstractSubscription):
         columns = flatten(columns)
         return columns
 
+    def create_record_dtype(self) -> np.dtype:
+        _types = [
+            np.int64,
+            np.int64,
+            np.int64,
+            np.int8,
+            np.float32,
+            np.int32,
+            np.int8,
+            "U16",
+            "U16",
+            "U32",
+            np.float64,
+            np.float64,
+            np.float64,
+            np.float64,
+            np.int8,
+            np.float64,
+        ]
+        return np.dtype(list(zip(self.create_columns_list(), _types)))
+
     async def _process_response(self, response: dict):
         if "result" in response:
             if "order" in response["result"]:
@@ -115,12 +138,17 @@ class OwnOrdersSubscription(AbstractSubscription):
         _filled_amount = data_object["filled_amount"]
         _commission = data_object["commission"]
         _average_price = data_object["average_price"]
-        _price = data_object["price"]
+        # Market orders has "market_price" instead of number
+        _price = (
+            data_object["price"]
+            if not isinstance(data_object["price"], str)
+            else np.NaN
+        )
         _direction = 1 if data_object["direction"] == "buy" else -1
         _amount = data_object["amount"]
 
         _full_ndarray = np.array(
-            [
+            (
                 _change_id,
                 _creation_time,
                 _last_update,
@@ -137,18 +165,10 @@ class OwnOrdersSubscription(AbstractSubscription):
                 _price,
                 _direction,
                 _amount,
-            ]
+            ),
+            dtype=self.record_dtype,
         )
-        return np.array(_full_ndarray)
-
-    def _create_subscription_request(self):
-        self.scrapper.send_new_request(
-            MSG_LIST.auth_message(
-                client_id=self.client_id, client_secret=self.client_secret
-            )
-        )
-
-        self._user_orders_change_subscription_request()
+        return _full_ndarray
 
     def _record_to_daemon_database_pipeline(
         self, record_dataframe: DataFrame, tag_of_data: str
@@ -157,22 +177,9 @@ class OwnOrdersSubscription(AbstractSubscription):
             return record_dataframe.iloc[:, 1:]
         return record_dataframe
 
-    def _user_orders_change_subscription_request(self):
-        for _instrument_name in self.scrapper.instruments_list:
-            subscription_message = (
-                MSG_LIST.make_user_orders_subscription_request_by_instrument(
-                    instrument_name=_instrument_name,
-                )
-            )
-            self.scrapper.send_new_request(request=subscription_message)
-
-        # Extra like BTC-PERPETUAL
-        for _instrument_name in self.scrapper.configuration["orderBookScrapper"][
-            "add_extra_instruments"
-        ]:
-            subscription_message = (
-                MSG_LIST.make_user_orders_subscription_request_by_instrument(
-                    instrument_name=_instrument_name,
-                )
-            )
-            self.scrapper.send_new_request(request=subscription_message)
+    def subscription_channels(self) -> List[str]:
+        # instruments_list already contains extra instruments like BTC-PERPETUAL
+        return [
+            MSG_LIST.user_orders_channel(_instrument_name)
+            for _instrument_name in self.scrapper.instruments_list
+        ]
@@ -1,3 +1,4 @@
+from functools import partial
 from typing import List
 from typing import TYPE_CHECKING
 
@@ -21,20 +22,31 @@ else:
 class TradesSubscription(AbstractSubscription):
     """
     Class for subscription about trades.
+    CHANGE_ID is placeholder of database row key, exchange trade sequence is stored at TRADE_SEQ.
+    Every trade is checked by sequence_tracker (per instrument trade_seq gaps).
     """
 
     tables_names = ["Trades_table_{}"]
+    channel_prefixes = ("trades",)
 
     def __init__(self, scrapper: scrapper_typing):
         self.tables_names = [f"Trades_table_test"]
         self.tables_names_creation = list(
-            map(REQUEST_TO_CREATE_TRADES_TABLE, self.tables_names)
+            map(
+                partial(
+                    REQUEST_TO_CREATE_TRADES_TABLE,
+                    **time_partitioning_options(scrapper.configuration),
+                ),
+                self.tables_names,
+            )
         )
 
         super(TradesSubscription, self).__init__(
             scrapper=scrapper, request_typo=RequestTypo.PUBLIC
         )
-        self.number_of_columns = 10
+        self.number_of_columns = 11
+        self.record_dtype = self.create_record_dtype()
+        self.sequence_tracker = SequenceGapTracker(name=self.tables_names[0])
         self.instrument_name_instrument_id_map = (
             self.scrapper.instrument_name_instrument_id_map
         )
@@ -42,7 +54,13 @@ class TradesSubscription(AbstractSubscription):
     def _place_here_tables_names_and_creation_requests(self):
         self.tables_names = [f"Trades_table_test"]
         self.tables_names_creation = list(
-            map(REQUEST_TO_CREATE_TRADES_TABLE, self.tables_names)
+            map(
+                partial(
+                    REQUEST_TO_CREATE_TRADES_TABLE,
+                    **time_partitioning_options(self.scrapper.configuration),
+                ),
+                self.tables_names,
+            )
         )
 
     def create_columns_list(self) -> List[str]:
@@ -57,10 +75,27 @@ class TradesSubscription(AbstractSubscription):
             "INSTRUMENT_TYPE",
             "DIRECTION",
             "AMOUNT",
+            "TRADE_SEQ",
         ]
         columns = flatten(columns)
         return columns
 
+    def create_record_dtype(self) -> np.dtype:
+        _types = [
+            np.int64,
+            np.int64,
+            np.int64,
+            np.float64,
+            np.int8,
+            np.float32,
+            np.int32,
+            np.int8,
+            np.int8,
+            np.float64,
+            np.int64,
+        ]
+        return np.dtype(list(zip(self.create_columns_list(), _types)))
+
     async def _process_response(self, response: dict):
         # SUBSCRIPTION processing
         if response["method"] == "subscription":
@@ -84,7 +119,12 @@ class TradesSubscription(AbstractSubscription):
     def extract_data_from_response(self, input_response: dict) -> ndarray:
         _full_ndarray = []
         for data_object in input_response["params"]["data"]:
-            _change_id = 666
+            # Row key is assigned by database
+            _change_id = 0
+            _trade_seq = data_object["trade_seq"]
+            self.sequence_tracker.observe_increment(
+                data_object["instrument_name"], _trade_seq
+            )
 
             _timestamp = data_object["timestamp"]
             (
@@ -95,7 +135,7 @@ class TradesSubscription(AbstractSubscription):
             ) = self.instrument_name_instrument_id_map[
                 data_object["instrument_name"]
             ].get_fields()
-            _trade_id = (
+            _trade_id = int(
                 data_object["trade_id"]
                 if data_object["trade_id"].isdigit()
                 else data_object["trade_id"][4:]
@@ -104,7 +144,7 @@ class TradesSubscription(AbstractSubscription):
             _direction = 1 if data_object["direction"] == "buy" else -1
             _amount = data_object["amount"]
             _full_ndarray.append(
-                [
+                (
                     _change_id,
                     _timestamp,
                     _trade_id,
@@ -115,12 +155,10 @@ class TradesSubscription(AbstractSubscription):
                     _instrument_type,
                     _direction,
                     _amount,
-                ]
+                    _trade_seq,
+                )
             )
-        return np.array(_full_ndarray)
-
-    def _create_subscription_request(self):
-        self._trades_subscription_request()
+        return np.array(_full_ndarray, dtype=self.record_dtype)
 
     def _record_to_daemon_database_pipeline(
         self, record_dataframe: DataFrame, tag_of_data: str
@@ -129,22 +167,9 @@ class TradesSubscription(AbstractSubscription):
             return record_dataframe.iloc[:, 1:]
         return record_dataframe
 
-    def _trades_subscription_request(self):
-        for _instrument_name in self.scrapper.instruments_list:
-            subscription_message = (
-                MSG_LIST.make_trades_subscription_request_by_instrument(
-                    instrument_name=_instrument_name,
-                )
-            )
-            self.scrapper.send_new_request(request=subscription_message)
-
-        # Extra like BTC-PERPETUAL
-        for _instrument_name in self.scrapper.configuration["orderBookScrapper"][
-            "add_extra_instruments"
-        ]:
-            subscription_message = (
-                MSG_LIST.make_trades_subscription_request_by_instrument(
-                    instrument_name=_instrument_name,
-                )
-            )
-            self.scrapper.send_new_request(request=subscription_message)
+    def subscription_channels(self) -> List[str]:
+        # instruments_list already contains extra instruments like BTC-PERPETUAL
+        return [
+            MSG_LIST.trades_channel(_instrument_name)
+            for _instrument_name in self.scrapper.instruments_list
+        ]
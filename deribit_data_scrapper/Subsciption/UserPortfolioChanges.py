@@ -2,6 +2,7 @@ import time
 from typing import List
 from typing import TYPE_CHECKING
 
+import numpy as np
 from numpy import ndarray
 
 from deribit_data_scrapper.Subsciption.AbstractSubscription import AbstractSubscription
@@ -19,6 +20,7 @@ else:
 
 class UserPortfolioSubscription(AbstractSubscription):
     tables_names = ["User_Portfolio_{}"]
+    channel_prefixes = ("user.portfolio",)
 
     def __init__(self, scrapper: scrapper_typing):
         self.tables_names = [f"User_Portfolio_test"]
@@ -30,6 +32,7 @@ class UserPortfolioSubscription(AbstractSubscription):
             scrapper=scrapper, request_typo=RequestTypo.PRIVATE
         )
         self.number_of_columns = 12
+        self.record_dtype = self.create_record_dtype()
         self.instrument_name_instrument_id_map = (
             self.scrapper.instrument_name_instrument_id_map
         )
@@ -58,6 +61,11 @@ class UserPortfolioSubscription(AbstractSubscription):
         columns = flatten(columns)
         return columns
 
+    def create_record_dtype(self) -> np.dtype:
+        _types = [np.int64, np.int64]
+        _types.extend([np.float64] * 10)
+        return np.dtype(list(zip(self.create_columns_list(), _types)))
+
     async def _process_response(self, response: dict):
         # SUBSCRIPTION processing
         if response["method"] == "subscription":
@@ -107,10 +115,7 @@ class UserPortfolioSubscription(AbstractSubscription):
             _available_withdrawal_funds,
             _available_funds,
         ]
-        return np.array(_ret_arr)
-
-    def _create_subscription_request(self):
-        self._user_portfolio_changes_subscription_request()
+        return np.array(tuple(_ret_arr), dtype=self.record_dtype)
 
     def _record_to_daemon_database_pipeline(
         self, record_dataframe: DataFrame, tag_of_data: str
@@ -119,8 +124,5 @@ class UserPortfolioSubscription(AbstractSubscription):
             return record_dataframe.iloc[:, 1:]
         return record_dataframe
 
-    def _user_portfolio_changes_subscription_request(self):
-        subscription_message = MSG_LIST.get_user_portfolio_request(
-            currency=self.scrapper.client_currency,
-        )
-        self.scrapper.send_new_request(request=subscription_message)
+    def subscription_channels(self) -> List[str]:
+        return [MSG_LIST.user_portfolio_channel(self.scrapper.client_currency)]
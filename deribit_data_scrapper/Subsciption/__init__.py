@@ -1,5 +1,6 @@
 from .AbstractSubscription import AbstractSubscription, RequestTypo
 from .OrderBookSubscriptionLimitedDepth import OrderBookSubscriptionCONSTANT
+from .OrderBookSubscriptionUnlimitedDepth import OrderBookSubscriptionUNLIMITED
 from .TradesSubscription import TradesSubscription
 from .OwnOrderUpdate import OwnOrdersSubscription
 from .UserPortfolioChanges import UserPortfolioSubscription
\ No newline at end of file
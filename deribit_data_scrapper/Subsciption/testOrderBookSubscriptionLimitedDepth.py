@@ -0,0 +1,113 @@
+import asyncio
+import unittest
+
+import numpy as np
+
+from deribit_data_scrapper.Subsciption.OrderBookSubscriptionLimitedDepth import (
+    OrderBookSubscriptionCONSTANT,
+)
+
+
+class _Instrument:
+    def get_fields(self):
+        return 0, 3000.0, 1700000000, 1
+
+
+class _Scrapper:
+    developConfiguration = {}
+    instrument_manager = None
+
+    def __init__(self, change_only_heartbeat=None):
+        self.configuration = {
+            "user_data": {"test_net": {"client_id": None, "client_secret": None}},
+            "orderBookScrapper": {
+                "test_net": True,
+                "change_only_record": True,
+                "change_only_heartbeat": change_only_heartbeat,
+            },
+        }
+        self.instrument_name_instrument_id_map = {
+            f"ETH-{i}": _Instrument() for i in range(3)
+        }
+
+
+class _Database:
+    def __init__(self):
+        self.rows = []
+
+    async def add_data(self, update_line):
+        self.rows.append(update_line.copy())
+
+
+def book_notification(instrument_name: str, change_id: int, timestamp: int, bid: float) -> dict:
+    return {
+        "method": "subscription",
+        "params": {
+            "channel": f"book.{instrument_name}.none.2.100ms",
+            "data": {
+                "instrument_name": instrument_name,
+                "timestamp": timestamp,
+                "change_id": change_id,
+                "bids": [[bid, 1.0], [bid - 1, 2.0]],
+                "asks": [[bid + 1, 1.0]],
+            },
+        },
+    }
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def record(self, subscription: OrderBookSubscriptionCONSTANT, notifications: list) -> list:
+        database = _Database()
+        subscription.plug_in_record_system(database=database)
+        for notification in notifications:
+            self.loop.run_until_complete(subscription.process_response_from_server(notification))
+        return database.rows
+
+    def test_unchanged_rows_are_not_recorded(self):
+        subscription = OrderBookSubscriptionCONSTANT(scrapper=_Scrapper(), order_book_depth=2)
+        # Buffer grows when number of instruments is bigger than capacity
+        subscription._last_levels = subscription._last_levels[:2]
+        subscription._last_forwarded_timestamp = subscription._last_forwarded_timestamp[:2]
+        notifications = [
+            book_notification("ETH-0", 1, 1000, 100.0),
+            book_notification("ETH-1", 2, 1000, 100.0),
+            book_notification("ETH-0", 3, 1100, 100.0),
+            book_notification("ETH-2", 4, 1100, 50.0),
+            book_notification("ETH-0", 5, 1200, 101.0),
+            book_notification("ETH-1", 6, 1200, 100.0),
+        ]
+        rows = self.record(subscription, notifications)
+
+        self.assertEqual([int(row["EXCHANGE_CHANGE_ID"]) for row in rows], [1, 2, 4, 5])
+        self.assertEqual((subscription.forwarded_rows, subscription.deduplicated_rows), (4, 2))
+        self.assertEqual(subscription._last_levels.shape[0], 4)
+        # Last forwarded levels of ETH-0 are kept in its buffer row
+        level_columns = [
+            column
+            for column in subscription.create_columns_list()
+            if column.startswith(("BID_", "ASK_"))
+        ]
+        np.testing.assert_array_equal(
+            subscription._last_levels[0].view(np.float32), rows[3][level_columns].tolist()
+        )
+
+    def test_heartbeat_row_is_recorded(self):
+        subscription = OrderBookSubscriptionCONSTANT(
+            scrapper=_Scrapper(change_only_heartbeat=1), order_book_depth=2
+        )
+        notifications = [
+            book_notification("ETH-0", change_id, timestamp, 100.0)
+            for change_id, timestamp in enumerate([0, 500, 999, 1000, 1500, 2100])
+        ]
+        rows = self.record(subscription, notifications)
+        self.assertEqual([int(row["TIMESTAMP_VALUE"]) for row in rows], [0, 1000, 2100])
+
+
+if __name__ == "__main__":
+    unittest.main()
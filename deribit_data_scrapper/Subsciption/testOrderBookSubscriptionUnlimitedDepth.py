@@ -0,0 +1,117 @@
+import asyncio
+import unittest
+
+import numpy as np
+
+from deribit_data_scrapper.Subsciption.OrderBookSubscriptionUnlimitedDepth import (
+    OrderBookSubscriptionUNLIMITED,
+)
+
+
+class _Instrument:
+    def get_fields(self):
+        return 0, 3000.0, 1700000000, 1
+
+
+class _Scrapper:
+    developConfiguration = {}
+    instrument_manager = None
+
+    def __init__(self, full_book_snapshot_interval=None):
+        self.configuration = {
+            "user_data": {"test_net": {"client_id": None, "client_secret": None}},
+            "orderBookScrapper": {
+                "test_net": True,
+                "full_book_snapshot_interval": full_book_snapshot_interval,
+            },
+        }
+        self.instrument_name_instrument_id_map = {"ETH-PERPETUAL": _Instrument()}
+
+
+class _Database:
+    def __init__(self):
+        self.rows = []
+
+    async def add_data(self, update_line):
+        self.rows.extend(update_line.tolist())
+
+
+def book_notification(notification_type: str, change_id: int, timestamp: int, bids: list, asks: list) -> dict:
+    return {
+        "method": "subscription",
+        "params": {
+            "channel": "book.ETH-PERPETUAL.100ms",
+            "data": {
+                "type": notification_type,
+                "instrument_name": "ETH-PERPETUAL",
+                "timestamp": timestamp,
+                "change_id": change_id,
+                "prev_change_id": change_id - 1,
+                "bids": bids,
+                "asks": asks,
+            },
+        },
+    }
+
+
+NOTIFICATIONS = [
+    book_notification(
+        "snapshot", 1, 1000, [["new", 99.0, 1.0], ["new", 100.0, 2.0]], [["new", 101.0, 3.0]]
+    ),
+    book_notification("change", 2, 1100, [["delete", 100.0, 0.0]], []),
+    book_notification("change", 3, 1200, [], [["new", 102.0, 4.0], ["change", 101.0, 5.0]]),
+    book_notification("change", 4, 2000, [["change", 99.0, 6.0]], []),
+]
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def record(self, subscription: OrderBookSubscriptionUNLIMITED) -> list:
+        database = _Database()
+        subscription.plug_in_record_system(database=database)
+        for notification in NOTIFICATIONS:
+            self.loop.run_until_complete(subscription.process_response_from_server(notification))
+        # (CHANGE_ID, BASE_SNAPSHOT_ID, SIDE, LEVEL, PRICE, AMOUNT) with SNAPSHOT_ID from 0
+        _first = database.rows[0][0]
+        return [(row[1], row[8] - _first, row[9], row[10], row[11], row[12]) for row in database.rows]
+
+    def test_changed_levels_are_keyed_to_last_full_snapshot(self):
+        subscription = OrderBookSubscriptionUNLIMITED(scrapper=_Scrapper(full_book_snapshot_interval=1))
+        self.assertEqual(
+            self.record(subscription),
+            [
+                (1, 0, 0, 0, 100.0, 2.0),
+                (1, 0, 0, 1, 99.0, 1.0),
+                (1, 0, 1, 0, 101.0, 3.0),
+                # Deleted level
+                (2, 0, 0, 0, 100.0, 0.0),
+                (3, 0, 1, 0, 102.0, 4.0),
+                (3, 0, 1, 1, 101.0, 5.0),
+                # Interval is passed: full snapshot with new base
+                (4, 3, 0, 0, 99.0, 6.0),
+                (4, 3, 1, 0, 101.0, 5.0),
+                (4, 3, 1, 1, 102.0, 4.0),
+            ],
+        )
+
+    def test_zero_interval_records_full_book_after_every_notification(self):
+        subscription = OrderBookSubscriptionUNLIMITED(scrapper=_Scrapper(full_book_snapshot_interval=0))
+        rows = self.record(subscription)
+        self.assertEqual(len(rows), 3 + 2 + 3 + 3)
+        # Every snapshot is its own base
+        self.assertEqual(sorted({row[1] for row in rows}), [0, 1, 2, 3])
+
+    def test_null_interval_records_full_book_only_at_exchange_snapshot(self):
+        subscription = OrderBookSubscriptionUNLIMITED(scrapper=_Scrapper(full_book_snapshot_interval=None))
+        rows = self.record(subscription)
+        self.assertEqual(len(rows), 3 + 1 + 2 + 1)
+        self.assertEqual({row[1] for row in rows}, {0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import logging
+from typing import Callable
+from typing import Dict
+from typing import Tuple
+
+# Private channels of deribit have two-part prefix (user.orders, user.portfolio)
+_TWO_PART_PREFIXES = ("user",)
+
+
+def channel_prefix(channel: str) -> str:
+    """
+    Prefix of deribit channel used as routing key.
+    book.BTC-PERPETUAL.none.10.100ms -> book, user.orders.BTC-PERPETUAL.raw -> user.orders
+    :param channel:
+    :return:
+    """
+    _head, _, _rest = channel.partition(".")
+    if _head in _TWO_PART_PREFIXES:
+        return f"{_head}.{_rest.partition('.')[0]}"
+    return _head
+
+
+class ChannelRouter:
+    """
+    Маршрутизатор subscription уведомлений: префикс канала считается один раз,
+    обработчик находится по dict lookup (O(1)) вместо рассылки сообщения во все подписки.
+    Уведомления каналов без обработчика отбрасываются (unrouted_messages).
+    """
+
+    handlers: Dict[str, Tuple[Callable, ...]]
+    routed_messages: int = 0
+    unrouted_messages: int = 0
+
+    def __init__(self):
+        self.handlers = dict()
+
+    def register(self, prefix: str, handler: Callable):
+        """
+        :param prefix: channel prefix (book, trades, user.orders, user.portfolio)
+        :param handler: callable receiving response
+        :return:
+        """
+        if prefix in self.handlers:
+            logging.warning(f"Channel prefix {prefix} has several handlers")
+        self.handlers[prefix] = self.handlers.get(prefix, tuple()) + (handler,)
+
+    def handlers_of(self, channel: str) -> Tuple[Callable, ...]:
+        """
+        :param channel:
+        :return: handlers of channel (empty tuple if nobody consumes it)
+        """
+        _handlers = self.handlers.get(channel_prefix(channel))
+        if _handlers is None:
+            self.unrouted_messages += 1
+            return tuple()
+        self.routed_messages += 1
+        return _handlers
+
+    def consumes(self, channel: str) -> bool:
+        """
+        :param channel:
+        :return: True if channel has handler (prefilter of MessageDecoder)
+        """
+        return channel_prefix(channel) in self.handlers
@@ -34,43 +34,65 @@ def set_heartbeat(interval=60) -> dict:
     return _msg
 
 
-def make_subscription_all_book(
-    instrument_name: str, type_of_data="book", interval="100ms"
-) -> dict:
-    channel = f"{type_of_data}.{instrument_name}.{interval}"
+def make_subscription_request(channels: list, private: bool = False) -> dict:
+    """
+    One subscribe request for several channels (deribit accepts list of channels)
+    :param channels:
+    :param private: private/subscribe (user.* channels, needs auth)
+    :return:
+    """
     _msg = {
         "jsonrpc": "2.0",
-        "method": f"public/subscribe",
+        "method": "private/subscribe" if private else "public/subscribe",
         "id": 42,
-        "params": {"channels": [channel]},
+        "params": {"channels": list(channels)},
     }
-
     return _msg
 
 
-def make_subscription_constant_book_depth(
+def all_book_channel(instrument_name: str, type_of_data="book", interval="100ms") -> str:
+    return f"{type_of_data}.{instrument_name}.{interval}"
+
+
+def constant_book_depth_channel(
     instrument_name: str, type_of_data="book", interval="100ms", depth=None, group=None
-) -> dict:
+) -> str:
     if not depth:
         warnings.warn("You use constant depth request. Depth need to be passed")
         raise ValueError("No depth")
-    else:
-        if not group:
-            channel = f"{type_of_data}.{instrument_name}.none.{depth}.{interval}"
-        else:
-            warnings.warn(
-                "Highly recommended not to use group. It can be unstable right now"
-            )
-            channel = f"{type_of_data}.{instrument_name}.{group}.{depth}.{interval}"
+    if not group:
+        return f"{type_of_data}.{instrument_name}.none.{depth}.{interval}"
+    warnings.warn("Highly recommended not to use group. It can be unstable right now")
+    return f"{type_of_data}.{instrument_name}.{group}.{depth}.{interval}"
 
-    _msg = {
-        "jsonrpc": "2.0",
-        "method": f"public/subscribe",
-        "id": 42,
-        "params": {"channels": [channel]},
-    }
 
-    return _msg
+def trades_channel(instrument_name: str, interval="100ms") -> str:
+    return f"trades.{instrument_name}.{interval}"
+
+
+def user_orders_channel(instrument_name: str) -> str:
+    return f"user.orders.{instrument_name}.raw"
+
+
+def user_portfolio_channel(currency: AvailableCurrencies.Currency) -> str:
+    return f"user.portfolio.{currency.currency.lower()}"
+
+
+def make_subscription_all_book(
+    instrument_name: str, type_of_data="book", interval="100ms"
+) -> dict:
+    return make_subscription_request(
+        [all_book_channel(instrument_name, type_of_data=type_of_data, interval=interval)]
+    )
+
+
+def make_subscription_constant_book_depth(
+    instrument_name: str, type_of_data="book", interval="100ms", depth=None, group=None
+) -> dict:
+    channel = constant_book_depth_channel(
+        instrument_name, type_of_data=type_of_data, interval=interval, depth=depth, group=group
+    )
+    return make_subscription_request([channel])
 
 
 def unsubscribe_all() -> dict:
@@ -103,7 +125,7 @@ def make_trades_subscription_request_by_instrument(
         "jsonrpc": "2.0",
         "method": "public/subscribe",
         "id": 42,
-        "params": {"channels": [f"trades.{instrument_name}.{interval}"]},
+        "params": {"channels": [trades_channel(instrument_name, interval=interval)]},
     }
     return _msg
 
@@ -113,7 +135,7 @@ def make_user_orders_subscription_request_by_instrument(instrument_name: str):
         "jsonrpc": "2.0",
         "method": "private/subscribe",
         "id": 42,
-        "params": {"channels": [f"user.orders.{instrument_name}.raw"]},
+        "params": {"channels": [user_orders_channel(instrument_name)]},
     }
     return _msg
 
@@ -183,7 +205,7 @@ def get_user_portfolio_request(currency: AvailableCurrencies.Currency) -> dict:
         "jsonrpc": "2.0",
         "method": "private/subscribe",
         "id": 42,
-        "params": {"channels": [f"user.portfolio.{currency.currency.lower()}"]},
+        "params": {"channels": [user_portfolio_channel(currency)]},
     }
 
     return _msg
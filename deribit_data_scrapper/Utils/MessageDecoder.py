@@ -0,0 +1,101 @@
+import json
+import logging
+from typing import Callable
+from typing import Optional
+from typing import Union
+
+# Optional fast decoders, stdlib json is used without them
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+AVAILABLE_DECODERS = ("auto", "orjson", "simdjson", "json")
+
+# Subscription notification of deribit: {"jsonrpc":"2.0","method":"subscription","params":{"channel":"...","data":...}}
+_CHANNEL_MARKER = '"params":{"channel":"'
+_CHANNEL_MARKER_BYTES = _CHANNEL_MARKER.encode()
+
+
+def extract_channel(message: Union[str, bytes]) -> Optional[str]:
+    """
+    Channel of subscription notification found by substring search, without parse of message.
+    :param message: raw websocket frame
+    :return: channel or None if message is not notification (or has unexpected layout)
+    """
+    if isinstance(message, str):
+        _start = message.find(_CHANNEL_MARKER)
+        if _start < 0:
+            return None
+        _start += len(_CHANNEL_MARKER)
+        _end = message.find('"', _start)
+        return message[_start:_end] if _end > 0 else None
+    _start = message.find(_CHANNEL_MARKER_BYTES)
+    if _start < 0:
+        return None
+    _start += len(_CHANNEL_MARKER_BYTES)
+    _end = message.find(b'"', _start)
+    return message[_start:_end].decode() if _end > 0 else None
+
+
+def make_json_loads(backend: str = "auto") -> Callable[[Union[str, bytes]], dict]:
+    """
+    :param backend: auto (orjson -> simdjson -> json) | orjson | simdjson | json.
+    Not installed backend falls back to stdlib json with warning
+    :return: loads function
+    """
+    if backend not in AVAILABLE_DECODERS:
+        raise ValueError(f"Unknown json decoder {backend}, available: {AVAILABLE_DECODERS}")
+    if backend in ("auto", "orjson") and orjson is not None:
+        return orjson.loads
+    if backend in ("auto", "simdjson") and simdjson is not None:
+        _parser = simdjson.Parser()
+
+        def _simdjson_loads(message: Union[str, bytes]) -> dict:
+            if isinstance(message, str):
+                message = message.encode()
+            # recursive - python objects, document is not kept between messages
+            return _parser.parse(message, True)
+
+        return _simdjson_loads
+    if backend not in ("auto", "json"):
+        logging.warning(f"{backend} is not installed, stdlib json is used")
+    return json.loads
+
+
+class MessageDecoder:
+    """
+    Декодер входящих websocket сообщений. Перед разбором json дешевый prefilter достает channel
+    поиском подстроки: уведомления каналов, которые никто не потребляет, отбрасываются без декодирования.
+    Сообщения без channel (ответы на запросы, heartbeat) разбираются всегда.
+    """
+
+    backend: str
+    decoded_messages: int = 0
+    dropped_messages: int = 0
+
+    def __init__(self, backend: str = "auto", consumes: Optional[Callable[[str], bool]] = None):
+        """
+        :param backend: см. make_json_loads
+        :param consumes: channel -> есть ли потребитель. None - prefilter выключен
+        """
+        self.backend = backend
+        self._loads = make_json_loads(backend)
+        self._consumes = consumes
+
+    def decode(self, message: Union[str, bytes]) -> Optional[dict]:
+        """
+        :param message: raw websocket frame
+        :return: response or None if message is dropped by prefilter
+        """
+        if self._consumes is not None:
+            _channel = extract_channel(message)
+            if _channel is not None and not self._consumes(_channel):
+                self.dropped_messages += 1
+                return None
+        self.decoded_messages += 1
+        return self._loads(message)
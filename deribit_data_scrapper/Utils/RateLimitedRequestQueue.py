@@ -0,0 +1,226 @@
+import asyncio
+import concurrent.futures
+import inspect
+import itertools
+import logging
+import time
+from enum import IntEnum
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Union
+
+# Methods that are counted by matching engine credits of Deribit
+MATCHING_ENGINE_METHODS = (
+    "private/buy",
+    "private/sell",
+    "private/edit",
+    "private/edit_by_label",
+    "private/cancel",
+    "private/cancel_all",
+    "private/cancel_all_by_currency",
+    "private/cancel_all_by_instrument",
+    "private/cancel_by_label",
+    "private/close_position",
+)
+SUBSCRIPTION_METHODS = (
+    "public/subscribe",
+    "private/subscribe",
+    "public/unsubscribe",
+    "private/unsubscribe",
+)
+
+
+class RequestPriority(IntEnum):
+    """
+    Smaller value is sent first. Requests of one priority are sent in order of submit.
+    """
+
+    TRADING = 0  # Orders and cancels
+    CONTROL = 1  # Auth, heartbeat answers, other requests
+    SUBSCRIPTION = 2
+
+
+def classify_request(request: dict) -> tuple:
+    """
+    :param request: json-rpc request
+    :return: (priority, is matching engine request)
+    """
+    _method = request.get("method", "")
+    if _method in MATCHING_ENGINE_METHODS:
+        return RequestPriority.TRADING, True
+    if _method in SUBSCRIPTION_METHODS:
+        return RequestPriority.SUBSCRIPTION, False
+    return RequestPriority.CONTROL, False
+
+
+class TokenBucket:
+    """
+    Credit system of Deribit: bucket of burst requests, refilled by rate requests per second.
+    """
+
+    rate: float
+    burst: float
+    tokens: float
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._updated_at = time.monotonic()
+
+    def _refill(self):
+        _now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (_now - self._updated_at) * self.rate)
+        self._updated_at = _now
+
+    def time_until_available(self, cost: float = 1.0) -> float:
+        """
+        :param cost:
+        :return: sec to wait until bucket has cost tokens (0 if available now)
+        """
+        self._refill()
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def consume(self, cost: float = 1.0):
+        self._refill()
+        self.tokens -= cost
+
+
+class RateLimitedRequestQueue:
+    """
+    Неблокирующая очередь исходящих запросов websocket с лимитом по token bucket.
+    Две полосы (matching engine и non-matching) со своими bucket и sender task в event loop клиента,
+    поэтому ордера и отмены не ждут подписки. Внутри полосы запросы отправляются по приоритету
+    (RequestPriority), при равном приоритете - в порядке submit.
+    Future запроса завершается, когда frame отправлен (не когда пришел ответ сервера).
+    """
+
+    loop: asyncio.AbstractEventLoop
+    buckets: Dict[bool, TokenBucket]
+    sent_requests: int = 0
+
+    def __init__(
+        self,
+        send: Callable[[dict], Optional[Awaitable]],
+        loop: asyncio.AbstractEventLoop,
+        matching_engine_rate: float = 5,
+        matching_engine_burst: float = 20,
+        non_matching_rate: float = 20,
+        non_matching_burst: float = 100,
+    ):
+        """
+        :param send: функция отправки запроса в websocket (может вернуть awaitable, sender его дожидается)
+        :param loop: event loop, где работают sender tasks
+        :param matching_engine_rate: запросов в секунду для ордеров/отмен
+        :param matching_engine_burst: максимальный запас запросов для ордеров/отмен
+        :param non_matching_rate: запросов в секунду для остальных запросов
+        :param non_matching_burst: максимальный запас остальных запросов
+        """
+        self._send = send
+        self.loop = loop
+        self.buckets = {
+            True: TokenBucket(rate=matching_engine_rate, burst=matching_engine_burst),
+            False: TokenBucket(rate=non_matching_rate, burst=non_matching_burst),
+        }
+        self._queues: Dict[bool, Optional[asyncio.PriorityQueue]] = {
+            True: None,
+            False: None,
+        }
+        self._sequence = itertools.count()
+        self._sender_tasks = []
+
+    def _lane(self, matching_engine: bool) -> asyncio.PriorityQueue:
+        # Queue and sender are created in event loop at first request of lane
+        if self._queues[matching_engine] is None:
+            self._queues[matching_engine] = asyncio.PriorityQueue()
+            self._sender_tasks.append(
+                self.loop.create_task(self._sender(matching_engine))
+            )
+        return self._queues[matching_engine]
+
+    def submit(self, request: dict) -> asyncio.Future:
+        """
+        Put request to queue. Must be called from event loop of queue.
+        :param request:
+        :return: future completed when request is sent
+        """
+        _priority, _matching_engine = classify_request(request)
+        _future = self.loop.create_future()
+        self._lane(_matching_engine).put_nowait(
+            (_priority, next(self._sequence), request, _future)
+        )
+        return _future
+
+    def submit_threadsafe(self, request: dict) -> concurrent.futures.Future:
+        """
+        Put request to queue from other thread (websocket thread, sync strategies).
+        :param request:
+        :return: concurrent future completed when request is sent
+        """
+        _future = concurrent.futures.Future()
+
+        def _copy_state(source: asyncio.Future):
+            if source.cancelled():
+                _future.cancel()
+            elif source.exception() is not None:
+                _future.set_exception(source.exception())
+            else:
+                _future.set_result(source.result())
+
+        def _submit():
+            self.submit(request).add_done_callback(_copy_state)
+
+        self.loop.call_soon_threadsafe(_submit)
+        return _future
+
+    def send(self, request: dict) -> Union[asyncio.Future, concurrent.futures.Future]:
+        """
+        Submit from any thread: awaitable asyncio future in event loop of queue, concurrent future outside.
+        :param request:
+        :return:
+        """
+        try:
+            _in_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            _in_loop = False
+        if _in_loop:
+            return self.submit(request)
+        return self.submit_threadsafe(request)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues.values() if queue is not None)
+
+    async def _sender(self, matching_engine: bool):
+        _queue = self._queues[matching_engine]
+        _bucket = self.buckets[matching_engine]
+        while True:
+            # Wait for credit before taking request, so request of higher priority submitted meanwhile goes first
+            _wait_time = _bucket.time_until_available()
+            if _wait_time > 0:
+                await asyncio.sleep(_wait_time)
+            _priority, _, request, _future = await _queue.get()
+            _bucket.consume()
+            try:
+                _sent = self._send(request)
+                # Asyncio websocket returns coroutine, frames are written in order of queue
+                if inspect.isawaitable(_sent):
+                    await _sent
+                self.sent_requests += 1
+                if not _future.done():
+                    _future.set_result(request)
+            except Exception as e:
+                logging.error(f"Cannot send request {request.get('method')}: {e}")
+                if not _future.done():
+                    _future.set_exception(e)
+            finally:
+                _queue.task_done()
+
+    def close(self):
+        for _task in self._sender_tasks:
+            _task.cancel()
+        self._sender_tasks = []
@@ -0,0 +1,112 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict
+from typing import Optional
+
+
+@dataclass()
+class SequenceGapStatistics:
+    """
+    Counters of one instrument stream
+    """
+
+    messages: int = 0  # Observed notifications (trades for trade_seq stream)
+    gaps: int = 0  # Breaks of sequence: dropped or throttled notifications
+    missed: int = 0  # Number of skipped sequence numbers (known only for contiguous sequences)
+    out_of_order: int = 0  # Sequence is not bigger than last seen: duplicate or reordered message
+
+
+class SequenceGapTracker:
+    """
+    Трекер последнего увиденного номера последовательности для каждого инструмента.
+    Каждое сообщение проверяется за O(1) (dict lookup), счетчики доступны в реальном времени.
+    Три вида последовательностей Deribit:
+        - chain: change_id + prev_change_id (raw/full book). Разрыв - prev_change_id != последнего change_id;
+        - increment: trade_seq (trades). Разрыв - trade_seq != последний + 1;
+        - monotonic: только change_id (grouped book без prev_change_id). Ловятся только повторы/перестановки.
+    """
+
+    name: str
+    last_seen: Dict[str, int]
+    statistics: Dict[str, SequenceGapStatistics]
+
+    def __init__(self, name: str):
+        """
+        :param name: имя потока для логов
+        """
+        self.name = name
+        self.last_seen = dict()
+        self.statistics = dict()
+
+    def _statistics_of(self, instrument_name: str) -> SequenceGapStatistics:
+        _statistics = self.statistics.get(instrument_name)
+        if _statistics is None:
+            _statistics = self.statistics[instrument_name] = SequenceGapStatistics()
+        return _statistics
+
+    def _register_gap(self, instrument_name: str, expected: int, received: int, missed: int):
+        _statistics = self.statistics[instrument_name]
+        _statistics.gaps += 1
+        _statistics.missed += missed
+        logging.debug(
+            f"{self.name}: gap at {instrument_name}, expected ({expected}), received ({received})"
+        )
+
+    def observe_chain(
+        self, instrument_name: str, change_id: int, prev_change_id: Optional[int], reset: bool = False
+    ) -> bool:
+        """
+        Check change notification against last change_id of instrument.
+        :param instrument_name:
+        :param change_id:
+        :param prev_change_id: None if notification has no prev_change_id (monotonic check only)
+        :param reset: snapshot starts new chain
+        :return: True if notification continues sequence
+        """
+        _statistics = self._statistics_of(instrument_name)
+        _statistics.messages += 1
+        _last = self.last_seen.get(instrument_name)
+        if _last is not None and not reset and change_id <= _last:
+            # Duplicate or replayed notification does not move chain back
+            _statistics.out_of_order += 1
+            return False
+        self.last_seen[instrument_name] = change_id
+        if _last is None or reset:
+            return True
+        if prev_change_id is not None and prev_change_id != _last:
+            self._register_gap(instrument_name, _last, prev_change_id, missed=0)
+            return False
+        return True
+
+    def observe_increment(self, instrument_name: str, sequence: int) -> bool:
+        """
+        Check contiguous sequence number (trade_seq) against last one of instrument.
+        :param instrument_name:
+        :param sequence:
+        :return: True if sequence == last + 1
+        """
+        _statistics = self._statistics_of(instrument_name)
+        _statistics.messages += 1
+        _last = self.last_seen.get(instrument_name)
+        if _last is not None and sequence <= _last:
+            _statistics.out_of_order += 1
+            return False
+        self.last_seen[instrument_name] = sequence
+        if _last is None or sequence == _last + 1:
+            return True
+        self._register_gap(instrument_name, _last + 1, sequence, missed=sequence - _last - 1)
+        return False
+
+    @property
+    def total(self) -> SequenceGapStatistics:
+        """
+        Counters summed over all instruments.
+        :return:
+        """
+        _total = SequenceGapStatistics()
+        for _statistics in self.statistics.values():
+            _total.messages += _statistics.messages
+            _total.gaps += _statistics.gaps
+            _total.missed += _statistics.missed
+            _total.out_of_order += _statistics.out_of_order
+        return _total
@@ -0,0 +1,99 @@
+import logging
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Set
+
+from .MSG_LIST import make_subscription_request
+
+
+class SubscriptionPlanner:
+    """
+    Планировщик подписок: собирает каналы всех подписок, убирает уже запрошенные (requested)
+    и повторы, и отправляет их пачками по chunk_size каналов в одном public/private subscribe запросе
+    вместо запроса на каждый инструмент.
+    requested хранит каналы текущего соединения, при reconnect очищается через reset.
+    """
+
+    chunk_size: int
+    requested: Set[str]
+    duplicated_channels: int = 0
+    sent_requests: int = 0
+
+    def __init__(self, send: Callable[[dict], object], requested: Set[str], chunk_size: int = 100):
+        """
+        :param send: функция отправки запроса (send_new_request клиента)
+        :param requested: множество уже запрошенных каналов (instrument_requested клиента)
+        :param chunk_size: максимальное число каналов в одном subscribe запросе
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self._send = send
+        self.requested = requested
+        self.chunk_size = chunk_size
+        # private flag -> channels in order of add
+        self._pending: Dict[bool, List[str]] = {False: [], True: []}
+        self._pending_set: Set[str] = set()
+
+    def add_channels(self, channels: Iterable[str], private: bool = False) -> int:
+        """
+        Plan channels to be subscribed at next flush.
+        :param channels:
+        :param private: user.* channels are sent with private/subscribe
+        :return: number of new channels
+        """
+        _added = 0
+        for _channel in channels:
+            if _channel in self.requested or _channel in self._pending_set:
+                self.duplicated_channels += 1
+                continue
+            self._pending[private].append(_channel)
+            self._pending_set.add(_channel)
+            _added += 1
+        return _added
+
+    @property
+    def pending_channels(self) -> int:
+        return len(self._pending_set)
+
+    def flush(self) -> list:
+        """
+        Send planned channels, public before private.
+        :return: futures of sent requests (see send_new_request)
+        """
+        _futures = []
+        for _private in (False, True):
+            _channels = self._pending[_private]
+            for _start in range(0, len(_channels), self.chunk_size):
+                _chunk = _channels[_start : _start + self.chunk_size]
+                _futures.append(self._send(make_subscription_request(_chunk, private=_private)))
+                self.requested.update(_chunk)
+                self.sent_requests += 1
+            if _channels:
+                logging.info(
+                    f"Subscribe {len(_channels)} {'private' if _private else 'public'} channels "
+                    f"in {(len(_channels) - 1) // self.chunk_size + 1} requests"
+                )
+            self._pending[_private] = []
+        self._pending_set.clear()
+        return _futures
+
+    def subscribe(self, channels: Iterable[str], private: bool = False) -> list:
+        """
+        Add channels and send them at once (subscription after start).
+        :param channels:
+        :param private:
+        :return:
+        """
+        self.add_channels(channels, private=private)
+        return self.flush()
+
+    def reset(self):
+        """
+        New connection has no subscriptions: forget requested and planned channels.
+        :return:
+        """
+        self.requested.clear()
+        self._pending = {False: [], True: []}
+        self._pending_set.clear()
@@ -1,6 +1,3 @@
-import nest_asyncio
-
-nest_asyncio.apply()
 import asyncio
 from typing import TYPE_CHECKING
 import threading
@@ -51,9 +48,25 @@ class TickerNode:
         if self.connected_strategy is None:
             raise ConnectionError("No strategy plugged to tickerNode")
         else:
+            # Thread design only: event loop of asyncio client is not patched
+            import nest_asyncio
+
+            nest_asyncio.apply()
             self.tickerThread = threading.Thread(target=self.run_ticker_node_task)
             self.tickerThread.start()
 
+    def run_ticker_node_in_loop(self, loop: asyncio.AbstractEventLoop) -> asyncio.Task:
+        """
+        Run ticker node as task of event loop of client (DeribitAsyncClient), without separate thread.
+        Must be called from the loop.
+        :param loop:
+        :return:
+        """
+        if self.connected_strategy is None:
+            raise ConnectionError("No strategy plugged to tickerNode")
+        self.ticker_loop = loop
+        return loop.create_task(self._ticker_worker())
+
     def run_ticker_node_task(self):
         """
         Run ticker node in separate thread. It will ping strategy block with ping_time frequency (in sec).
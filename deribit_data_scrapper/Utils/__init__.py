@@ -1,11 +1,17 @@
 from .AvailableCurrencies import Currency
 from .MSG_LIST import *
 from .mysqlRecording.cleanUpRequestsLimited import *
+from .mysqlRecording.cleanUpRequestsUnlimited import *
 from .mysqlRecording.postDataTemplateLimited import *
 from .AvailableInstrumentType import *
 from .CircularBuffer import CircularBuffer
+from .SequenceGapTracker import SequenceGapTracker, SequenceGapStatistics
 from .AvailableConfigurationRoot import ConfigRoot
 from .OrderStructure import OrderType, OrderStructure, OrderState, convert_deribit_order_status_to_structure, \
     convert_deribit_order_type_to_structure, OrderSide
 from .TickerNode import TickerNode
+from .RateLimitedRequestQueue import RateLimitedRequestQueue, RequestPriority, TokenBucket
+from .SubscriptionPlanner import SubscriptionPlanner
+from .ChannelRouter import ChannelRouter, channel_prefix
+from .MessageDecoder import MessageDecoder, extract_channel, AVAILABLE_DECODERS
 from .AvailableInstrumentType import InstrumentType
@@ -1,3 +1,158 @@
+from datetime import datetime
+from datetime import timezone
+from typing import List
+from typing import Optional
+
+# Composite secondary index for time range extraction: one index range scan instead of CHANGE_ID search
+TIME_INDEX_NAME = "TIME_INSTRUMENT_INDEX"
+TIME_INDEX_COLUMNS = [
+    "TIMESTAMP_VALUE",
+    "INSTRUMENT_INDEX",
+    "INSTRUMENT_MATURITY",
+    "INSTRUMENT_STRIKE",
+]
+# Partition for rows after the last daily partition. Is split by REQUEST_TO_ADD_DAILY_PARTITIONS
+FUTURE_PARTITION_NAME = "p_future"
+DAY_MS = 86_400_000
+
+
+def time_partitioning_options(configuration: dict) -> dict:
+    """
+    Schema options of book/trades tables from mysql section of configuration file.
+    :param configuration:
+    :return:
+    """
+    _mysql = configuration.get("mysql", dict())
+    return dict(
+        time_index=_mysql.get("time_index", True),
+        time_partitioned=_mysql.get("time_partitioned", False),
+        partition_days_ahead=_mysql.get("partition_days_ahead", 7),
+    )
+
+
+def DAILY_PARTITION_NAME(day_start_ms: int) -> str:
+    return "p{}".format(
+        datetime.fromtimestamp(day_start_ms // 1000, tz=timezone.utc).strftime("%Y%m%d")
+    )
+
+
+def DAILY_PARTITIONS_DEFINITIONS(first_day_ms: int, number_of_days: int) -> List[str]:
+    """
+    Definitions of daily (UTC) RANGE partitions on TIMESTAMP_VALUE, partition holds [day start, next day start).
+    :param first_day_ms: start of first day in ms
+    :param number_of_days:
+    :return:
+    """
+    return [
+        "PARTITION {} VALUES LESS THAN ({})".format(
+            DAILY_PARTITION_NAME(first_day_ms + day * DAY_MS),
+            first_day_ms + (day + 1) * DAY_MS,
+        )
+        for day in range(number_of_days)
+    ]
+
+
+def UTC_DAY_START_MS(timestamp: Optional[datetime] = None) -> int:
+    _timestamp = timestamp if timestamp is not None else datetime.now(tz=timezone.utc)
+    _day = _timestamp.astimezone(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    return int(_day.timestamp() * 1000)
+
+
+def TIME_PARTITIONING_CLAUSE(partition_days_ahead: int, first_day_ms: Optional[int] = None) -> str:
+    """
+    PARTITION BY RANGE (TIMESTAMP_VALUE) with daily partitions from first_day_ms (default today)
+    for partition_days_ahead days and catch-all future partition.
+    :param partition_days_ahead:
+    :param first_day_ms:
+    :return:
+    """
+    _first_day_ms = first_day_ms if first_day_ms is not None else UTC_DAY_START_MS()
+    _partitions = DAILY_PARTITIONS_DEFINITIONS(_first_day_ms, partition_days_ahead + 1)
+    _partitions.append(
+        "PARTITION {} VALUES LESS THAN MAXVALUE".format(FUTURE_PARTITION_NAME)
+    )
+    return "\nPARTITION BY RANGE (TIMESTAMP_VALUE) (\n    {}\n)".format(
+        ",\n    ".join(_partitions)
+    )
+
+
+def REQUEST_TO_ADD_DAILY_PARTITIONS(table_name: str, first_day_ms: int, number_of_days: int) -> str:
+    """
+    Split future partition into daily partitions. Future partition is empty when partitions are added ahead,
+    so reorganization does not copy rows.
+    :param table_name:
+    :param first_day_ms: start of first new day in ms
+    :param number_of_days:
+    :return:
+    """
+    _partitions = DAILY_PARTITIONS_DEFINITIONS(first_day_ms, number_of_days)
+    _partitions.append(
+        "PARTITION {} VALUES LESS THAN MAXVALUE".format(FUTURE_PARTITION_NAME)
+    )
+    return "ALTER TABLE {} REORGANIZE PARTITION {} INTO (\n    {}\n)".format(
+        table_name, FUTURE_PARTITION_NAME, ",\n    ".join(_partitions)
+    )
+
+
+def REQUEST_TO_GET_LAST_DAILY_PARTITION_BOUND(table_name: str) -> str:
+    return """SELECT MAX(CAST(PARTITION_DESCRIPTION AS UNSIGNED)) FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = '{}' AND PARTITION_DESCRIPTION != 'MAXVALUE'""".format(
+        table_name
+    )
+
+
+def REQUEST_TO_ADD_TIME_INDEX(table_name: str) -> str:
+    """
+    Online (in place, no lock) creation of composite time index for existing table.
+    :param table_name:
+    :return:
+    """
+    return "ALTER TABLE {} ADD INDEX {} ({}), ALGORITHM=INPLACE, LOCK=NONE".format(
+        table_name, TIME_INDEX_NAME, ", ".join(TIME_INDEX_COLUMNS)
+    )
+
+
+# Exchange sequence columns: book (change_id, prev_change_id) and trades (trade_seq)
+BOOK_SEQUENCE_COLUMNS = ("EXCHANGE_CHANGE_ID", "PREV_CHANGE_ID")
+TRADES_SEQUENCE_COLUMNS = ("TRADE_SEQ",)
+
+
+def REQUEST_TO_ADD_SEQUENCE_COLUMNS(table_name: str, columns: List[str]) -> str:
+    """
+    Instant (metadata only) addition of exchange sequence columns to existing table.
+    :param table_name:
+    :param columns:
+    :return:
+    """
+    return "ALTER TABLE {} {}, ALGORITHM=INSTANT".format(
+        table_name,
+        ", ".join("ADD COLUMN {} bigint null".format(column) for column in columns),
+    )
+
+
+def _TIME_KEYS_AND_OPTIONS(
+    time_index: bool, time_partitioned: bool, partition_days_ahead: int
+) -> tuple:
+    """
+    Primary key column definition, extra key definitions and table options of time indexed table.
+    Partitioning column must be part of primary key, so partitioned table has PK (CHANGE_ID, TIMESTAMP_VALUE).
+    :return: (CHANGE_ID definition, keys definitions, table options)
+    """
+    _keys = ""
+    _options = ""
+    if time_partitioned:
+        _change_id = "CHANGE_ID int not null auto_increment,"
+        _keys += ",\n    primary key (CHANGE_ID, TIMESTAMP_VALUE)"
+        _options = TIME_PARTITIONING_CLAUSE(partition_days_ahead)
+    else:
+        _change_id = "CHANGE_ID int not null auto_increment primary key,"
+    if time_index:
+        _keys += ",\n    index {} ({})".format(TIME_INDEX_NAME, ", ".join(TIME_INDEX_COLUMNS))
+    return _change_id, _keys, _options
+
+
 def REQUEST_TO_CREATE_OWN_ORDERS_TABLE(table_name: str):
     HEADER = "create table {}".format(table_name)
     REQUEST = HEADER
@@ -24,36 +179,56 @@ def REQUEST_TO_CREATE_OWN_ORDERS_TABLE(table_name: str):
     return REQUEST
 
 
-def REQUEST_TO_CREATE_TRADES_TABLE(table_name: str):
+def REQUEST_TO_CREATE_TRADES_TABLE(
+    table_name: str,
+    time_index: bool = True,
+    time_partitioned: bool = False,
+    partition_days_ahead: int = 7,
+):
+    _change_id, _keys, _options = _TIME_KEYS_AND_OPTIONS(
+        time_index, time_partitioned, partition_days_ahead
+    )
     HEADER = "create table {}".format(table_name)
     REQUEST = HEADER
     REQUEST += """
 (
-    CHANGE_ID       int not null auto_increment primary key,
-    TIMESTAMP_VALUE       bigint   null,
-    TRADE_ID        int   null,
+    {}
+    TIMESTAMP_VALUE       bigint   {},
+    TRADE_ID        bigint   null,
     PRICE           float null,
     INSTRUMENT_INDEX tinyint null,
     INSTRUMENT_STRIKE float  null,
     INSTRUMENT_MATURITY int null,
     INSTRUMENT_TYPE int null,
     DIRECTION       tinyint  null,
-    AMOUNT          float null
-);
-"""
+    AMOUNT          float null,
+    TRADE_SEQ       bigint null{}
+){};
+""".format(
+        _change_id, "not null" if time_partitioned else "null", _keys, _options
+    )
     return REQUEST
 
 
-def REQUEST_TO_CREATE_LIMITED_ORDER_BOOK_CONTENT(table_name: str, depth_size: int):
+def REQUEST_TO_CREATE_LIMITED_ORDER_BOOK_CONTENT(
+    table_name: str,
+    depth_size: int,
+    time_index: bool = True,
+    time_partitioned: bool = False,
+    partition_days_ahead: int = 7,
+):
+    _change_id, _keys, _options = _TIME_KEYS_AND_OPTIONS(
+        time_index, time_partitioned, partition_days_ahead
+    )
     HEADER = "create table {}".format(table_name)
     REQUIRED_FIELDS = """(
-    CHANGE_ID int not null auto_increment primary key,
+    {}
     INSTRUMENT_INDEX tinyint null,
     INSTRUMENT_STRIKE float  null,
     INSTRUMENT_MATURITY int null,
     INSTRUMENT_TYPE int null,
     TIMESTAMP_VALUE bigint                           not null,
-    """
+    """.format(_change_id)
     ADDITIONAL_FIELDS_BIDS = """
     BID_{}_PRICE float not null,
     BID_{}_AMOUNT float not null, 
@@ -65,8 +240,8 @@ def REQUEST_TO_CREATE_LIMITED_ORDER_BOOK_CONTENT(table_name: str, depth_size: in
 
     LOWER_HEADER = """
     )
-    comment 'Test Table';
-    """
+    comment 'Test Table'{};
+    """.format(_options)
 
     REQUEST = HEADER + REQUIRED_FIELDS
     for pointer in range(depth_size):
@@ -75,7 +250,12 @@ def REQUEST_TO_CREATE_LIMITED_ORDER_BOOK_CONTENT(table_name: str, depth_size: in
     for pointer in range(depth_size):
         REQUEST += ADDITIONAL_FIELDS_ASKS.format(pointer, pointer)
 
+    for column in BOOK_SEQUENCE_COLUMNS:
+        REQUEST += """
+    {} bigint null,""".format(column)
+
     REQUEST = REQUEST[:-1]
+    REQUEST += _keys
     REQUEST += LOWER_HEADER
 
     return REQUEST
@@ -53,3 +53,39 @@ create table order_book_content
 
 
 """
+def REQUEST_TO_CREATE_ORDER_BOOK_SNAPSHOTS_TABLE(table_name: str):
+    HEADER = "create table {}".format(table_name)
+    REQUEST = HEADER
+    REQUEST += """
+(
+    SNAPSHOT_ID     bigint not null primary key,
+    CHANGE_ID       bigint null,
+    INSTRUMENT_INDEX tinyint null,
+    INSTRUMENT_STRIKE float  null,
+    INSTRUMENT_MATURITY int null,
+    INSTRUMENT_TYPE int null,
+    TIMESTAMP_VALUE bigint not null,
+    PREV_CHANGE_ID  bigint null,
+    BASE_SNAPSHOT_ID bigint not null comment 'SNAPSHOT_ID of last full snapshot of instrument',
+    index TIME_INSTRUMENT_INDEX (TIMESTAMP_VALUE, INSTRUMENT_INDEX, INSTRUMENT_MATURITY, INSTRUMENT_STRIKE)
+)
+    comment 'Order book snapshot header. Levels are at levels table with the same SNAPSHOT_ID';
+"""
+    return REQUEST
+
+
+def REQUEST_TO_CREATE_ORDER_BOOK_LEVELS_TABLE(table_name: str):
+    HEADER = "create table {}".format(table_name)
+    REQUEST = HEADER
+    REQUEST += """
+(
+    SNAPSHOT_ID     bigint   not null,
+    SIDE            tinyint  not null comment '0 - bid, 1 - ask',
+    LEVEL           int      not null comment 'full snapshot: 0 - best price; changes: number of change at side',
+    PRICE           float    not null,
+    AMOUNT          float    not null comment '0 - level deleted',
+    primary key (SNAPSHOT_ID, SIDE, LEVEL)
+)
+    comment 'Order book levels of snapshot (all levels of full snapshot or changed levels)';
+"""
+    return REQUEST
@@ -0,0 +1,265 @@
+"""
+Online migration of existing book/trades tables to time indexed (and daily partitioned) schema.
+
+Index only (ALTER TABLE ... ALGORITHM=INPLACE, LOCK=NONE, writers are not blocked):
+    python -m deribit_data_scrapper.Utils.mysqlRecording.onlineMigration -c configuration.yaml -t TABLE_DEPTH_10 --index-only
+
+Exchange sequence columns (EXCHANGE_CHANGE_ID, PREV_CHANGE_ID for book, TRADE_SEQ for trades; ALGORITHM=INSTANT).
+Run it before scrapper with sequence columns is started:
+    python -m deribit_data_scrapper.Utils.mysqlRecording.onlineMigration -c configuration.yaml -t TABLE_DEPTH_10 Trades_table_test --sequence-columns
+
+Partitioning (MySQL can not partition table in place without lock, so table is rebuilt):
+    python -m deribit_data_scrapper.Utils.mysqlRecording.onlineMigration -c configuration.yaml -t TABLE_DEPTH_10 Trades_table_test
+
+Rebuild: new partitioned table is filled by CHANGE_ID chunks while scrapper keeps writing, then tables
+are swapped by one atomic RENAME and rows written during the last chunk are copied from old table.
+Tables are append only (rows are never updated), so chunks by CHANGE_ID are enough to catch up.
+New table AUTO_INCREMENT starts --auto-increment-gap ahead of old one, CHANGE_ID of copied rows is kept.
+"""
+import argparse
+import logging
+
+import yaml
+
+from deribit_data_scrapper.DataBase.MySQLConnectionPool import MySQLConnectionPool
+from deribit_data_scrapper.Utils.mysqlRecording.cleanUpRequestsLimited import *
+
+NEW_TABLE_SUFFIX = "__partitioned"
+OLD_TABLE_SUFFIX = "__old"
+
+
+def _fetchone(connection, query: str):
+    _cursor = connection.cursor()
+    try:
+        _cursor.execute(query)
+        return _cursor.fetchone()
+    finally:
+        _cursor.close()
+
+
+def _fetchall(connection, query: str):
+    _cursor = connection.cursor()
+    try:
+        _cursor.execute(query)
+        return _cursor.fetchall()
+    finally:
+        _cursor.close()
+
+
+def _execute(connection, query: str):
+    _cursor = connection.cursor()
+    try:
+        _cursor.execute(query)
+        connection.commit()
+        return _cursor.rowcount
+    finally:
+        _cursor.close()
+
+
+def _table_exists(connection, table_name: str) -> bool:
+    return _fetchone(connection, "SHOW TABLES LIKE '{}'".format(table_name)) is not None
+
+
+def _has_time_index(connection, table_name: str) -> bool:
+    return (
+        _fetchone(
+            connection,
+            """SELECT 1 FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = '{}' AND INDEX_NAME = '{}' LIMIT 1""".format(
+                table_name, TIME_INDEX_NAME
+            ),
+        )
+        is not None
+    )
+
+
+def _max_change_id(connection, table_name: str) -> int:
+    _result = _fetchone(connection, "SELECT MAX(CHANGE_ID) FROM {}".format(table_name))
+    return int(_result[0]) if _result[0] is not None else 0
+
+
+def _copy_rows(connection, source: str, target: str, columns: list, start: int, end: int) -> int:
+    """
+    Copy rows with CHANGE_ID in (start, end]. Rows without timestamp go to first partition.
+    """
+    _select = ", ".join(
+        "COALESCE(TIMESTAMP_VALUE, 0)" if column == "TIMESTAMP_VALUE" else column
+        for column in columns
+    )
+    return _execute(
+        connection,
+        "INSERT INTO {} ({}) SELECT {} FROM {} WHERE CHANGE_ID > {} AND CHANGE_ID <= {}".format(
+            target, ", ".join(columns), _select, source, start, end
+        ),
+    )
+
+
+def _copy_chunks(connection, source: str, target: str, columns: list, start: int, chunk_size: int) -> int:
+    """
+    Copy rows after start by chunks until source max CHANGE_ID is reached.
+    :return: last copied CHANGE_ID
+    """
+    _end = _max_change_id(connection, source)
+    while start < _end:
+        _chunk_end = min(start + chunk_size, _end)
+        _rows = _copy_rows(connection, source, target, columns, start, _chunk_end)
+        logging.info(f"{source}: copied CHANGE_ID ({start}, {_chunk_end}], rows = ({_rows})")
+        start = _chunk_end
+    return start
+
+
+def add_time_index(connection, table_name: str):
+    if _has_time_index(connection, table_name):
+        logging.info(f"{table_name}: time index already exists")
+        return
+    _execute(connection, REQUEST_TO_ADD_TIME_INDEX(table_name))
+    logging.info(f"{table_name}: time index added")
+
+
+def add_sequence_columns(connection, table_name: str):
+    """
+    Add missing exchange sequence columns. Trades table is recognized by TRADE_ID column.
+    """
+    _columns = [row[0] for row in _fetchall(connection, "SHOW COLUMNS FROM {}".format(table_name))]
+    _sequence_columns = (
+        TRADES_SEQUENCE_COLUMNS if "TRADE_ID" in _columns else BOOK_SEQUENCE_COLUMNS
+    )
+    _missing = [column for column in _sequence_columns if column not in _columns]
+    if not _missing:
+        logging.info(f"{table_name}: sequence columns already exist")
+        return
+    _execute(connection, REQUEST_TO_ADD_SEQUENCE_COLUMNS(table_name, _missing))
+    logging.info(f"{table_name}: sequence columns {_missing} added")
+
+
+def migrate_to_time_partitioned(
+    connection,
+    table_name: str,
+    partition_days_ahead: int,
+    chunk_size: int,
+    auto_increment_gap: int,
+    keep_old_table: bool,
+):
+    """
+    Rebuild table as daily partitioned by TIMESTAMP_VALUE with composite time index.
+    :param connection: mysql connection
+    :param table_name:
+    :param partition_days_ahead: number of daily partitions after today
+    :param chunk_size: number of CHANGE_ID in one copy statement
+    :param auto_increment_gap: new table AUTO_INCREMENT = old max CHANGE_ID + gap, must be bigger than
+    number of rows written by scrapper while last chunk is copied
+    :param keep_old_table: keep old table as {table_name}__old
+    :return:
+    """
+    _new_table = table_name + NEW_TABLE_SUFFIX
+    _old_table = table_name + OLD_TABLE_SUFFIX
+    for _table in (_new_table, _old_table):
+        if _table_exists(connection, _table):
+            raise NameError(f"Table {_table} already exists. Remove it before migration")
+    if _fetchone(connection, REQUEST_TO_GET_LAST_DAILY_PARTITION_BOUND(table_name))[0] is not None:
+        logging.info(f"{table_name}: already partitioned")
+        return
+
+    _columns = [row[0] for row in _fetchall(connection, "SHOW COLUMNS FROM {}".format(table_name))]
+    _first_timestamp = _fetchone(
+        connection, "SELECT TIMESTAMP_VALUE FROM {} ORDER BY CHANGE_ID LIMIT 1".format(table_name)
+    )
+    _today = UTC_DAY_START_MS()
+    _first_day = (
+        UTC_DAY_START_MS(datetime.fromtimestamp(_first_timestamp[0] // 1000, tz=timezone.utc))
+        if _first_timestamp is not None and _first_timestamp[0]
+        else _today
+    )
+
+    # Empty copy of table: structure changes are instant
+    _execute(connection, "CREATE TABLE {} LIKE {}".format(_new_table, table_name))
+    _execute(
+        connection,
+        "ALTER TABLE {} MODIFY TIMESTAMP_VALUE bigint not null, DROP PRIMARY KEY, "
+        "ADD PRIMARY KEY (CHANGE_ID, TIMESTAMP_VALUE)".format(_new_table),
+    )
+    if not _has_time_index(connection, _new_table):
+        _execute(
+            connection,
+            "ALTER TABLE {} ADD INDEX {} ({})".format(
+                _new_table, TIME_INDEX_NAME, ", ".join(TIME_INDEX_COLUMNS)
+            ),
+        )
+    _execute(
+        connection,
+        "ALTER TABLE {} {}".format(
+            _new_table,
+            TIME_PARTITIONING_CLAUSE(
+                partition_days_ahead=(_today - _first_day) // DAY_MS + partition_days_ahead,
+                first_day_ms=_first_day,
+            ),
+        ),
+    )
+
+    # Copy while scrapper writes to old table
+    _copied = _copy_chunks(connection, table_name, _new_table, _columns, 0, chunk_size)
+    _copied = _copy_chunks(connection, table_name, _new_table, _columns, _copied, chunk_size)
+
+    _execute(
+        connection,
+        "ALTER TABLE {} AUTO_INCREMENT = {}".format(
+            _new_table, _max_change_id(connection, table_name) + auto_increment_gap
+        ),
+    )
+    _execute(
+        connection,
+        "RENAME TABLE {0} TO {1}, {2} TO {0}".format(table_name, _old_table, _new_table),
+    )
+    logging.info(f"{table_name}: partitioned table is swapped in")
+
+    # Rows written to old table after last chunk
+    _copy_chunks(connection, _old_table, table_name, _columns, _copied, chunk_size)
+    if not keep_old_table:
+        _execute(connection, "DROP TABLE {}".format(_old_table))
+    logging.info(f"{table_name}: migration finished")
+
+
+def main():
+    logging.basicConfig(
+        level="INFO",
+        format="%(asctime)s | %(levelname)s %(module)s | %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    parser = argparse.ArgumentParser(
+        description="Online migration of book/trades tables to time indexed, daily partitioned schema"
+    )
+    parser.add_argument("-c", "--configuration", required=True, help="scrapper configuration.yaml")
+    parser.add_argument("-t", "--tables", nargs="+", required=True, help="tables to migrate")
+    parser.add_argument("--index-only", action="store_true", help="only add composite time index in place")
+    parser.add_argument(
+        "--sequence-columns", action="store_true", help="only add exchange change_id/trade_seq columns"
+    )
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="rows in one copy statement")
+    parser.add_argument("--auto-increment-gap", type=int, default=1_000_000)
+    parser.add_argument("--keep-old-table", action="store_true")
+    arguments = parser.parse_args()
+
+    with open(arguments.configuration, "r") as ymlfile:
+        cfg = yaml.load(ymlfile, Loader=yaml.FullLoader)
+
+    pool = MySQLConnectionPool(configuration=cfg["mysql"])
+    with pool.connection() as connection:
+        for table_name in arguments.tables:
+            if arguments.sequence_columns:
+                add_sequence_columns(connection, table_name)
+            elif arguments.index_only:
+                add_time_index(connection, table_name)
+            else:
+                migrate_to_time_partitioned(
+                    connection,
+                    table_name,
+                    partition_days_ahead=cfg["mysql"].get("partition_days_ahead", 7),
+                    chunk_size=arguments.chunk_size,
+                    auto_increment_gap=arguments.auto_increment_gap,
+                    keep_old_table=arguments.keep_old_table,
+                )
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
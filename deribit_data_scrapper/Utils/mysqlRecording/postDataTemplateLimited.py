@@ -22,7 +22,7 @@ def INSERT_MULTIPLE_DATA_VALUES_SYMBOL_TEMPLATE(dataframe: DataFrame) -> str:
             "".join(
                 map(
                     lambda x: "{},".format(x)
-                    if type(x) != np.str_
+                    if not isinstance(x, str)
                     else '"{}",'.format(x),
                     values,
                 )
@@ -30,3 +30,83 @@ def INSERT_MULTIPLE_DATA_VALUES_SYMBOL_TEMPLATE(dataframe: DataFrame) -> str:
             + "),"
         )
     return query[:-1]
+
+
+def INSERT_MULTIPLE_DATA_PARAMETERIZED_TEMPLATE(
+    table_name: str, columns: list, skip_duplicates: bool = False
+) -> str:
+    """
+    INSERT with %s placeholders for cursor.executemany (connector batches rows to multi-row INSERT
+    and escapes values itself).
+    :param table_name:
+    :param columns:
+    :param skip_duplicates: rows with existing primary key are left as is (idempotent insert)
+    :return:
+    """
+    query = "INSERT INTO {} ({}) VALUES ({})".format(
+        table_name, ",".join(columns), ",".join(["%s"] * len(columns))
+    )
+    if skip_duplicates:
+        query += " ON DUPLICATE KEY UPDATE {0}={0}".format(columns[0])
+    return query
+
+
+def LOAD_DATA_LOCAL_INFILE_TEMPLATE(table_name: str, path: str, columns: list) -> str:
+    return (
+        "LOAD DATA LOCAL INFILE '{}' INTO TABLE {} "
+        "FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({})".format(
+            path.replace("\\", "/").replace("'", "\\'"), table_name, ",".join(columns)
+        )
+    )
+
+
+def dataframe_to_parameters(dataframe: DataFrame) -> list:
+    """
+    Rows of dataframe as tuples of python values for executemany. NaN -> NULL.
+    :param dataframe:
+    :return:
+    """
+    _records = dataframe.to_records(index=False)
+    _parameters = _records.tolist()
+    _float_columns = [
+        index
+        for index, name in enumerate(_records.dtype.names)
+        if _records.dtype[name].kind == "f" and np.isnan(_records[name]).any()
+    ]
+    if not _float_columns:
+        return _parameters
+    # Rare case (market orders without price): only rows with NaN are rebuilt
+    _nan_rows = np.flatnonzero(
+        np.any([np.isnan(_records[_records.dtype.names[i]]) for i in _float_columns], axis=0)
+    )
+    for row in _nan_rows:
+        _parameters[row] = tuple(
+            None if isinstance(x, float) and x != x else x for x in _parameters[row]
+        )
+    return _parameters
+
+
+def dataframe_to_tsv(dataframe: DataFrame) -> bytes:
+    """
+    Tab separated rows for LOAD DATA. Every column is converted to text by NumPy at once, NaN -> \\N (NULL).
+    Text conversion of floats is the main cost of load_data mode on client side.
+    :param dataframe:
+    :return:
+    """
+    _columns = []
+    for name in dataframe.columns:
+        _values = dataframe[name].to_numpy()
+        if _values.dtype.kind == "b":
+            _values = _values.astype(np.int8)
+        if _values.dtype.kind in "iu":
+            _text = _values.astype(str)
+        elif _values.dtype.kind == "f":
+            _text = _values.astype(str)
+            _text[np.isnan(_values)] = "\\N"
+        else:
+            _text = np.char.replace(_values.astype(str), "\\", "\\\\")
+            _text = np.char.replace(_text, "\t", "\\t")
+            _text = np.char.replace(_text, "\n", "\\n")
+        _columns.append(_text.tolist())
+
+    return ("\n".join(map("\t".join, zip(*_columns))) + "\n").encode()
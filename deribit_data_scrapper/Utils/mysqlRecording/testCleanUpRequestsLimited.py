@@ -0,0 +1,47 @@
+import unittest
+from datetime import datetime
+from datetime import timezone
+
+from deribit_data_scrapper.Utils.mysqlRecording.cleanUpRequestsLimited import *
+
+FIRST_DAY_MS = 1_700_006_400_000  # 2023-11-15 00:00:00 UTC
+
+
+class MyTestCase(unittest.TestCase):
+    def test_daily_partitions_are_bounded_by_next_day_start(self):
+        self.assertEqual(
+            DAILY_PARTITIONS_DEFINITIONS(FIRST_DAY_MS, 2),
+            [
+                "PARTITION p20231115 VALUES LESS THAN (1700092800000)",
+                "PARTITION p20231116 VALUES LESS THAN (1700179200000)",
+            ],
+        )
+        self.assertEqual(
+            UTC_DAY_START_MS(datetime(2023, 11, 15, 23, 59, tzinfo=timezone.utc)),
+            FIRST_DAY_MS,
+        )
+
+    def test_partitioned_table_has_timestamp_in_primary_key(self):
+        request = REQUEST_TO_CREATE_TRADES_TABLE(
+            "Trades", time_partitioned=True, partition_days_ahead=1
+        )
+        self.assertIn("primary key (CHANGE_ID, TIMESTAMP_VALUE)", request)
+        self.assertNotIn("auto_increment primary key", request)
+        self.assertIn("TIMESTAMP_VALUE       bigint   not null", request)
+        self.assertIn(
+            "index TIME_INSTRUMENT_INDEX (TIMESTAMP_VALUE, INSTRUMENT_INDEX, INSTRUMENT_MATURITY, INSTRUMENT_STRIKE)",
+            request,
+        )
+        self.assertIn("PARTITION p_future VALUES LESS THAN MAXVALUE", request)
+        self.assertIn("TRADE_SEQ       bigint null", request)
+
+        request = REQUEST_TO_CREATE_LIMITED_ORDER_BOOK_CONTENT("Book", 1, time_index=False)
+        self.assertIn("auto_increment primary key", request)
+        self.assertNotIn("index", request)
+        self.assertNotIn("PARTITION", request)
+        # Sequence columns are the last ones, so position based readers of levels keep working
+        self.assertIn("PREV_CHANGE_ID bigint null\n    )", request)
+
+
+if __name__ == "__main__":
+    unittest.main()
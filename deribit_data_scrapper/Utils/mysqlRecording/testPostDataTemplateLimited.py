@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+from pandas import DataFrame
+
+from deribit_data_scrapper.Utils.mysqlRecording.postDataTemplateLimited import *
+
+
+def make_dataframe() -> DataFrame:
+    return DataFrame(
+        {
+            "CHANGE_ID": np.array([1, 2, 3], dtype=np.int64),
+            "PRICE": np.array([100.5, np.nan, 101.0]),
+            "LABEL": ["plain", "tab\there", "line\nback\\slash"],
+        }
+    )
+
+
+class MyTestCase(unittest.TestCase):
+    def test_nan_is_null_parameter(self):
+        parameters = dataframe_to_parameters(make_dataframe())
+
+        self.assertEqual(
+            parameters,
+            [(1, 100.5, "plain"), (2, None, "tab\there"), (3, 101.0, "line\nback\\slash")],
+        )
+        # Python values, connector does not get NumPy scalars
+        self.assertIs(type(parameters[0][0]), int)
+
+    def test_tsv_has_null_marker_and_escaped_text(self):
+        lines = dataframe_to_tsv(make_dataframe()).decode().split("\n")
+
+        self.assertEqual(
+            lines,
+            [
+                "1\t100.5\tplain",
+                "2\t\\N\ttab\\there",
+                "3\t101.0\tline\\nback\\\\slash",
+                "",
+            ],
+        )
+
+    def test_load_data_query_quotes_path(self):
+        self.assertEqual(
+            LOAD_DATA_LOCAL_INFILE_TEMPLATE("Trades", "C:\\tmp\\it's.tsv", ["CHANGE_ID", "PRICE"]),
+            "LOAD DATA LOCAL INFILE 'C:/tmp/it\\'s.tsv' INTO TABLE Trades "
+            "FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' (CHANGE_ID,PRICE)",
+        )
+
+    def test_executemany_and_values_modes_have_same_rows(self):
+        dataframe = DataFrame(
+            {"CHANGE_ID": np.arange(7, dtype=np.int64), "PRICE": np.arange(7) / 2}
+        )
+        values_query = INSERT_MULTIPLE_DATA_VALUES_SYMBOL_TEMPLATE(dataframe)
+        parameters = dataframe_to_parameters(dataframe)
+
+        self.assertEqual(len(parameters), values_query.count("),(") + 1)
+        self.assertEqual(
+            INSERT_MULTIPLE_DATA_PARAMETERIZED_TEMPLATE("Trades", list(dataframe.columns)),
+            "INSERT INTO Trades (CHANGE_ID,PRICE) VALUES (%s,%s)",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+from deribit_data_scrapper.Utils.ChannelRouter import channel_prefix
+from deribit_data_scrapper.Utils.ChannelRouter import ChannelRouter
+
+
+class MyTestCase(unittest.TestCase):
+    def test_channel_prefix(self):
+        self.assertEqual(channel_prefix("book.BTC-PERPETUAL.none.10.100ms"), "book")
+        self.assertEqual(channel_prefix("book.BTC-PERPETUAL.100ms"), "book")
+        self.assertEqual(channel_prefix("trades.BTC-PERPETUAL.100ms"), "trades")
+        self.assertEqual(channel_prefix("user.orders.BTC-PERPETUAL.raw"), "user.orders")
+        self.assertEqual(channel_prefix("user.portfolio.btc"), "user.portfolio")
+
+    def test_message_goes_only_to_handler_of_its_channel(self):
+        router = ChannelRouter()
+        router.register("book", "book_handler")
+        router.register("user.orders", "orders_handler")
+
+        self.assertEqual(router.handlers_of("book.ETH-PERPETUAL.none.1.100ms"), ("book_handler",))
+        self.assertEqual(router.handlers_of("user.orders.ETH-PERPETUAL.raw"), ("orders_handler",))
+        # Nobody consumes trades and portfolio
+        self.assertEqual(router.handlers_of("trades.ETH-PERPETUAL.100ms"), tuple())
+        self.assertEqual(router.handlers_of("user.portfolio.eth"), tuple())
+        self.assertEqual((router.routed_messages, router.unrouted_messages), (2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
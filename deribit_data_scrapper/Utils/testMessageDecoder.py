@@ -0,0 +1,49 @@
+import json
+import unittest
+
+from deribit_data_scrapper.Utils.ChannelRouter import ChannelRouter
+from deribit_data_scrapper.Utils.MessageDecoder import AVAILABLE_DECODERS
+from deribit_data_scrapper.Utils.MessageDecoder import extract_channel
+from deribit_data_scrapper.Utils.MessageDecoder import MessageDecoder
+
+BOOK_MESSAGE = (
+    '{"jsonrpc":"2.0","method":"subscription","params":{"channel":"book.ETH-PERPETUAL.none.1.100ms",'
+    '"data":{"timestamp":1700000000000,"instrument_name":"ETH-PERPETUAL","change_id":7,'
+    '"bids":[[2000.5,10.0]],"asks":[[2001.0,3.0]]}}}'
+)
+TRADES_MESSAGE = (
+    '{"jsonrpc":"2.0","method":"subscription","params":{"channel":"trades.ETH-PERPETUAL.100ms",'
+    '"data":[{"trade_seq":1,"price":2000.5}]}}'
+)
+RESULT_MESSAGE = '{"jsonrpc":"2.0","id":42,"result":["trades.ETH-PERPETUAL.100ms"]}'
+
+
+class MyTestCase(unittest.TestCase):
+    def test_extract_channel(self):
+        self.assertEqual(extract_channel(BOOK_MESSAGE), "book.ETH-PERPETUAL.none.1.100ms")
+        self.assertEqual(extract_channel(TRADES_MESSAGE.encode()), "trades.ETH-PERPETUAL.100ms")
+        self.assertIsNone(extract_channel(RESULT_MESSAGE))
+
+    def test_all_backends_decode_same_response(self):
+        for backend in AVAILABLE_DECODERS:
+            # Not installed backends fall back to stdlib json
+            decoder = MessageDecoder(backend=backend)
+            self.assertEqual(decoder.decode(BOOK_MESSAGE), json.loads(BOOK_MESSAGE))
+            self.assertEqual(decoder.decode(BOOK_MESSAGE.encode()), json.loads(BOOK_MESSAGE))
+        with self.assertRaises(ValueError):
+            MessageDecoder(backend="ujson")
+
+    def test_unconsumed_channels_are_dropped_before_decoding(self):
+        router = ChannelRouter()
+        router.register("book", "book_handler")
+        decoder = MessageDecoder(consumes=router.consumes)
+
+        self.assertIsNotNone(decoder.decode(BOOK_MESSAGE))
+        self.assertIsNone(decoder.decode(TRADES_MESSAGE))
+        # Responses to requests are always decoded
+        self.assertEqual(decoder.decode(RESULT_MESSAGE)["id"], 42)
+        self.assertEqual((decoder.decoded_messages, decoder.dropped_messages), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from deribit_data_scrapper.Utils import MSG_LIST
+from deribit_data_scrapper.Utils.RateLimitedRequestQueue import RateLimitedRequestQueue
+
+
+def subscription(number: int) -> dict:
+    return MSG_LIST.make_trades_subscription_request_by_instrument(
+        instrument_name=f"ETH-{number}"
+    )
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.sent = []
+
+    def tearDown(self):
+        # Let cancelled senders finish
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+
+    def make_queue(self, **limits) -> RateLimitedRequestQueue:
+        return RateLimitedRequestQueue(send=self.sent.append, loop=self.loop, **limits)
+
+    def test_orders_and_control_requests_jump_ahead_of_subscriptions(self):
+        queue = self.make_queue(non_matching_rate=50, non_matching_burst=1)
+
+        async def _submit():
+            futures = [queue.submit(subscription(i)) for i in range(5)]
+            # Let first subscription take the only credit
+            await asyncio.sleep(0)
+            futures.append(queue.submit(MSG_LIST.test_message()))
+            futures.append(queue.submit(MSG_LIST.cancel_order_request(order_id=1)))
+            await asyncio.gather(*futures)
+
+        self.loop.run_until_complete(_submit())
+        queue.close()
+        methods = [request["method"] for request in self.sent]
+        # Cancel has own matching engine credits and does not wait
+        self.assertEqual(methods[:3], ["public/subscribe", "private/cancel", "public/test"])
+        self.assertEqual(methods.count("public/subscribe"), 5)
+
+    def test_requests_are_limited_by_token_bucket_without_blocking_loop(self):
+        queue = self.make_queue(non_matching_rate=100, non_matching_burst=10)
+
+        async def _submit():
+            start = time.monotonic()
+            futures = [queue.submit(subscription(i)) for i in range(30)]
+            # Submit returns immediately
+            self.assertLess(time.monotonic() - start, 0.01)
+            await asyncio.gather(*futures)
+            return time.monotonic() - start
+
+        elapsed = self.loop.run_until_complete(_submit())
+        queue.close()
+        # 10 requests of burst, 20 by refill of 100 requests per sec
+        self.assertGreaterEqual(elapsed, 0.18)
+        # Requests of one priority keep order of submit
+        self.assertEqual(
+            [request["params"]["channels"][0] for request in self.sent],
+            [f"trades.ETH-{i}.100ms" for i in range(30)],
+        )
+
+    def test_request_from_other_thread_gets_concurrent_future(self):
+        queue = self.make_queue()
+        thread = threading.Thread(target=self.loop.run_forever)
+        thread.start()
+        try:
+            future = queue.send(MSG_LIST.test_message())
+            self.assertEqual(future.result(timeout=1)["method"], "public/test")
+        finally:
+            self.loop.call_soon_threadsafe(queue.close)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            thread.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
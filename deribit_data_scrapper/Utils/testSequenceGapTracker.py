@@ -0,0 +1,48 @@
+import unittest
+
+from deribit_data_scrapper.Utils.SequenceGapTracker import SequenceGapTracker
+
+
+class MyTestCase(unittest.TestCase):
+    def test_change_id_chain_counts_dropped_notifications(self):
+        tracker = SequenceGapTracker(name="book")
+        self.assertTrue(tracker.observe_chain("ETH-PERPETUAL", 10, None, reset=True))
+        self.assertTrue(tracker.observe_chain("ETH-PERPETUAL", 12, 10))
+        # Notification 12 -> 15 was dropped
+        self.assertFalse(tracker.observe_chain("ETH-PERPETUAL", 20, 15))
+        self.assertFalse(tracker.observe_chain("ETH-PERPETUAL", 20, 15))
+        # Other instrument has own chain
+        self.assertTrue(tracker.observe_chain("BTC-PERPETUAL", 5, 4))
+        # Snapshot restarts chain
+        self.assertTrue(tracker.observe_chain("ETH-PERPETUAL", 30, None, reset=True))
+
+        statistics = tracker.statistics["ETH-PERPETUAL"]
+        self.assertEqual((statistics.messages, statistics.gaps, statistics.out_of_order), (5, 1, 1))
+        self.assertEqual(tracker.total.messages, 6)
+
+    def test_duplicate_notification_does_not_break_chain(self):
+        tracker = SequenceGapTracker(name="book")
+        self.assertTrue(tracker.observe_chain("ETH-PERPETUAL", 1, None))
+        self.assertTrue(tracker.observe_chain("ETH-PERPETUAL", 2, 1))
+        # Replayed notification
+        self.assertFalse(tracker.observe_chain("ETH-PERPETUAL", 1, None))
+        self.assertTrue(tracker.observe_chain("ETH-PERPETUAL", 3, 2))
+
+        statistics = tracker.statistics["ETH-PERPETUAL"]
+        self.assertEqual((statistics.gaps, statistics.out_of_order), (0, 1))
+        self.assertEqual(tracker.last_seen["ETH-PERPETUAL"], 3)
+
+    def test_trade_seq_counts_missed_trades(self):
+        tracker = SequenceGapTracker(name="trades")
+        for trade_seq in (1, 2, 5, 6, 6, 9):
+            tracker.observe_increment("ETH-PERPETUAL", trade_seq)
+
+        statistics = tracker.statistics["ETH-PERPETUAL"]
+        self.assertEqual(
+            (statistics.gaps, statistics.missed, statistics.out_of_order), (2, 4, 1)
+        )
+        self.assertEqual(tracker.last_seen["ETH-PERPETUAL"], 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from deribit_data_scrapper.Utils.SubscriptionPlanner import SubscriptionPlanner
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.requested = set()
+        self.planner = SubscriptionPlanner(
+            send=self.sent.append, requested=self.requested, chunk_size=3
+        )
+
+    def test_channels_are_deduplicated_and_sent_in_chunks(self):
+        self.planner.add_channels([f"book.ETH-{i}.100ms" for i in range(5)])
+        # Same instrument from extra instruments
+        self.planner.add_channels(["book.ETH-4.100ms", "trades.ETH-0.100ms"])
+        self.planner.add_channels(["user.orders.ETH-0.raw"], private=True)
+        self.assertEqual(self.planner.pending_channels, 7)
+        self.planner.flush()
+
+        self.assertEqual(
+            [(request["method"], len(request["params"]["channels"])) for request in self.sent],
+            [("public/subscribe", 3), ("public/subscribe", 3), ("private/subscribe", 1)],
+        )
+        self.assertEqual(self.planner.duplicated_channels, 1)
+        self.assertEqual(len(self.requested), 7)
+
+        # Already requested channel is not sent again
+        self.planner.subscribe(["book.ETH-0.100ms"])
+        self.assertEqual(len(self.sent), 3)
+        self.planner.subscribe(["book.ETH-9.100ms"])
+        self.assertEqual(self.sent[-1]["params"]["channels"], ["book.ETH-9.100ms"])
+
+    def test_reset_allows_resubscribe_after_reconnect(self):
+        self.planner.subscribe(["trades.ETH-0.100ms"])
+        self.planner.reset()
+        self.assertEqual(len(self.requested), 0)
+        self.planner.subscribe(["trades.ETH-0.100ms"])
+        self.assertEqual(len(self.sent), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
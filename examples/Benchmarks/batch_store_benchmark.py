@@ -0,0 +1,168 @@
+"""
+Benchmark of AbstractDataManager.add_data end to end for depth 1 and depth 10 order books.
+Compares previous per-row DataFrame.iloc batch tables with CircularBatchStore path
+(as_records conversion, write_block, flush trigger and DataFrame of flushed table).
+Rows are given as subscriptions give them: float ndarray row and typed record built from tuple of row,
+conversion is done inside timed loop. Database write is no-op.
+
+Run from root folder:
+    python -m examples.Benchmarks.batch_store_benchmark
+"""
+import asyncio
+import time
+
+import numpy as np
+from pandas import DataFrame
+
+from deribit_data_scrapper.DataBase.AbstractDataSaverManager import AbstractDataManager
+
+NUMBER_OF_TABLES = 5
+SIZE_OF_TABLE = 1_000
+NUMBER_OF_ROWS = 50_000
+
+
+def order_book_columns(depth: int) -> list:
+    columns = [
+        "CHANGE_ID",
+        "INSTRUMENT_INDEX",
+        "INSTRUMENT_STRIKE",
+        "INSTRUMENT_MATURITY",
+        "INSTRUMENT_TYPE",
+        "TIMESTAMP_VALUE",
+    ]
+    columns.extend(f"BID_{x}_{y}" for x in range(depth) for y in ("PRICE", "AMOUNT"))
+    columns.extend(f"ASK_{x}_{y}" for x in range(depth) for y in ("PRICE", "AMOUNT"))
+    return columns
+
+
+def order_book_record_dtype(columns: list) -> np.dtype:
+    types = [np.int64, np.int8, np.float32, np.int32, np.int8, np.int64]
+    types.extend([np.float32] * (len(columns) - len(types)))
+    return np.dtype(list(zip(columns, types)))
+
+
+class _Scrapper:
+    developConfiguration = {"DATA_MANAGER": {"SHOW_WHEN_DATA_TRANSFERS": False}}
+
+
+class _Subscription:
+    scrapper = _Scrapper()
+    tables_names = ["BENCHMARK"]
+
+    def __init__(self, depth: int):
+        self.columns = order_book_columns(depth)
+        self.number_of_columns = len(self.columns)
+        self.record_dtype = order_book_record_dtype(self.columns)
+
+    def create_columns_list(self) -> list:
+        return self.columns
+
+    def create_record_dtype(self) -> np.dtype:
+        return self.record_dtype
+
+
+class _NullDaemon(AbstractDataManager):
+    """
+    Record system without database, counts flushed rows.
+    """
+
+    number_of_flushed_rows: int = 0
+
+    async def _connect_to_database(self):
+        pass
+
+    async def _clean_exist_database(self):
+        pass
+
+    async def _create_not_exist_database(self):
+        pass
+
+    async def _place_data_to_database(self, record_dataframe: DataFrame) -> int:
+        self.number_of_flushed_rows += len(record_dataframe)
+        return 1
+
+
+class _IlocDaemon(_NullDaemon):
+    """
+    Previous batch system: dict of NaN DataFrames, every row is written by DataFrame.iloc.
+    """
+
+    def _create_tmp_batch_tables(self):
+        self.batch_number_of_tables = NUMBER_OF_TABLES
+        self.batch_size_of_table = SIZE_OF_TABLE
+        self.batch_mutable_pointer = 0
+        self.batch_currently_selected_table = 0
+        _local = np.zeros(shape=(SIZE_OF_TABLE, self.subscription_type.number_of_columns))
+        _local[:] = np.NaN
+        self.iloc_tables = {
+            _: DataFrame(_local.copy(), columns=self.subscription_type.create_columns_list())
+            for _ in range(NUMBER_OF_TABLES)
+        }
+
+    async def add_data(self, update_line: np.ndarray):
+        assert update_line.shape[0] == self.subscription_type.number_of_columns
+        self.iloc_tables[self.batch_currently_selected_table].iloc[
+            self.batch_mutable_pointer
+        ] = update_line
+        self.batch_mutable_pointer += 1
+        if self.batch_mutable_pointer >= self.batch_size_of_table:
+            self.batch_mutable_pointer = 0
+            await self._place_data_to_database(
+                record_dataframe=self.iloc_tables[self.batch_currently_selected_table]
+            )
+            self.batch_currently_selected_table += 1
+            if self.batch_currently_selected_table >= self.batch_number_of_tables:
+                self.batch_currently_selected_table = 0
+
+
+def configuration() -> dict:
+    return {
+        "orderBookScrapper": {"enable_database_record": False},
+        "record_system": {
+            "use_batches_to_record": True,
+            "number_of_tmp_tables": NUMBER_OF_TABLES,
+            "size_of_tmp_batch_table": SIZE_OF_TABLE,
+            "clean_database_at_startup": False,
+        },
+    }
+
+
+def bench(daemon_class, depth: int, rows: np.ndarray, typed: bool) -> float:
+    loop = asyncio.new_event_loop()
+    subscription = _Subscription(depth)
+    daemon = daemon_class(configuration(), subscription, loop)
+    loop.run_until_complete(asyncio.sleep(0))
+    record_dtype = subscription.record_dtype
+
+    async def _ingest():
+        for row in rows:
+            if typed:
+                # Conversion of subscription (extract_data_from_response)
+                row = np.array(tuple(row.tolist()), dtype=record_dtype)
+            await daemon.add_data(update_line=row)
+
+    start = time.perf_counter()
+    loop.run_until_complete(_ingest())
+    elapsed = time.perf_counter() - start
+    assert daemon.number_of_flushed_rows == len(rows) - len(rows) % SIZE_OF_TABLE
+    loop.close()
+    return elapsed
+
+
+if __name__ == "__main__":
+    print(
+        f"{'depth':>6} | {'DataFrame.iloc rows/sec':>24} | {'add_data float rows/sec':>24} | "
+        f"{'add_data record rows/sec':>25} | speedup"
+    )
+    for depth in (1, 10):
+        _rows = np.random.random(size=(NUMBER_OF_ROWS, len(order_book_columns(depth))))
+
+        # DataFrame.iloc path is slow, so it is measured on a smaller sample
+        _iloc_rows = _rows[: NUMBER_OF_ROWS // 10]
+        iloc_rate = len(_iloc_rows) / bench(_IlocDaemon, depth, _iloc_rows, typed=False)
+        float_rate = len(_rows) / bench(_NullDaemon, depth, _rows, typed=False)
+        record_rate = len(_rows) / bench(_NullDaemon, depth, _rows, typed=True)
+        print(
+            f"{depth:>6} | {iloc_rate:>24,.0f} | {float_rate:>24,.0f} | {record_rate:>25,.0f} | "
+            f"x{min(float_rate, record_rate) / iloc_rate:.1f}"
+        )
@@ -0,0 +1,128 @@
+"""
+Benchmark of DeribitClient._on_message dispatch.
+Compares previous broadcast of every message to every subscription (one run_coroutine_threadsafe per
+subscription, every subscription re-checks channel) with ChannelRouter dispatch (one handoff to consumer
+of channel). Four subscriptions (book, trades, user.orders, user.portfolio), stream of depth 10 book
+and trades notifications. Messages/sec includes processing of handed off coroutines by event loop thread.
+
+Run from root folder:
+    python -m examples.Benchmarks.channel_router_benchmark
+"""
+import asyncio
+import json
+import random
+import time
+from threading import Thread
+
+from deribit_data_scrapper.Scrapper.TradingInterface import DeribitClient
+from deribit_data_scrapper.Utils import ChannelRouter
+from deribit_data_scrapper.Utils import MessageDecoder
+
+NUMBER_OF_MESSAGES = 50_000
+NUMBER_OF_INSTRUMENTS = 300
+DEPTH = 10
+
+
+class _Subscription:
+    """
+    Subscription with filter of previous broadcast design (channel is checked in subscription)
+    """
+
+    def __init__(self, channel_prefix: str):
+        self.channel_prefixes = (channel_prefix,)
+        self.processed = 0
+
+    async def process_response_from_server(self, response: dict):
+        if response["method"] == "subscription":
+            if response["params"]["channel"].startswith(self.channel_prefixes[0]):
+                self.processed += 1
+
+
+def broadcast_on_message(client: DeribitClient, websocket, message):
+    """
+    Subscription part of _on_message before ChannelRouter
+    """
+    response = json.loads(message)
+    if "method" in response:
+        for action, sub in client.subscriptions_objects.items():
+            asyncio.run_coroutine_threadsafe(
+                sub.process_response_from_server(response=response), loop=client.loop
+            )
+
+
+def make_messages() -> list:
+    messages = []
+    for _ in range(NUMBER_OF_MESSAGES):
+        instrument = f"BTC-29DEC23-{random.randint(0, NUMBER_OF_INSTRUMENTS) * 1000}-C"
+        if random.random() < 0.9:
+            data = {
+                "instrument_name": instrument,
+                "timestamp": 1700000000000,
+                "change_id": random.randint(0, 10**9),
+                "bids": [[0.01 * i, 10.0] for i in range(DEPTH)],
+                "asks": [[0.02 * i, 10.0] for i in range(DEPTH)],
+            }
+            channel = f"book.{instrument}.none.{DEPTH}.100ms"
+        else:
+            data = [{"instrument_name": instrument, "trade_seq": 1, "price": 0.01}]
+            channel = f"trades.{instrument}.100ms"
+        messages.append(
+            json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "method": "subscription",
+                    "params": {"channel": channel, "data": data},
+                }
+            )
+        )
+    return messages
+
+
+def make_client(loop: asyncio.AbstractEventLoop) -> DeribitClient:
+    client = DeribitClient.__new__(DeribitClient)
+    client.loop = loop
+    client.subscriptions_objects = {
+        "OrderBook": _Subscription("book"),
+        "Trades": _Subscription("trades"),
+        "OwnOrderChange": _Subscription("user.orders"),
+        "Portfolio": _Subscription("user.portfolio"),
+    }
+    client.channel_router = ChannelRouter()
+    for action, sub in client.subscriptions_objects.items():
+        for _prefix in sub.channel_prefixes:
+            client.channel_router.register(_prefix, sub.process_response_from_server)
+    # Same decoder as broadcast, see json_decoder_benchmark for decoders
+    client.message_decoder = MessageDecoder(backend="json")
+    return client
+
+
+def bench(on_message, messages: list) -> float:
+    loop = asyncio.new_event_loop()
+    thread = Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    client = make_client(loop)
+
+    start = time.perf_counter()
+    for message in messages:
+        on_message(client, None, message)
+    # Handed off coroutines are done when event loop reaches this one
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result()
+    elapsed = time.perf_counter() - start
+
+    assert sum(sub.processed for sub in client.subscriptions_objects.values()) == len(messages)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+    return elapsed
+
+
+if __name__ == "__main__":
+    random.seed(1)
+    messages = make_messages()
+    print(f"{NUMBER_OF_MESSAGES} messages, 4 subscriptions")
+    for name, on_message in (
+        ("broadcast", broadcast_on_message),
+        ("ChannelRouter", DeribitClient._on_message),
+    ):
+        elapsed = bench(on_message, messages)
+        print(f"{name:>14}: {NUMBER_OF_MESSAGES / elapsed:>10.0f} messages/sec")
@@ -0,0 +1,163 @@
+"""
+End-to-end latency of DeribitClient (websocket-client thread + run_coroutine_threadsafe to event loop thread)
+and DeribitAsyncClient (websockets, one event loop). Local server process sends depth 10 book notifications
+with send time (CLOCK_MONOTONIC, shared between processes) in timestamp field, latency is measured
+when subscription coroutine processes notification.
+Modes: paced - notification every SEND_INTERVAL sec (latency); burst - all notifications at once
+(messages/sec processed by client, latency is queueing time). On machine with one core server and client
+share CPU, paced latency mostly shows scheduling of processes.
+
+Run from root folder:
+    python -m examples.Benchmarks.client_latency_benchmark
+"""
+import asyncio
+import json
+import multiprocessing
+import statistics
+import time
+from collections import deque
+from threading import Event
+from threading import Thread
+
+import websockets
+
+from deribit_data_scrapper.Scrapper.AsyncTradingInterface import DeribitAsyncClient
+from deribit_data_scrapper.Scrapper.TradingInterface import DeribitClient
+from deribit_data_scrapper.Utils import ChannelRouter
+from deribit_data_scrapper.Utils import MessageDecoder
+from deribit_data_scrapper.Utils import RateLimitedRequestQueue
+
+NUMBER_OF_MESSAGES = 20_000
+SEND_INTERVAL = 0.0005
+DEPTH = 10
+PORT = 8765
+
+
+def book_message(number: int) -> str:
+    return json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "method": "subscription",
+            "params": {
+                "channel": f"book.BTC-PERPETUAL.none.{DEPTH}.100ms",
+                "data": {
+                    "timestamp": time.monotonic_ns(),
+                    "instrument_name": "BTC-PERPETUAL",
+                    "change_id": number,
+                    "bids": [[30000.0 - i, 10.0] for i in range(DEPTH)],
+                    "asks": [[30001.0 + i, 10.0] for i in range(DEPTH)],
+                },
+            },
+        },
+        separators=(",", ":"),
+    )
+
+
+def run_server():
+    async def _stream(websocket, path):
+        for number in range(NUMBER_OF_MESSAGES):
+            await websocket.send(book_message(number))
+            if path == "/paced":
+                await asyncio.sleep(SEND_INTERVAL)
+        await websocket.wait_closed()
+
+    async def _serve():
+        async with websockets.serve(_stream, "localhost", PORT, max_size=None):
+            await asyncio.Future()
+
+    asyncio.run(_serve())
+
+
+class _Subscription:
+    channel_prefixes = ("book",)
+
+    def __init__(self):
+        self.latencies = []
+        self.processed_at = []
+        self.done = Event()
+
+    async def process_response_from_server(self, response: dict):
+        _now = time.monotonic_ns()
+        self.processed_at.append(_now)
+        self.latencies.append(_now - response["params"]["data"]["timestamp"])
+        if len(self.latencies) == NUMBER_OF_MESSAGES:
+            self.done.set()
+
+    def result(self) -> tuple:
+        return self.latencies, self.processed_at
+
+
+def make_client(client_class, loop: asyncio.AbstractEventLoop, mode: str):
+    client = client_class.__new__(client_class)
+    Thread.__init__(client, daemon=True)
+    client.loop = loop
+    client.exchange_version = f"ws://localhost:{PORT}/{mode}"
+    client.configuration = {"orderBookScrapper": {"hearth_beat_time": 60}}
+    client.enable_traceback = False
+    client.websocket = None
+    client.subscriptions_objects = {"OrderBook": _Subscription()}
+    client.channel_router = ChannelRouter()
+    client.channel_router.register(
+        "book", client.subscriptions_objects["OrderBook"].process_response_from_server
+    )
+    client.message_decoder = MessageDecoder()
+    client.subscription_type = dict()
+    client.request_queue = RateLimitedRequestQueue(send=client._send_frame, loop=loop)
+    client._dispatched = deque()
+    # No subscribe requests to local server
+    client._on_open = lambda websocket: None
+    return client
+
+
+def bench_thread_client(mode: str) -> tuple:
+    loop = asyncio.new_event_loop()
+    Thread(target=loop.run_forever, daemon=True).start()
+    client = make_client(DeribitClient, loop, mode)
+    client.start()
+    client.subscriptions_objects["OrderBook"].done.wait()
+    # Threads of client are stopped with benchmark process
+    return client.subscriptions_objects["OrderBook"].result()
+
+
+def bench_async_client(mode: str) -> tuple:
+    loop = asyncio.new_event_loop()
+    client = make_client(DeribitAsyncClient, loop, mode)
+
+    async def _run():
+        task = loop.create_task(client.run_async())
+        while not client.subscriptions_objects["OrderBook"].done.is_set():
+            await asyncio.sleep(0.1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    loop.run_until_complete(_run())
+    return client.subscriptions_objects["OrderBook"].result()
+
+
+def report(name: str, result: tuple):
+    latencies, processed_at = result
+    latencies = sorted(latency / 1_000 for latency in latencies)
+    elapsed = (processed_at[-1] - processed_at[0]) / 1e9
+    print(
+        f"{name:>18}: mean {statistics.mean(latencies):>9.1f} us | "
+        f"p50 {latencies[len(latencies) // 2]:>9.1f} us | "
+        f"p99 {latencies[int(len(latencies) * 0.99)]:>9.1f} us | "
+        f"{NUMBER_OF_MESSAGES / elapsed:>7.0f} messages/sec"
+    )
+
+
+if __name__ == "__main__":
+    for mode in ("paced", "burst"):
+        print(f"{mode}: {NUMBER_OF_MESSAGES} depth {DEPTH} book messages")
+        for name, bench in (
+            ("DeribitClient", bench_thread_client),
+            ("DeribitAsyncClient", bench_async_client),
+        ):
+            server = multiprocessing.Process(target=run_server, daemon=True)
+            server.start()
+            time.sleep(1)
+            # Every client runs in own process
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                report(name, pool.apply(bench, (mode,)))
+            server.terminate()
+            server.join()
@@ -0,0 +1,84 @@
+"""
+Benchmark of HDF5Daemon writers for depth 10 order book batches.
+Compares DataFrame.to_hdf append (hdf5.writer = pandas, file opened for every batch)
+with append of records to persistent PyTables table (hdf5.writer = pytables, index built once at close).
+
+Run from root folder:
+    python -m examples.Benchmarks.hdf5_append_benchmark
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import tables
+from pandas import DataFrame
+
+from examples.Benchmarks.batch_store_benchmark import order_book_columns
+from examples.Benchmarks.batch_store_benchmark import order_book_record_dtype
+
+DEPTH = 10
+NUMBER_OF_BATCHES = 200
+BATCH_SIZES = (100, 1_000, 10_000)
+
+
+def make_batches(record_dtype: np.dtype, batch_size: int) -> list:
+    batches = []
+    for batch_index in range(NUMBER_OF_BATCHES):
+        records = np.zeros(batch_size, dtype=record_dtype)
+        for name in record_dtype.names:
+            records[name] = np.random.random(batch_size) * 100
+        records["TIMESTAMP_VALUE"] = np.arange(batch_size) + batch_index * batch_size
+        batches.append(records)
+    return batches
+
+
+def bench_pandas_to_hdf(path: str, batches: list) -> float:
+    start = time.perf_counter()
+    for records in batches:
+        DataFrame(records).to_hdf(
+            path,
+            key="TABLE_DEPTH_10",
+            format="t",
+            append=True,
+            index=False,
+            data_columns=True,
+        )
+    return time.perf_counter() - start
+
+
+def bench_pytables_append(path: str, batches: list) -> float:
+    start = time.perf_counter()
+    hdf5_file = tables.open_file(path, mode="a")
+    table = hdf5_file.create_table(
+        where="/",
+        name="TABLE_DEPTH_10",
+        description=batches[0].dtype,
+        expectedrows=NUMBER_OF_BATCHES * batches[0].shape[0],
+    )
+    for records in batches:
+        table.append(records)
+        table.flush()
+    table.cols.TIMESTAMP_VALUE.create_csindex()
+    hdf5_file.close()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    _record_dtype = order_book_record_dtype(order_book_columns(DEPTH))
+    print(f"{'batch':>6} | {'to_hdf rows/sec':>16} | {'PyTables rows/sec':>18} | speedup")
+    with tempfile.TemporaryDirectory() as directory:
+        for batch_size in BATCH_SIZES:
+            _batches = make_batches(_record_dtype, batch_size)
+            # to_hdf path is slow (attributes of every data column are rewritten per append),
+            # so it is measured on a smaller sample
+            _pandas_batches = _batches[: NUMBER_OF_BATCHES // 4]
+            pandas_rate = len(_pandas_batches) * batch_size / bench_pandas_to_hdf(
+                os.path.join(directory, f"pandas_{batch_size}.h5"), _pandas_batches
+            )
+            pytables_rate = NUMBER_OF_BATCHES * batch_size / bench_pytables_append(
+                os.path.join(directory, f"pytables_{batch_size}.h5"), _batches
+            )
+            print(
+                f"{batch_size:>6} | {pandas_rate:>16,.0f} | {pytables_rate:>18,.0f} | x{pytables_rate / pandas_rate:.1f}"
+            )
@@ -0,0 +1,119 @@
+"""
+Benchmark of HDF5Daemon compression options (hdf5.complib / complevel / shuffle) for depth 10 order book.
+For every codec reports write rows/sec (append of batches + flush), read rows/sec (full table read)
+and bytes/row of final file.
+
+Run from root folder:
+    python -m examples.Benchmarks.hdf5_codec_benchmark
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import tables
+
+from examples.Benchmarks.batch_store_benchmark import order_book_columns
+from examples.Benchmarks.batch_store_benchmark import order_book_record_dtype
+
+DEPTH = 10
+NUMBER_OF_BATCHES = 100
+BATCH_SIZE = 1_000
+NUMBER_OF_INSTRUMENTS = 50
+
+# (complib, complevel, shuffle, chunkshape). Chunkshape None - selected by PyTables from expectedrows.
+# blosc2 selects very big chunks and every flush of small batch recompresses whole last chunk - set chunkshape close to batch size
+CODECS = (
+    (None, 0, False, None),
+    ("zlib", 5, True, None),
+    ("blosc:lz4", 5, True, None),
+    ("blosc:zstd", 5, True, None),
+    ("blosc2:lz4", 5, True, None),
+    ("blosc2:lz4", 5, True, 1024),
+    ("blosc2:zstd", 5, True, 1024),
+    ("blosc2:blosclz", 5, True, 8192),
+    ("blosc2:lz4", 5, True, 8192),
+    ("blosc2:lz4hc", 5, True, 8192),
+    ("blosc2:zstd", 1, True, 8192),
+    ("blosc2:zstd", 5, True, 8192),
+    ("blosc2:zstd", 5, False, 8192),
+)
+
+
+def make_order_book_batches(record_dtype: np.dtype) -> list:
+    """
+    Order book snapshots similar to real ones: few instruments, increasing timestamps,
+    prices on tick grid near previous snapshot of instrument, small amounts.
+    """
+    number_of_rows = NUMBER_OF_BATCHES * BATCH_SIZE
+    records = np.zeros(number_of_rows, dtype=record_dtype)
+    instruments = np.random.randint(0, NUMBER_OF_INSTRUMENTS, size=number_of_rows)
+    records["CHANGE_ID"] = np.arange(number_of_rows) + 10**10
+    records["INSTRUMENT_INDEX"] = 1
+    records["INSTRUMENT_STRIKE"] = 1000 + 100 * instruments
+    records["INSTRUMENT_MATURITY"] = 1_700_000_000 + 86400 * (instruments % 5)
+    records["INSTRUMENT_TYPE"] = instruments % 2
+    records["TIMESTAMP_VALUE"] = 1_700_000_000_000 + np.cumsum(
+        np.random.randint(0, 20, size=number_of_rows)
+    )
+    mid = 0.05 + 0.0005 * np.cumsum(np.random.randint(-1, 2, size=number_of_rows)) / 100
+    for level in range(DEPTH):
+        records[f"BID_{level}_PRICE"] = np.round(mid - 0.0005 * (level + 1), 4)
+        records[f"ASK_{level}_PRICE"] = np.round(mid + 0.0005 * (level + 1), 4)
+        records[f"BID_{level}_AMOUNT"] = np.random.randint(1, 100, size=number_of_rows)
+        records[f"ASK_{level}_AMOUNT"] = np.random.randint(1, 100, size=number_of_rows)
+    return np.split(records, NUMBER_OF_BATCHES)
+
+
+def bench_codec(
+    path: str, batches: list, complib, complevel: int, shuffle: bool, chunkshape
+):
+    filters = (
+        tables.Filters(complib=complib, complevel=complevel, shuffle=shuffle)
+        if complib is not None
+        else None
+    )
+    start = time.perf_counter()
+    with tables.open_file(path, mode="w") as hdf5_file:
+        table = hdf5_file.create_table(
+            where="/",
+            name="TABLE_DEPTH_10",
+            description=batches[0].dtype,
+            expectedrows=NUMBER_OF_BATCHES * BATCH_SIZE,
+            filters=filters,
+            chunkshape=chunkshape,
+        )
+        for records in batches:
+            table.append(records)
+            table.flush()
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with tables.open_file(path, mode="r") as hdf5_file:
+        hdf5_file.root.TABLE_DEPTH_10.read()
+    read_time = time.perf_counter() - start
+    return write_time, read_time, os.path.getsize(path)
+
+
+if __name__ == "__main__":
+    _batches = make_order_book_batches(
+        order_book_record_dtype(order_book_columns(DEPTH))
+    )
+    _number_of_rows = NUMBER_OF_BATCHES * BATCH_SIZE
+    print(
+        f"{'complib':>15} | {'level':>5} | {'shuffle':>7} | {'chunk':>6} | {'write rows/sec':>15} | {'read rows/sec':>15} | {'bytes/row':>9}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for _number, (_complib, _complevel, _shuffle, _chunkshape) in enumerate(CODECS):
+            _write_time, _read_time, _size = bench_codec(
+                os.path.join(directory, f"codec_{_number}.h5"),
+                _batches,
+                _complib,
+                _complevel,
+                _shuffle,
+                _chunkshape,
+            )
+            print(
+                f"{str(_complib):>15} | {_complevel:>5} | {str(_shuffle):>7} | {str(_chunkshape):>6} | {_number_of_rows / _write_time:>15,.0f} | "
+                f"{_number_of_rows / _read_time:>15,.0f} | {_size / _number_of_rows:>9.1f}"
+            )
@@ -0,0 +1,57 @@
+"""
+Benchmark of websocket message decoding (MessageDecoder).
+Decodes depth 10 book notifications with every installed backend and measures prefilter
+of channels nobody consumes (message is dropped before decoding).
+
+Run from root folder:
+    python -m examples.Benchmarks.json_decoder_benchmark
+"""
+import json
+import time
+
+from deribit_data_scrapper.Utils.MessageDecoder import MessageDecoder
+from deribit_data_scrapper.Utils.MessageDecoder import orjson
+from deribit_data_scrapper.Utils.MessageDecoder import simdjson
+
+NUMBER_OF_MESSAGES = 100_000
+DEPTH = 10
+
+
+def book_message(number: int) -> str:
+    return json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "method": "subscription",
+            "params": {
+                "channel": f"book.BTC-29DEC23-{number % 300 * 1000}-C.none.{DEPTH}.100ms",
+                "data": {
+                    "timestamp": 1700000000000 + number,
+                    "instrument_name": f"BTC-29DEC23-{number % 300 * 1000}-C",
+                    "change_id": number,
+                    "bids": [[0.0105 - 0.0005 * i, 12.3 + i] for i in range(DEPTH)],
+                    "asks": [[0.011 + 0.0005 * i, 4.5 + i] for i in range(DEPTH)],
+                },
+            },
+        },
+        separators=(",", ":"),
+    )
+
+
+def bench(decoder: MessageDecoder, messages: list) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        decoder.decode(message)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    messages = [book_message(i) for i in range(NUMBER_OF_MESSAGES)]
+    print(f"{NUMBER_OF_MESSAGES} depth {DEPTH} book messages")
+    for backend, module in (("orjson", orjson), ("simdjson", simdjson), ("json", json)):
+        if module is None:
+            print(f"{backend:>20}: not installed")
+            continue
+        elapsed = bench(MessageDecoder(backend=backend), messages)
+        print(f"{backend:>20}: {NUMBER_OF_MESSAGES / elapsed:>10.0f} messages/sec")
+    elapsed = bench(MessageDecoder(backend="json", consumes=lambda channel: False), messages)
+    print(f"{'prefilter (dropped)':>20}: {NUMBER_OF_MESSAGES / elapsed:>10.0f} messages/sec")
@@ -0,0 +1,126 @@
+"""
+Benchmark of MySqlDaemon insert modes (mysql.insert_mode) for depth 10 order book batches:
+values (legacy string built INSERT), executemany (parameterized INSERT) and load_data (LOAD DATA LOCAL INFILE).
+Reports client side preparation rows/sec and, if MySQL is available, full insert + commit rows/sec.
+
+Local MySQL/MariaDB container:
+    docker run --rm -d -p 3306:3306 -e MARIADB_ROOT_PASSWORD=password -e MARIADB_DATABASE=DeribitOrderBook \\
+        mariadb:11 --local-infile=1
+
+Run from root folder:
+    python -m examples.Benchmarks.mysql_insert_benchmark
+"""
+import os
+import tempfile
+import time
+
+import mysql.connector as connector
+import numpy as np
+from pandas import DataFrame
+
+from deribit_data_scrapper.Utils.mysqlRecording.cleanUpRequestsLimited import (
+    REQUEST_TO_CREATE_LIMITED_ORDER_BOOK_CONTENT,
+)
+from deribit_data_scrapper.Utils.mysqlRecording.postDataTemplateLimited import *
+from examples.Benchmarks.batch_store_benchmark import order_book_columns
+from examples.Benchmarks.batch_store_benchmark import order_book_record_dtype
+
+DEPTH = 10
+BATCH_SIZE = 1_000
+NUMBER_OF_BATCHES = 20
+TABLE_NAME = "BENCHMARK_TABLE_DEPTH_10"
+
+MYSQL_CONFIGURATION = {
+    "host": "127.0.0.1",
+    "user": "root",
+    "password": "password",
+    "database": "DeribitOrderBook",
+}
+
+
+def make_batches() -> list:
+    record_dtype = order_book_record_dtype(order_book_columns(DEPTH))
+    batches = []
+    for batch_index in range(NUMBER_OF_BATCHES):
+        records = np.zeros(BATCH_SIZE, dtype=record_dtype)
+        for name in record_dtype.names:
+            records[name] = np.random.randint(0, 100, size=BATCH_SIZE)
+        records["TIMESTAMP_VALUE"] = 1_700_000_000_000 + np.arange(BATCH_SIZE)
+        # MySqlDaemon drops CHANGE_ID (auto increment in table)
+        batches.append(DataFrame(records).iloc[:, 1:])
+    return batches
+
+
+def prepare_values(data: DataFrame):
+    return INSERT_MULTIPLE_DATA_HEADER_TEMPLATE.format(
+        TABLE_NAME
+    ) + INSERT_MULTIPLE_DATA_VALUES_SYMBOL_TEMPLATE(dataframe=data)
+
+
+def prepare_executemany(data: DataFrame):
+    return dataframe_to_parameters(data)
+
+
+def prepare_load_data(data: DataFrame):
+    return dataframe_to_tsv(data)
+
+
+def insert_values(connection, cursor, data: DataFrame):
+    cursor.execute(prepare_values(data))
+    connection.commit()
+
+
+def insert_executemany(connection, cursor, data: DataFrame):
+    cursor.executemany(
+        INSERT_MULTIPLE_DATA_PARAMETERIZED_TEMPLATE(TABLE_NAME, list(data.columns)),
+        prepare_executemany(data),
+    )
+    connection.commit()
+
+
+def insert_load_data(connection, cursor, data: DataFrame):
+    with tempfile.NamedTemporaryFile(suffix=".tsv", delete=False) as _file:
+        _file.write(prepare_load_data(data))
+    cursor.execute(LOAD_DATA_LOCAL_INFILE_TEMPLATE(TABLE_NAME, _file.name, list(data.columns)))
+    connection.commit()
+    os.remove(_file.name)
+
+
+MODES = {
+    "values": (prepare_values, insert_values),
+    "executemany": (prepare_executemany, insert_executemany),
+    "load_data": (prepare_load_data, insert_load_data),
+}
+
+
+def bench(function, batches: list, *args) -> float:
+    start = time.perf_counter()
+    for data in batches:
+        function(*args, data)
+    return len(batches) * BATCH_SIZE / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    _batches = make_batches()
+    try:
+        _connection = connector.connect(**MYSQL_CONFIGURATION, allow_local_infile=True)
+        _cursor = _connection.cursor()
+        _cursor.execute(f"DROP TABLE IF EXISTS {TABLE_NAME}")
+        _cursor.execute(REQUEST_TO_CREATE_LIMITED_ORDER_BOOK_CONTENT(TABLE_NAME, DEPTH))
+    except connector.Error as e:
+        print(f"MySQL is not available ({e}). Only client side preparation is measured")
+        _connection = None
+
+    print(f"{'mode':>12} | {'prepare rows/sec':>17} | {'insert rows/sec':>16}")
+    for mode, (prepare, insert) in MODES.items():
+        prepare_rate = bench(prepare, _batches)
+        insert_rate = (
+            f"{bench(insert, _batches, _connection, _cursor):>16,.0f}"
+            if _connection is not None
+            else f"{'-':>16}"
+        )
+        print(f"{mode:>12} | {prepare_rate:>17,.0f} | {insert_rate}")
+
+    if _connection is not None:
+        _cursor.execute(f"DROP TABLE {TABLE_NAME}")
+        _connection.close()
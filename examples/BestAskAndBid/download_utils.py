@@ -1,3 +1,4 @@
+from time import mktime
 from typing import Union, Optional
 import numpy as np
 import pandas as pd
@@ -112,18 +113,30 @@ def get_change_id_borders(left_timestamp: pd.Timestamp,
     return left_id, right_id
 
 
+def to_timestamp_value(timestamp: pd.Timestamp) -> int:
+    # Inverse of pd.Timestamp.fromtimestamp(TIMESTAMP_VALUE // 1000) used above (local time)
+    return int(mktime(timestamp.timetuple())) * 1000
+
+
+def get_time_range_query(left_timestamp: pd.Timestamp,
+                         right_timestamp: pd.Timestamp,
+                         table: str = 'trades') -> str:
+    """
+    One range scan of TIME_INSTRUMENT_INDEX (see onlineMigration for existing tables).
+    bin_search over CHANGE_ID is only needed for tables without time index.
+    """
+    assert left_timestamp < right_timestamp
+    return """SELECT * FROM {} WHERE TIMESTAMP_VALUE >= {} AND TIMESTAMP_VALUE < {} ORDER BY CHANGE_ID;""".format(
+        get_table(table), to_timestamp_value(left_timestamp), to_timestamp_value(right_timestamp)
+    )
+
+
 # TODO: make batching
 def get_trades_by_time(start_time: pd.Timestamp,
                        end_time: pd.Timestamp,
                        table: str = 'trades') -> Union[pd.DataFrame, dict]:
 
-    left_border, right_border = get_change_id_borders(start_time, end_time, table)
-    print('Found CHANGE ID for time interval, getting data')
-
-    REQUEST = """SELECT * FROM {} WHERE CHANGE_ID between {} and {};"""
-
-    df = read_data_from_mysql(
-        REQUEST.format(get_table(table), left_border, right_border))
+    df = read_data_from_mysql(get_time_range_query(start_time, end_time, table))
 
     time = df["TIMESTAMP_VALUE"]
     instrument_description = df[